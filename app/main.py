@@ -1,14 +1,68 @@
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from app.schemas import TaskDetailResponse, TaskRequest, TaskSubmissionResponse
-from app.services import task_service
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-app = FastAPI(title="FastAPI Redis Mini")
+from app.schemas import (
+    DeadLetterResponse,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskDetailResponse,
+    TaskRequest,
+    TaskStatusBatchResponse,
+    TaskStatusQuery,
+    TaskSubmissionResponse,
+)
+from app.services import (
+    admission_service,
+    cache_service,
+    completion_service,
+    dead_letter_service,
+    queue_service,
+    task_service,
+)
+from infra import metrics, redis_client
+from infra.settings import get_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    await redis_client.warm_up(redis_client.get_client(), settings)
+    invalidation = None
+    if settings.local_cache_enabled:
+        invalidation = asyncio.create_task(
+            cache_service.run_local_invalidation(redis_client.get_pubsub_client(), settings)
+        )
+    try:
+        yield
+    finally:
+        if invalidation is not None:
+            invalidation.cancel()
+            await asyncio.gather(invalidation, return_exceptions=True)
+        await completion_service.close_listener()
+        await redis_client.close_client()
+
+
+app = FastAPI(title="FastAPI Redis Mini", lifespan=lifespan)
+if get_settings().metrics_enabled:
+    app.add_middleware(metrics.RequestTimingMiddleware)
+
+
+def _client_id(http_request: Request) -> str:
+    settings = get_settings()
+    if settings.trust_client_id_header:
+        client_id = http_request.headers.get(settings.client_id_header)
+        if client_id:
+            return client_id
+    return http_request.client.host if http_request.client else "anonymous"
 
 
 @app.post("/tasks", response_model=TaskSubmissionResponse, status_code=202)
-async def submit_task_endpoint(request: TaskRequest):
+async def submit_task_endpoint(request: TaskRequest, http_request: Request):
+    await admission_service.admit(_client_id(http_request))
     response = await task_service.submit_task(request)
     status_code = 200 if response.cached else 202
     return JSONResponse(
@@ -17,7 +71,77 @@ async def submit_task_endpoint(request: TaskRequest):
     )
 
 
+@app.post("/tasks/batch", response_model=TaskBatchResponse, status_code=202)
+async def submit_task_batch_endpoint(request: TaskBatchRequest, http_request: Request):
+    await admission_service.admit(_client_id(http_request), cost=len(request.tasks))
+    response = await task_service.submit_tasks(request.tasks)
+    status_code = 200 if all(item.cached for item in response.items) else 202
+    return JSONResponse(
+        status_code=status_code,
+        content=response.model_dump(),
+    )
+
+
+@app.post("/tasks/status", response_model=TaskStatusBatchResponse)
+async def get_task_statuses_endpoint(query: TaskStatusQuery):
+    response = await task_service.get_task_statuses(query.task_ids, query.fields)
+    return JSONResponse(content=response.model_dump(exclude_unset=True))
+
+
 @app.get("/tasks/{task_id}", response_model=TaskDetailResponse)
-async def get_task_endpoint(task_id: str):
+async def get_task_endpoint(
+    task_id: str,
+    http_request: Request,
+    wait: float = Query(0, ge=0, description="Long-poll up to this many seconds"),
+):
+    if wait > 0:
+        metrics.skip_request_timing(http_request.scope)
+        return await task_service.wait_for_task(task_id, wait)
     detail = await task_service.get_task(task_id)
     return detail
+
+
+@app.get("/tasks/{task_id}/events")
+async def task_events_endpoint(task_id: str, http_request: Request):
+    metrics.skip_request_timing(http_request.scope)
+    await task_service.get_task(task_id)
+
+    async def stream() -> AsyncIterator[str]:
+        async for detail in task_service.watch_task(task_id):
+            if detail is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: status\ndata: {detail.model_dump_json()}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+@app.get("/dead-letters", response_model=DeadLetterResponse)
+async def list_dead_letters_endpoint(
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+):
+    return await dead_letter_service.list_dead_letters(limit, offset)
+
+
+@app.post(
+    "/dead-letters/{task_id}/requeue",
+    response_model=TaskSubmissionResponse,
+    status_code=202,
+)
+async def requeue_dead_letter_endpoint(task_id: str):
+    return await dead_letter_service.requeue_dead_letter(task_id)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    settings = get_settings()
+    redis = redis_client.get_client()
+    keys = queue_service.all_queue_keys(settings)
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.llen(key)
+        lengths = await pipe.execute()
+    for key, length in zip(keys, lengths):
+        metrics.QUEUE_LENGTH.labels(key).set(length)
+    return Response(metrics.generate_latest(), media_type=metrics.CONTENT_TYPE_LATEST)
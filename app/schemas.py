@@ -1,7 +1,8 @@
+from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, ClassVar, Dict, List, Optional, Set
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class TaskStatus(str, Enum):
@@ -11,9 +12,59 @@ class TaskStatus(str, Enum):
     FAILED = "FAILED"
 
 
+class TaskField(str, Enum):
+    STATUS = "status"
+    RESULT = "result"
+    ERROR = "error"
+
+
+class TaskPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+DEFAULT_TASK_TYPE = "default"
+
+
 class TaskRequest(BaseModel):
+    # Scheduling hints that must not change what the job computes (or its
+    # cache signature).
+    ROUTING_FIELDS: ClassVar[Set[str]] = {"priority", "run_at", "delay"}
+
     prompt: str
     params: Dict[str, Any] = Field(default_factory=dict)
+    priority: TaskPriority = TaskPriority.NORMAL
+    task_type: str = Field(DEFAULT_TASK_TYPE, min_length=1, max_length=64)
+    # Naive datetimes are taken as UTC.
+    run_at: Optional[datetime] = None
+    delay: Optional[float] = Field(None, ge=0, description="Seconds to wait before running")
+
+    @model_validator(mode="after")
+    def _one_schedule(self) -> "TaskRequest":
+        if self.run_at is not None and self.delay is not None:
+            raise ValueError("run_at and delay are mutually exclusive")
+        return self
+
+    def scheduled_at(self, now: float) -> Optional[float]:
+        """Epoch seconds the task becomes runnable, or None to run now."""
+        if self.delay:
+            return now + self.delay
+        if self.run_at is not None:
+            run_at = self.run_at
+            if run_at.tzinfo is None:
+                run_at = run_at.replace(tzinfo=timezone.utc)
+            timestamp = run_at.timestamp()
+            if timestamp > now:
+                return timestamp
+        return None
+
+    def job_payload(self) -> Dict[str, Any]:
+        exclude = set(self.ROUTING_FIELDS)
+        # Default-type payloads keep the signatures they had before task types.
+        if self.task_type == DEFAULT_TASK_TYPE:
+            exclude.add("task_type")
+        return self.model_dump(exclude=exclude)
 
 
 class TaskSubmissionResponse(BaseModel):
@@ -23,8 +74,46 @@ class TaskSubmissionResponse(BaseModel):
     result: Optional[Dict[str, Any]] = None
 
 
+class TaskBatchRequest(BaseModel):
+    tasks: List[TaskRequest] = Field(min_length=1)
+
+
+class TaskBatchResponse(BaseModel):
+    items: List[TaskSubmissionResponse]
+
+
 class TaskDetailResponse(BaseModel):
     task_id: str
     status: TaskStatus
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+
+
+class TaskStatusQuery(BaseModel):
+    task_ids: List[str] = Field(min_length=1)
+    fields: List[TaskField] = Field(default_factory=lambda: list(TaskField))
+
+
+class TaskStatusItem(BaseModel):
+    task_id: str
+    status: Optional[TaskStatus] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class TaskStatusBatchResponse(BaseModel):
+    items: List[TaskStatusItem]
+    missing: List[str] = Field(default_factory=list)
+
+
+class DeadLetterItem(BaseModel):
+    task_id: str
+    status: Optional[TaskStatus] = None
+    task_type: Optional[str] = None
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+class DeadLetterResponse(BaseModel):
+    items: List[DeadLetterItem]
+    total: int
@@ -1,3 +1,17 @@
-from . import cache_service, task_service  # noqa: F401
+from . import (  # noqa: F401
+    admission_service,
+    cache_service,
+    completion_service,
+    dead_letter_service,
+    queue_service,
+    task_service,
+)
 
-__all__ = ["cache_service", "task_service"]
+__all__ = [
+    "admission_service",
+    "cache_service",
+    "completion_service",
+    "dead_letter_service",
+    "queue_service",
+    "task_service",
+]
@@ -0,0 +1,143 @@
+import asyncio
+import math
+import time
+from typing import Optional
+
+from fastapi import HTTPException, status
+from redis.asyncio import Redis
+
+from app.services import queue_service
+from app.services.queue_service import QueueSnapshot
+from infra import redis_client
+from infra.redis_scripts import LuaScript
+from infra.settings import Settings, get_settings
+
+# Token bucket refilled continuously at ARGV[1] tokens/s up to ARGV[2].
+# KEYS: bucket hash
+# ARGV: rate, burst, cost
+_TOKEN_BUCKET_SCRIPT = LuaScript(
+    """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+)
+
+
+class AdmissionController:
+    def __init__(self, settings: Settings, clock=time.monotonic) -> None:
+        self.settings = settings
+        self._clock = clock
+        self.snapshot: Optional[QueueSnapshot] = None
+        self._refreshing: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.settings.max_queue_length > 0 or self.settings.max_queue_age_seconds > 0
+
+    async def refresh(self, redis: Redis) -> QueueSnapshot:
+        self.snapshot = await queue_service.take_snapshot(
+            redis,
+            self.settings,
+            include_age=self.settings.max_queue_age_seconds > 0,
+            clock=self._clock,
+        )
+        return self.snapshot
+
+    async def current(self, redis: Redis) -> QueueSnapshot:
+        snapshot = self.snapshot
+        if (
+            snapshot is not None
+            and self._clock() - snapshot.taken_at < self.settings.admission_refresh_interval
+        ):
+            return snapshot
+        # Concurrent requests share one in-flight refresh.
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh(redis))
+        return await asyncio.shield(self._refreshing)
+
+    async def check(self, redis: Redis) -> None:
+        if not self.enabled:
+            return
+        snapshot = await self.current(redis)
+        overloaded = (
+            0 < self.settings.max_queue_length <= snapshot.depth
+            or 0 < self.settings.max_queue_age_seconds <= snapshot.oldest_age
+        )
+        if overloaded:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Task queue is saturated",
+                headers={"Retry-After": str(self.settings.overload_retry_after)},
+            )
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_controller(settings: Settings) -> AdmissionController:
+    global _controller
+    if _controller is None or _controller.settings is not settings:
+        _controller = AdmissionController(settings)
+    return _controller
+
+
+def reset_controller() -> None:
+    global _controller
+    _controller = None
+
+
+async def check_rate_limit(
+    redis: Redis,
+    settings: Settings,
+    client_id: str,
+    cost: int = 1,
+) -> None:
+    rate = settings.rate_limit_per_second
+    if rate <= 0:
+        return
+    burst = settings.rate_limit_burst or max(math.ceil(rate), 1)
+    # A batch larger than the bucket drains it rather than being refused forever.
+    cost = min(cost, burst)
+    allowed, wait = await _TOKEN_BUCKET_SCRIPT(
+        redis,
+        keys=[f"{settings.rate_limit_prefix}{client_id}"],
+        args=[rate, burst, cost],
+    )
+    if not int(allowed):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(math.ceil(float(wait)), 1))},
+        )
+
+
+async def admit(
+    client_id: str,
+    cost: int = 1,
+    settings: Settings | None = None,
+) -> None:
+    settings = settings or get_settings()
+    controller = get_controller(settings)
+    if not controller.enabled and settings.rate_limit_per_second <= 0:
+        return
+    redis = redis_client.get_client()
+    await controller.check(redis)
+    await check_rate_limit(redis, settings, client_id, cost)
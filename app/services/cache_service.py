@@ -1,18 +1,127 @@
 import hashlib
-import json
-from typing import Any, Dict, Optional
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 
+from infra import metrics
+from infra.codec import get_codec
 from infra.settings import Settings
 
+_KEYSPACE_INVALIDATING_EVENTS = frozenset({"set", "del", "expired", "evicted", "unlink"})
 
-def _serialize_payload(payload: Dict[str, Any]) -> str:
-    return json.dumps(payload, sort_keys=True, separators=(",", ":"))
 
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    local_misses: int = 0
+    redis_hits: int = 0
+    redis_misses: int = 0
 
-def compute_signature(payload: Dict[str, Any]) -> str:
-    normalized = _serialize_payload(payload).encode("utf-8")
+    def record_redis(self, hit: bool) -> None:
+        if hit:
+            self.redis_hits += 1
+        else:
+            self.redis_misses += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return asdict(self)
+
+    def reset(self) -> None:
+        self.local_hits = self.local_misses = 0
+        self.redis_hits = self.redis_misses = 0
+
+
+class LocalResultCache:
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, signature: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(signature)
+        if entry is None:
+            return None
+        expires_at, _, result = entry
+        if expires_at <= self._clock():
+            self.invalidate(signature)
+            return None
+        self._entries.move_to_end(signature)
+        return result
+
+    def put(
+        self,
+        signature: str,
+        result: Dict[str, Any],
+        size: int,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        # ttl_seconds (the entry's Redis TTL) can only shorten the local TTL.
+        ttl = self.ttl_seconds if ttl_seconds is None else min(self.ttl_seconds, ttl_seconds)
+        if size > self.max_bytes or self.max_entries <= 0 or ttl <= 0:
+            return
+        self.invalidate(signature)
+        self._entries[signature] = (self._clock() + ttl, size, result)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def invalidate(self, signature: str) -> None:
+        entry = self._entries.pop(signature, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+
+stats = CacheStats()
+metrics.register_cache_stats(stats.snapshot)
+_local_cache: Optional[LocalResultCache] = None
+
+
+def get_local_cache(settings: Settings) -> Optional[LocalResultCache]:
+    global _local_cache
+    if not settings.local_cache_enabled:
+        return None
+    if _local_cache is None:
+        _local_cache = LocalResultCache(
+            max_entries=settings.local_cache_max_entries,
+            max_bytes=settings.local_cache_max_bytes,
+            ttl_seconds=min(settings.local_cache_ttl_seconds, settings.cache_ttl_seconds),
+        )
+    return _local_cache
+
+
+def reset_local_cache() -> None:
+    global _local_cache
+    _local_cache = None
+    stats.reset()
+
+
+def compute_signature(payload: Dict[str, Any], codec_name: str = "json") -> str:
+    normalized = get_codec(codec_name).canonical(payload)
     return hashlib.sha256(normalized).hexdigest()
 
 
@@ -20,16 +129,87 @@ def build_cache_key(settings: Settings, signature: str) -> str:
     return f"{settings.cache_prefix}{signature}"
 
 
+def cache_ttl_for(settings: Settings, task_type: Optional[str]) -> int:
+    configured = settings.task_type_config(task_type).cache_ttl_seconds
+    return settings.cache_ttl_seconds if configured is None else configured
+
+
+def build_inflight_key(settings: Settings, signature: str, priority: str = "normal") -> str:
+    # Keyed per priority so an urgent duplicate never waits behind a queued
+    # low-priority task; normal keeps the original key.
+    if priority == "normal":
+        return f"{settings.inflight_prefix}{signature}"
+    return f"{settings.inflight_prefix}{signature}:{priority}"
+
+
+def lookup_local(settings: Settings, signature: str) -> Optional[Dict[str, Any]]:
+    local = get_local_cache(settings)
+    if local is None:
+        return None
+    result = local.get(signature)
+    if result is None:
+        stats.local_misses += 1
+    else:
+        stats.local_hits += 1
+    return result
+
+
+def remember_remote(
+    settings: Settings,
+    signature: str,
+    cached: Optional[str],
+    ttl_seconds: Optional[int] = None,
+) -> Optional[Dict[str, Any]]:
+    stats.record_redis(bool(cached))
+    result = decode_cached_result(settings, cached)
+    local = get_local_cache(settings)
+    if result is not None and local is not None:
+        local.put(signature, result, len(cached), ttl_seconds)
+    return result
+
+
 async def try_get_cached_result(
     redis: Redis,
     settings: Settings,
     signature: str,
+    ttl_seconds: Optional[int] = None,
 ) -> Optional[Dict[str, Any]]:
+    result = lookup_local(settings, signature)
+    if result is not None:
+        return result
     cache_key = build_cache_key(settings, signature)
     cached = await redis.get(cache_key)
+    return remember_remote(settings, signature, cached, ttl_seconds)
+
+
+async def get_cached_results(
+    redis: Redis,
+    settings: Settings,
+    signatures: Sequence[str],
+    ttls: Optional[Dict[str, int]] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    results = [lookup_local(settings, signature) for signature in signatures]
+    remote = [signature for signature, result in zip(signatures, results) if result is None]
+    if not remote:
+        return results
+    cached = await redis.mget([build_cache_key(settings, signature) for signature in remote])
+    fetched = {
+        signature: remember_remote(settings, signature, value, (ttls or {}).get(signature))
+        for signature, value in zip(remote, cached)
+    }
+    return [
+        result if result is not None else fetched[signature]
+        for signature, result in zip(signatures, results)
+    ]
+
+
+def decode_cached_result(
+    settings: Settings,
+    cached: Optional[str],
+) -> Optional[Dict[str, Any]]:
     if not cached:
         return None
-    return json.loads(cached)
+    return get_codec(settings.codec).loads(cached)
 
 
 async def store_cached_result(
@@ -37,6 +217,46 @@ async def store_cached_result(
     settings: Settings,
     signature: str,
     result: Dict[str, Any],
+    ttl_seconds: Optional[int] = None,
+) -> None:
+    ttl_seconds = settings.cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+    if ttl_seconds <= 0:
+        return
+    cache_key = build_cache_key(settings, signature)
+    encoded = get_codec(settings.codec).dumps(result)
+    await redis.set(cache_key, encoded, ex=ttl_seconds)
+
+
+def stage_cached_result(
+    pipe: Pipeline,
+    settings: Settings,
+    signature: str,
+    result: Dict[str, Any],
+    ttl_seconds: Optional[int] = None,
 ) -> None:
+    ttl_seconds = settings.cache_ttl_seconds if ttl_seconds is None else ttl_seconds
+    if ttl_seconds <= 0:
+        return
     cache_key = build_cache_key(settings, signature)
-    await redis.set(cache_key, json.dumps(result), ex=settings.cache_ttl_seconds)
+    encoded = get_codec(settings.codec).dumps(result)
+    pipe.set(cache_key, encoded, ex=ttl_seconds)
+
+
+async def run_local_invalidation(redis: Redis, settings: Settings) -> None:
+    # Requires notify-keyspace-events to include "K" plus the generic ("g"),
+    # string ("$"), expired ("x") and evicted ("e") classes on the server.
+    local = get_local_cache(settings)
+    if local is None:
+        return
+    db = redis.connection_pool.connection_kwargs.get("db", 0)
+    channel_prefix = f"__keyspace@{db}__:{settings.cache_prefix}"
+    pubsub = redis.pubsub(ignore_subscribe_messages=True)
+    await pubsub.psubscribe(f"{channel_prefix}*")
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") != "pmessage":
+                continue
+            if message["data"] in _KEYSPACE_INVALIDATING_EVENTS:
+                local.invalidate(message["channel"][len(channel_prefix):])
+    finally:
+        await pubsub.aclose()
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+
+from redis.asyncio import Redis
+
+from infra import redis_client
+from infra.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CompletionListener:
+    """Fans completion events out to per-task futures.
+
+    One ``PSUBSCRIBE <events prefix>*`` per process serves every long-poll and
+    SSE request, so waiting clients hold a future rather than a pub/sub
+    connection each.
+    """
+
+    def __init__(self, redis: Redis, events_prefix: str) -> None:
+        self.redis = redis
+        self.events_prefix = events_prefix
+        self.loop = asyncio.get_running_loop()
+        self._waiters: Dict[str, Set[asyncio.Future]] = {}
+        self._ready: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._ready = self.loop.create_future()
+            self._task = asyncio.create_task(self._listen(self._ready))
+        # Returns once the server has confirmed the subscription, so a status
+        # read issued afterwards cannot miss an event published in between.
+        await asyncio.shield(self._ready)
+
+    def watch(self, task_id: str) -> asyncio.Future:
+        future = self.loop.create_future()
+        self._waiters.setdefault(task_id, set()).add(future)
+        return future
+
+    def forget(self, task_id: str, future: asyncio.Future) -> None:
+        waiters = self._waiters.get(task_id)
+        if waiters is None:
+            return
+        waiters.discard(future)
+        if not waiters:
+            del self._waiters[task_id]
+
+    def _resolve(self, task_id: str, status: Optional[str]) -> None:
+        for future in self._waiters.pop(task_id, ()):
+            if not future.done():
+                future.set_result(status)
+
+    async def _listen(self, ready: asyncio.Future) -> None:
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.psubscribe(f"{self.events_prefix}*")
+            async for message in pubsub.listen():
+                if message["type"] == "psubscribe" and not ready.done():
+                    ready.set_result(None)
+                elif message["type"] == "pmessage":
+                    self._resolve(message["channel"][len(self.events_prefix):], message["data"])
+        except Exception as exc:  # noqa: BLE001
+            if not ready.done():
+                ready.set_exception(exc)
+            else:
+                logger.warning("completion listener stopped", exc_info=True)
+        finally:
+            if not ready.done():
+                ready.cancel()
+            # Wake every waiter so it re-reads the task; the next start()
+            # subscribes again.
+            for task_id in list(self._waiters):
+                self._resolve(task_id, None)
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+_listener: Optional[CompletionListener] = None
+
+
+async def get_listener(settings: Settings | None = None) -> CompletionListener:
+    global _listener
+    settings = settings or get_settings()
+    redis = redis_client.get_pubsub_client()
+    current = _listener
+    if (
+        current is None
+        or current.loop is not asyncio.get_running_loop()
+        or current.redis is not redis
+        or current.events_prefix != settings.task_events_prefix
+    ):
+        if current is not None and current.loop is asyncio.get_running_loop():
+            await current.close()
+        current = _listener = CompletionListener(redis, settings.task_events_prefix)
+    await current.start()
+    return current
+
+
+async def close_listener() -> None:
+    global _listener
+    if _listener is not None and _listener.loop is asyncio.get_running_loop():
+        await _listener.close()
+    _listener = None
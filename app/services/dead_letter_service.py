@@ -0,0 +1,92 @@
+import time
+
+from fastapi import HTTPException, status
+
+from app.schemas import (
+    DEFAULT_TASK_TYPE,
+    DeadLetterItem,
+    DeadLetterResponse,
+    TaskPriority,
+    TaskStatus,
+    TaskSubmissionResponse,
+)
+from app.services import queue_service
+from infra import redis_client
+from infra.settings import Settings, get_settings
+
+
+async def list_dead_letters(
+    limit: int = 100,
+    offset: int = 0,
+    settings: Settings | None = None,
+) -> DeadLetterResponse:
+    settings = settings or get_settings()
+    redis = redis_client.get_client()
+    key = queue_service.dead_letter_key(settings)
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.lrange(key, offset, offset + limit - 1)
+        pipe.llen(key)
+        task_ids, total = await pipe.execute()
+    if not task_ids:
+        return DeadLetterResponse(items=[], total=total)
+    async with redis.pipeline(transaction=False) as pipe:
+        for task_id in task_ids:
+            pipe.hmget(
+                f"{settings.task_hash_prefix}{task_id}",
+                ["status", "task_type", "attempts", "error"],
+            )
+        rows = await pipe.execute()
+    items = [
+        DeadLetterItem(
+            task_id=task_id,
+            status=raw_status,
+            task_type=task_type,
+            attempts=int(attempts or 0),
+            error=error or None,
+        )
+        for task_id, (raw_status, task_type, attempts, error) in zip(task_ids, rows)
+    ]
+    return DeadLetterResponse(items=items, total=total)
+
+
+async def requeue_dead_letter(
+    task_id: str,
+    settings: Settings | None = None,
+) -> TaskSubmissionResponse:
+    settings = settings or get_settings()
+    redis = redis_client.get_client()
+    # LREM doubles as the claim so concurrent requeues enqueue the task once.
+    if not await redis.lrem(queue_service.dead_letter_key(settings), 1, task_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task is not in the dead-letter queue",
+        )
+    task_key = f"{settings.task_hash_prefix}{task_id}"
+    payload, priority, task_type = await redis.hmget(
+        task_key, ["payload", "priority", "task_type"]
+    )
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task payload has expired",
+        )
+    queue_key = queue_service.queue_key_for(
+        settings, priority or TaskPriority.NORMAL, task_type or DEFAULT_TASK_TYPE
+    )
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            task_key,
+            mapping={
+                "status": TaskStatus.PENDING.value,
+                "result": "",
+                "error": "",
+                "attempts": 0,
+                "enqueued_at": time.time(),
+                # The marker was cleared on failure; a requeued task holds none.
+                "inflight": "",
+            },
+        )
+        pipe.expire(task_key, settings.task_ttl_seconds)
+        pipe.rpush(queue_key, task_id)
+        await pipe.execute()
+    return TaskSubmissionResponse(task_id=task_id, status=TaskStatus.PENDING)
@@ -0,0 +1,190 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from redis.asyncio import Redis
+
+from app.schemas import DEFAULT_TASK_TYPE, TaskPriority
+from infra.redis_scripts import LuaScript
+from infra.settings import Settings
+
+PRIORITY_ORDER = (TaskPriority.HIGH, TaskPriority.NORMAL, TaskPriority.LOW)
+
+# Move up to ARGV[2] members scored at or before ARGV[1], across all the
+# delayed sets, onto the tail of their ready queues. ZRANGEBYSCORE with LIMIT
+# touches only the due head of each set, however many entries wait behind it.
+# KEYS: delayed set and ready queue pairs
+# ARGV: now, batch size
+_PROMOTE_DUE_SCRIPT = LuaScript(
+    """
+local budget = tonumber(ARGV[2])
+local moved = 0
+for index = 1, #KEYS, 2 do
+    if moved >= budget then
+        break
+    end
+    local due = redis.call(
+        'ZRANGEBYSCORE', KEYS[index], '-inf', ARGV[1], 'LIMIT', 0, budget - moved
+    )
+    if #due > 0 then
+        redis.call('ZREM', KEYS[index], unpack(due))
+        redis.call('RPUSH', KEYS[index + 1], unpack(due))
+        moved = moved + #due
+    end
+end
+return moved
+"""
+)
+
+
+def _queue_base(settings: Settings, task_type: Optional[str]) -> str:
+    queue = settings.task_type_config(task_type).queue
+    return f"{settings.queue_key}:{queue}" if queue else settings.queue_key
+
+
+def queue_key_for(
+    settings: Settings,
+    priority: TaskPriority | str,
+    task_type: Optional[str] = None,
+) -> str:
+    priority = TaskPriority(priority)
+    base = _queue_base(settings, task_type)
+    # Normal keeps the historical key so existing deployments drain as before.
+    if priority is TaskPriority.NORMAL:
+        return base
+    return f"{base}:{priority.value}"
+
+
+def queue_bases(settings: Settings, task_types: Optional[Sequence[str]] = None) -> List[str]:
+    """Base keys for the given task types; every configured queue when None."""
+    if task_types is None:
+        task_types = [DEFAULT_TASK_TYPE, *settings.task_types]
+    return list(dict.fromkeys(_queue_base(settings, task_type) for task_type in task_types))
+
+
+def priority_groups(
+    settings: Settings, task_types: Optional[Sequence[str]] = None
+) -> List[List[str]]:
+    bases = queue_bases(settings, task_types)
+    return [
+        [base if priority is TaskPriority.NORMAL else f"{base}:{priority.value}" for base in bases]
+        for priority in PRIORITY_ORDER
+    ]
+
+
+def all_queue_keys(settings: Settings, task_types: Optional[Sequence[str]] = None) -> List[str]:
+    return [key for group in priority_groups(settings, task_types) for key in group]
+
+
+def queue_task_types(settings: Settings) -> Dict[str, List[str]]:
+    """Task types with a dedicated queue, keyed by every key of that queue."""
+    owners: Dict[str, List[str]] = {}
+    for task_type, config in settings.task_types.items():
+        if not config.queue:
+            continue
+        for key in all_queue_keys(settings, [task_type]):
+            owners.setdefault(key, []).append(task_type)
+    return owners
+
+
+def delayed_key_for(queue_key: str) -> str:
+    return f"{queue_key}:delayed"
+
+
+def dead_letter_key(settings: Settings) -> str:
+    return f"{settings.queue_key}:dead"
+
+
+def message_task_id(message: str) -> str:
+    # Messages enqueued before queues carried bare ids are JSON objects; their
+    # task hashes still hold the payload, so only the id is needed to drain them.
+    if message.startswith("{"):
+        return json.loads(message)["task_id"]
+    return message
+
+
+async def promote_due(
+    redis: Redis,
+    settings: Settings,
+    now: Optional[float] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Move every due delayed task onto its ready queue; returns the count.
+
+    Each script call moves at most ``batch_size`` tasks so a large backlog of
+    due entries never blocks Redis for long.
+    """
+    now = time.time() if now is None else now
+    batch_size = batch_size or settings.delayed_batch_size
+    keys: List[str] = []
+    for queue_key in all_queue_keys(settings):
+        keys += [delayed_key_for(queue_key), queue_key]
+    promoted = 0
+    while True:
+        moved = int(await _PROMOTE_DUE_SCRIPT(redis, keys=keys, args=[now, batch_size]))
+        promoted += moved
+        if moved < batch_size:
+            return promoted
+
+
+@dataclass
+class QueueSnapshot:
+    depth: int
+    oldest_age: float
+    taken_at: float
+
+
+async def take_snapshot(
+    redis: Redis,
+    settings: Settings,
+    include_age: bool = True,
+    clock: Callable[[], float] = time.monotonic,
+) -> QueueSnapshot:
+    keys = all_queue_keys(settings)
+    async with redis.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.llen(key)
+        for key in keys:
+            pipe.lindex(key, 0)
+        replies = await pipe.execute()
+    depth = sum(replies[: len(keys)])
+    heads = [message_task_id(head) for head in replies[len(keys):] if head]
+    oldest_age = 0.0
+    if heads and include_age:
+        async with redis.pipeline(transaction=False) as pipe:
+            for task_id in heads:
+                pipe.hget(f"{settings.task_hash_prefix}{task_id}", "enqueued_at")
+            enqueued = [float(value) for value in await pipe.execute() if value]
+        if enqueued:
+            oldest_age = max(time.time() - min(enqueued), 0.0)
+    return QueueSnapshot(depth, oldest_age, clock())
+
+
+# Orders the priority queues for each dequeue attempt. "weighted" uses smooth
+# weighted round-robin to pick the leading priority and falls back to the rest
+# in priority order, so an empty lead queue never wastes a worker slot. Within
+# a priority, the shared queue comes before the per-type queues.
+class QueueScheduler:
+    def __init__(self, settings: Settings, task_types: Optional[Sequence[str]] = None) -> None:
+        self.strict = settings.scheduling == "strict"
+        self.groups = priority_groups(settings, task_types)
+        self.keys = [key for group in self.groups for key in group]
+        self.weights = [
+            max(int(settings.priority_weights.get(priority.value, 0)), 0)
+            for priority in PRIORITY_ORDER
+        ]
+        if not any(self.weights):
+            self.strict = True
+        self._current = [0] * len(self.groups)
+
+    def next_order(self) -> List[str]:
+        if self.strict:
+            return list(self.keys)
+        total = sum(self.weights)
+        for index, weight in enumerate(self.weights):
+            self._current[index] += weight
+        lead = max(range(len(self.groups)), key=lambda index: self._current[index])
+        self._current[lead] -= total
+        rest = [key for index, group in enumerate(self.groups) if index != lead for key in group]
+        return self.groups[lead] + rest
@@ -1,65 +1,142 @@
-import json
+import asyncio
+import math
+import time
 import uuid
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
 
 from fastapi import HTTPException, status
 from redis.asyncio import Redis
 
 from app.schemas import (
+    TaskBatchResponse,
     TaskDetailResponse,
+    TaskField,
     TaskRequest,
     TaskStatus,
+    TaskStatusBatchResponse,
+    TaskStatusItem,
     TaskSubmissionResponse,
 )
 from infra import redis_client
+from infra.codec import get_codec
+from infra.redis_scripts import LuaScript
 from infra.settings import Settings, get_settings
-from app.services import cache_service
+from app.services import cache_service, completion_service, queue_service
+
+_SUBMIT_CREATED = 0
+_SUBMIT_CACHED = 1
+_SUBMIT_IN_FLIGHT = 2
+
+# Cache check, single-flight claim, task hash creation and enqueue in one
+# round-trip. Scheduled tasks go to the queue's delayed set instead and never
+# take part in single-flight: a run-now duplicate must not wait on them. The
+# hash records the in-flight key it holds so the worker clears exactly that.
+# KEYS: cache key, in-flight key, task hash key, queue key, delayed key
+# ARGV: pending status, payload, signature, task ttl, task id, priority,
+#       enqueue timestamp, task type, run-at timestamp or "", in-flight ttl
+_SUBMIT_SCRIPT = LuaScript(
+    """
+local cached = redis.call('GET', KEYS[1])
+if cached then
+    return {1, cached}
+end
+local inflight = ''
+if ARGV[9] == '' then
+    local existing = redis.call('GET', KEYS[2])
+    if existing then
+        return {2, existing}
+    end
+    redis.call('SET', KEYS[2], ARGV[5], 'EX', ARGV[10])
+    inflight = KEYS[2]
+end
+redis.call(
+    'HSET', KEYS[3],
+    'status', ARGV[1], 'result', '', 'error', '',
+    'payload', ARGV[2], 'signature', ARGV[3], 'priority', ARGV[6],
+    'enqueued_at', ARGV[7], 'task_type', ARGV[8], 'inflight', inflight
+)
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+if ARGV[9] ~= '' then
+    redis.call('ZADD', KEYS[5], ARGV[9], ARGV[5])
+else
+    redis.call('RPUSH', KEYS[4], ARGV[5])
+end
+return {0, ''}
+"""
+)
+
+FINAL_STATUSES = frozenset({TaskStatus.DONE, TaskStatus.FAILED})
 
 
 def _task_key(settings: Settings, task_id: str) -> str:
     return f"{settings.task_hash_prefix}{task_id}"
 
 
+def _events_channel(settings: Settings, task_id: str) -> str:
+    return f"{settings.task_events_prefix}{task_id}"
+
+
+def _task_ttl(settings: Settings, now: float, run_at: Optional[float]) -> int:
+    # Scheduled tasks must outlive their wait in the delayed set.
+    if run_at is None:
+        return settings.task_ttl_seconds
+    return settings.task_ttl_seconds + math.ceil(run_at - now)
+
+
 async def submit_task(
     request: TaskRequest,
     settings: Settings | None = None,
 ) -> TaskSubmissionResponse:
     settings = settings or get_settings()
     redis = _get_redis()
-    payload = request.model_dump()
-    signature = cache_service.compute_signature(payload)
+    codec = get_codec(settings.codec)
+    payload = request.job_payload()
+    signature = cache_service.compute_signature(payload, settings.codec)
+    local = cache_service.lookup_local(settings, signature)
+    if local is not None:
+        return TaskSubmissionResponse(status=TaskStatus.DONE, cached=True, result=local)
 
-    cached = await cache_service.try_get_cached_result(redis, settings, signature)
-    if cached is not None:
+    task_id = uuid.uuid4().hex
+    now = time.time()
+    run_at = request.scheduled_at(now)
+    queue_key = queue_service.queue_key_for(settings, request.priority, request.task_type)
+    outcome, value = await _SUBMIT_SCRIPT(
+        redis,
+        keys=[
+            cache_service.build_cache_key(settings, signature),
+            cache_service.build_inflight_key(settings, signature, request.priority.value),
+            _task_key(settings, task_id),
+            queue_key,
+            queue_service.delayed_key_for(queue_key),
+        ],
+        args=[
+            TaskStatus.PENDING.value,
+            codec.dumps(payload),
+            signature,
+            _task_ttl(settings, now, run_at),
+            task_id,
+            request.priority.value,
+            now if run_at is None else run_at,
+            request.task_type,
+            "" if run_at is None else run_at,
+            settings.inflight_ttl_seconds,
+        ],
+    )
+    outcome = int(outcome)
+    if outcome == _SUBMIT_CACHED:
         return TaskSubmissionResponse(
             status=TaskStatus.DONE,
             cached=True,
-            result=cached,
+            result=cache_service.remember_remote(
+                settings,
+                signature,
+                value,
+                cache_service.cache_ttl_for(settings, request.task_type),
+            ),
         )
-
-    task_id = uuid.uuid4().hex
-    task_key = _task_key(settings, task_id)
-    await redis.hset(
-        task_key,
-        mapping={
-            "status": TaskStatus.PENDING.value,
-            "result": "",
-            "error": "",
-            "payload": json.dumps(payload),
-            "signature": signature,
-        },
-    )
-    await redis.expire(task_key, settings.task_ttl_seconds)
-    await redis.rpush(
-        settings.queue_key,
-        json.dumps(
-            {
-                "task_id": task_id,
-                "payload": payload,
-                "signature": signature,
-            }
-        ),
-    )
+    cache_service.stats.record_redis(False)
+    if outcome == _SUBMIT_IN_FLIGHT:
+        task_id = value
 
     return TaskSubmissionResponse(
         task_id=task_id,
@@ -68,6 +145,136 @@ async def submit_task(
     )
 
 
+async def submit_tasks(
+    requests: Sequence[TaskRequest],
+    settings: Settings | None = None,
+) -> TaskBatchResponse:
+    settings = settings or get_settings()
+    if len(requests) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch exceeds {settings.max_batch_size} tasks",
+        )
+    redis = _get_redis()
+    codec = get_codec(settings.codec)
+    payloads = [request.job_payload() for request in requests]
+    signatures = [
+        cache_service.compute_signature(payload, settings.codec) for payload in payloads
+    ]
+    # The task type is part of the signature, so each maps to one cache TTL.
+    ttls = {
+        signature: cache_service.cache_ttl_for(settings, request.task_type)
+        for signature, request in zip(signatures, requests)
+    }
+    unique_signatures = list(ttls)
+    cached_results = dict(
+        zip(
+            unique_signatures,
+            await cache_service.get_cached_results(redis, settings, unique_signatures, ttls),
+        )
+    )
+
+    # Identical payloads inside one batch share a single task. Hashes are
+    # written together with the single-flight claims so an id handed to a
+    # concurrent duplicate always resolves; losers are discarded afterwards.
+    # Each task is keyed by its in-flight key, or by its own id when scheduled
+    # since scheduled tasks never coalesce.
+    now = time.time()
+    lanes: List[Optional[str]] = []
+    candidates: Dict[str, str] = {}
+    queues: Dict[str, str] = {}
+    schedule: Dict[str, Optional[float]] = {}
+    claimed: List[str] = []
+    async with redis.pipeline(transaction=True) as pipe:
+        for request, payload, signature in zip(requests, payloads, signatures):
+            if cached_results[signature] is not None:
+                lanes.append(None)
+                continue
+            task_id = uuid.uuid4().hex
+            run_at = request.scheduled_at(now)
+            lane = (
+                cache_service.build_inflight_key(settings, signature, request.priority.value)
+                if run_at is None
+                else task_id
+            )
+            lanes.append(lane)
+            if lane in candidates:
+                continue
+            candidates[lane] = task_id
+            queues[lane] = queue_service.queue_key_for(
+                settings, request.priority, request.task_type
+            )
+            schedule[lane] = run_at
+            ttl = _task_ttl(settings, now, run_at)
+            task_key = _task_key(settings, task_id)
+            pipe.hset(
+                task_key,
+                mapping={
+                    "status": TaskStatus.PENDING.value,
+                    "result": "",
+                    "error": "",
+                    "payload": codec.dumps(payload),
+                    "signature": signature,
+                    "priority": request.priority.value,
+                    "enqueued_at": now if run_at is None else run_at,
+                    "task_type": request.task_type,
+                    "inflight": lane if run_at is None else "",
+                },
+            )
+            pipe.expire(task_key, ttl)
+            if run_at is None:
+                claimed.append(lane)
+        for lane in claimed:
+            pipe.set(lane, candidates[lane], nx=True, get=True, ex=settings.inflight_ttl_seconds)
+        results = await pipe.execute() if candidates else []
+    claims = dict(zip(claimed, results[2 * len(candidates):]))
+
+    task_ids: Dict[str, str] = {}
+    to_enqueue: Dict[str, List[str]] = {}
+    to_schedule: Dict[str, Dict[str, float]] = {}
+    losers: List[str] = []
+    for lane, task_id in candidates.items():
+        existing = claims.get(lane)
+        if existing is None:
+            task_ids[lane] = task_id
+            run_at = schedule[lane]
+            if run_at is None:
+                to_enqueue.setdefault(queues[lane], []).append(task_id)
+            else:
+                delayed_key = queue_service.delayed_key_for(queues[lane])
+                to_schedule.setdefault(delayed_key, {})[task_id] = run_at
+        else:
+            task_ids[lane] = existing
+            losers.append(_task_key(settings, task_id))
+    if to_enqueue or to_schedule or losers:
+        async with redis.pipeline(transaction=True) as pipe:
+            for queue_key, queued_ids in to_enqueue.items():
+                pipe.rpush(queue_key, *queued_ids)
+            for delayed_key, members in to_schedule.items():
+                pipe.zadd(delayed_key, members)
+            if losers:
+                pipe.delete(*losers)
+            await pipe.execute()
+
+    items: List[TaskSubmissionResponse] = []
+    for signature, lane in zip(signatures, lanes):
+        if lane is None:
+            items.append(
+                TaskSubmissionResponse(
+                    status=TaskStatus.DONE, cached=True, result=cached_results[signature]
+                )
+            )
+        else:
+            items.append(
+                TaskSubmissionResponse(
+                    task_id=task_ids[lane],
+                    status=TaskStatus.PENDING,
+                    cached=False,
+                )
+            )
+    return TaskBatchResponse(items=items)
+
+
 async def get_task(
     task_id: str,
     settings: Settings | None = None,
@@ -75,30 +282,122 @@ async def get_task(
     settings = settings or get_settings()
     redis = _get_redis()
     task_key = _task_key(settings, task_id)
-    data: Dict[str, str] = await redis.hgetall(task_key)
-    if not data:
+    # HMGET rather than HGETALL keeps the stored payload off the wire.
+    raw_status, raw_result, error = await redis.hmget(
+        task_key, ["status", "result", "error"]
+    )
+    if raw_status is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found",
         )
 
-    raw_result = data.get("result") or ""
-    result = json.loads(raw_result) if raw_result else None
-    error = data.get("error") or None
-    status_value = data.get("status", TaskStatus.PENDING.value)
-    try:
-        task_status = TaskStatus(status_value)
-    except ValueError:
-        task_status = TaskStatus.PENDING
-
     return TaskDetailResponse(
         task_id=task_id,
-        status=task_status,
-        result=result,
-        error=error,
+        status=_parse_status(raw_status),
+        result=_parse_result(settings, raw_result),
+        error=error or None,
     )
 
 
+async def wait_for_task(
+    task_id: str,
+    timeout: float,
+    settings: Settings | None = None,
+) -> TaskDetailResponse:
+    settings = settings or get_settings()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(timeout, settings.max_wait_seconds)
+    while True:
+        # Fetched every round: a dropped subscription wakes its waiters and
+        # get_listener() subscribes again before they re-register.
+        listener = await completion_service.get_listener(settings)
+        future = listener.watch(task_id)
+        try:
+            # Read after registering so a completion in between is never missed.
+            detail = await get_task(task_id, settings)
+            remaining = deadline - loop.time()
+            if detail.status in FINAL_STATUSES or remaining <= 0:
+                return detail
+            await asyncio.wait([future], timeout=remaining)
+        finally:
+            listener.forget(task_id, future)
+
+
+async def watch_task(
+    task_id: str,
+    settings: Settings | None = None,
+) -> AsyncIterator[Optional[TaskDetailResponse]]:
+    settings = settings or get_settings()
+    while True:
+        listener = await completion_service.get_listener(settings)
+        future = listener.watch(task_id)
+        try:
+            detail = await get_task(task_id, settings)
+            yield detail
+            if detail.status in FINAL_STATUSES:
+                return
+            while not future.done():
+                done, _ = await asyncio.wait([future], timeout=settings.sse_keepalive_seconds)
+                if not done:
+                    yield None
+        finally:
+            listener.forget(task_id, future)
+
+
+async def get_task_statuses(
+    task_ids: Sequence[str],
+    fields: Sequence[TaskField] = tuple(TaskField),
+    settings: Settings | None = None,
+) -> TaskStatusBatchResponse:
+    settings = settings or get_settings()
+    if len(task_ids) > settings.max_batch_size:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch exceeds {settings.max_batch_size} tasks",
+        )
+    redis = _get_redis()
+    # status is always fetched: it doubles as the existence check.
+    hash_fields = [TaskField.STATUS.value] + [
+        field.value for field in dict.fromkeys(fields) if field is not TaskField.STATUS
+    ]
+    async with redis.pipeline(transaction=False) as pipe:
+        for task_id in task_ids:
+            pipe.hmget(_task_key(settings, task_id), hash_fields)
+        rows = await pipe.execute()
+
+    items: List[TaskStatusItem] = []
+    missing: List[str] = []
+    for task_id, row in zip(task_ids, rows):
+        values = dict(zip(hash_fields, row))
+        if values[TaskField.STATUS.value] is None:
+            missing.append(task_id)
+            continue
+        item: Dict[str, Any] = {"task_id": task_id}
+        if TaskField.STATUS in fields:
+            item["status"] = _parse_status(values[TaskField.STATUS.value])
+        if TaskField.RESULT in fields:
+            item["result"] = _parse_result(settings, values[TaskField.RESULT.value])
+        if TaskField.ERROR in fields:
+            item["error"] = values[TaskField.ERROR.value] or None
+        items.append(TaskStatusItem(**item))
+    return TaskStatusBatchResponse(items=items, missing=missing)
+
+
+def _parse_status(value: Optional[str]) -> TaskStatus:
+    try:
+        return TaskStatus(value or TaskStatus.PENDING.value)
+    except ValueError:
+        return TaskStatus.PENDING
+
+
+def _parse_result(
+    settings: Settings,
+    raw_result: Optional[str],
+) -> Optional[Dict[str, Any]]:
+    return get_codec(settings.codec).loads(raw_result) if raw_result else None
+
+
 def _get_redis() -> Redis:
     redis = redis_client.get_client()
     if redis is None:
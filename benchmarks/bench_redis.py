@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+from fakeredis import aioredis as fake_aioredis
+
+from app.schemas import TaskRequest
+from app.services import task_service
+from infra import redis_client
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+from benchmarks.runner import benchmark
+
+
+@asynccontextmanager
+async def fake_client() -> AsyncIterator[fake_aioredis.FakeRedis]:
+    client = fake_aioredis.FakeRedis(decode_responses=True)
+    await client.flushall()
+    redis_client.set_client(client)
+    try:
+        yield client
+    finally:
+        await redis_client.close_client()
+
+
+def _requests(prefix: str, count: int):
+    # Unique prompts, so every submit takes the enqueue path, not the cache.
+    return [TaskRequest(prompt=f"{prefix}-{index}") for index in range(count)]
+
+
+@benchmark("submit_task", group="redis")
+async def submit_task(loops: int) -> float:
+    settings = Settings()
+    requests = _requests("submit", loops)
+    async with fake_client():
+        start = time.perf_counter()
+        for request in requests:
+            await task_service.submit_task(request, settings)
+        return time.perf_counter() - start
+
+
+@benchmark("get_task", group="redis")
+async def get_task(loops: int) -> float:
+    settings = Settings()
+    async with fake_client():
+        submitted = await task_service.submit_task(TaskRequest(prompt="get"), settings)
+        start = time.perf_counter()
+        for _ in range(loops):
+            await task_service.get_task(submitted.task_id, settings)
+        return time.perf_counter() - start
+
+
+@benchmark("worker_process_next", group="redis")
+async def worker_process_next(loops: int) -> float:
+    settings = Settings(BLOCKING_DEQUEUE=False)
+    async with fake_client() as client:
+        for request in _requests("work", loops):
+            await task_service.submit_task(request, settings)
+        worker = TaskWorker(redis=client, settings=settings)
+        start = time.perf_counter()
+        for _ in range(loops):
+            await worker.process_next()
+        return time.perf_counter() - start
+
+
+@asynccontextmanager
+async def asgi_client() -> AsyncIterator[httpx.AsyncClient]:
+    from app.main import app
+
+    async with fake_client():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            yield client
+
+
+@benchmark("api_submit", group="api")
+async def api_submit(loops: int) -> float:
+    bodies = [{"prompt": f"api-{index}"} for index in range(loops)]
+    async with asgi_client() as client:
+        start = time.perf_counter()
+        for body in bodies:
+            (await client.post("/tasks", json=body)).raise_for_status()
+        return time.perf_counter() - start
+
+
+@benchmark("api_get_task", group="api")
+async def api_get_task(loops: int) -> float:
+    async with asgi_client() as client:
+        task_id = (await client.post("/tasks", json={"prompt": "api-get"})).json()["task_id"]
+        start = time.perf_counter()
+        for _ in range(loops):
+            (await client.get(f"/tasks/{task_id}")).raise_for_status()
+        return time.perf_counter() - start
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import time
+
+from app.schemas import TaskRequest
+from app.services import cache_service
+from infra.codec import get_codec
+
+from benchmarks.runner import benchmark
+
+SMALL_PAYLOAD = {"prompt": "hello world", "params": {"duration": 0.05}}
+LARGE_PAYLOAD = {
+    "prompt": "x" * 2048,
+    "params": {f"key_{index}": {"value": index, "tags": ["a", "b", "c"]} for index in range(50)},
+}
+RESULT = {"prompt": "hello world", "output": "x" * 512, "params": {"duration": 0.05}}
+REQUEST_BODY = {"prompt": "hello world", "params": {"duration": 0.05}, "priority": "high"}
+
+
+def _codec_names():
+    names = ["json"]
+    try:
+        get_codec("orjson")
+    except RuntimeError:
+        return names
+    return names + ["orjson"]
+
+
+def _register_signature(name, payload, codec_name):
+    @benchmark(name, group="serialization")
+    def bench(loops: int) -> float:
+        start = time.perf_counter()
+        for _ in range(loops):
+            cache_service.compute_signature(payload, codec_name)
+        return time.perf_counter() - start
+
+
+def _register_codec(codec_name):
+    codec = get_codec(codec_name)
+    encoded = codec.dumps(RESULT)
+
+    @benchmark(f"codec_dumps[{codec_name}]", group="serialization")
+    def dumps(loops: int) -> float:
+        start = time.perf_counter()
+        for _ in range(loops):
+            codec.dumps(RESULT)
+        return time.perf_counter() - start
+
+    @benchmark(f"codec_loads[{codec_name}]", group="serialization")
+    def loads(loops: int) -> float:
+        start = time.perf_counter()
+        for _ in range(loops):
+            codec.loads(encoded)
+        return time.perf_counter() - start
+
+
+for _name in _codec_names():
+    _register_signature(f"compute_signature_small[{_name}]", SMALL_PAYLOAD, _name)
+    _register_signature(f"compute_signature_large[{_name}]", LARGE_PAYLOAD, _name)
+    _register_codec(_name)
+
+
+@benchmark("task_request_parse", group="serialization")
+def task_request_parse(loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        TaskRequest.model_validate(REQUEST_BODY).job_payload()
+    return time.perf_counter() - start
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import json
+import math
+import pkgutil
+import platform
+import statistics
+import subprocess
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+# A benchmark runs its operation ``loops`` times and returns the seconds spent
+# in the timed region, so per-sample setup (fresh fakeredis, seeded queues)
+# stays out of the measurement.
+BenchFunc = Callable[[int], Union[float, Awaitable[float]]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: BenchFunc
+    group: str = "default"
+
+    def time(self, loops: int) -> float:
+        if inspect.iscoroutinefunction(self.func):
+            return asyncio.run(self.func(loops))
+        return self.func(loops)  # type: ignore[return-value]
+
+
+_REGISTRY: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str = "default") -> Callable[[BenchFunc], BenchFunc]:
+    def decorator(func: BenchFunc) -> BenchFunc:
+        if name in _REGISTRY:
+            raise ValueError(f"benchmark {name!r} is already registered")
+        _REGISTRY[name] = Benchmark(name=name, func=func, group=group)
+        return func
+
+    return decorator
+
+
+def registered_benchmarks() -> List[Benchmark]:
+    """Import every ``benchmarks/bench_*.py`` module and return its benchmarks."""
+    for module in pkgutil.iter_modules([str(Path(__file__).parent)]):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"{__package__ or 'benchmarks'}.{module.name}")
+    return list(_REGISTRY.values())
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    group: str
+    loops: int
+    # Seconds per operation, one entry per sample.
+    samples: List[float] = field(default_factory=list)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+    @property
+    def min(self) -> float:
+        return min(self.samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "group": self.group,
+            "loops": self.loops,
+            "median": self.median,
+            "mean": self.mean,
+            "stdev": self.stdev,
+            "min": self.min,
+            "samples": self.samples,
+        }
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> "BenchmarkResult":
+        return cls(
+            name=name,
+            group=data.get("group", "default"),
+            loops=int(data["loops"]),
+            samples=[float(sample) for sample in data["samples"]],
+        )
+
+
+@dataclass
+class RunnerConfig:
+    samples: int = 10
+    warmups: int = 1
+    # Loops grow until one sample takes at least this long.
+    min_time: float = 0.1
+    max_loops: int = 1_000_000
+    names: Optional[List[str]] = None
+    output: Optional[str] = None
+    baseline: Optional[str] = None
+    save_baseline: Optional[str] = None
+    threshold: float = 0.10
+    json_output: bool = False
+
+
+def calibrate(bench: Benchmark, min_time: float, max_loops: int) -> int:
+    loops = 1
+    while loops < max_loops:
+        elapsed = bench.time(loops)
+        if elapsed >= min_time:
+            break
+        if elapsed <= 0:
+            loops *= 10
+        else:
+            # Jump toward the target but never more than 10x per step, so a
+            # noisy first sample cannot blow the budget.
+            loops = max(loops * 2, min(loops * 10, math.ceil(loops * min_time / elapsed)))
+    return min(loops, max_loops)
+
+
+def run_benchmark(bench: Benchmark, config: RunnerConfig) -> BenchmarkResult:
+    if config.samples <= 0:
+        raise ValueError("samples must be > 0")
+    loops = calibrate(bench, config.min_time, config.max_loops)
+    for _ in range(config.warmups):
+        bench.time(loops)
+    result = BenchmarkResult(name=bench.name, group=bench.group, loops=loops)
+    for _ in range(config.samples):
+        result.samples.append(bench.time(loops) / loops)
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def build_report(results: Sequence[BenchmarkResult]) -> Dict[str, Any]:
+    return {
+        "metadata": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": _git_commit(),
+        },
+        "benchmarks": {result.name: result.to_dict() for result in results},
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, indent=2) + "\n")
+
+
+def load_report(path: str) -> Dict[str, BenchmarkResult]:
+    data = json.loads(Path(path).read_text())
+    return {
+        name: BenchmarkResult.from_dict(name, entry)
+        for name, entry in data.get("benchmarks", {}).items()
+    }
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        """Relative change of the median time per operation (+0.25 = 25% slower)."""
+        return self.current / self.baseline - 1 if self.baseline > 0 else 0.0
+
+    @property
+    def regressed(self) -> bool:
+        return self.change > self.threshold
+
+
+def compare(
+    baseline: Dict[str, BenchmarkResult],
+    results: Sequence[BenchmarkResult],
+    threshold: float,
+) -> List[Comparison]:
+    """Compare medians; benchmarks missing from the baseline are skipped."""
+    return [
+        Comparison(
+            name=result.name,
+            baseline=baseline[result.name].median,
+            current=result.median,
+            threshold=threshold,
+        )
+        for result in results
+        if result.name in baseline
+    ]
+
+
+def format_duration(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def run_suite(config: RunnerConfig) -> List[BenchmarkResult]:
+    benches = registered_benchmarks()
+    if config.names:
+        unknown = set(config.names) - {bench.name for bench in benches}
+        if unknown:
+            raise ValueError(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+        benches = [bench for bench in benches if bench.name in config.names]
+    return [run_benchmark(bench, config) for bench in benches]
+
+
+def parse_cli_args(argv: Sequence[str] | None = None) -> RunnerConfig:
+    parser = argparse.ArgumentParser(description="Run the hot-path micro-benchmarks")
+    parser.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    parser.add_argument("--samples", type=int, default=10, help="Timed samples per benchmark")
+    parser.add_argument("--warmups", type=int, default=1, help="Untimed samples per benchmark")
+    parser.add_argument(
+        "--min-time", type=float, default=0.1, help="Minimum seconds per sample"
+    )
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against a saved results file")
+    parser.add_argument("--save-baseline", help="Also write results to this baseline path")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Allowed median slowdown before failing (0.10 = 10%%)",
+    )
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+    if args.list:
+        for bench in registered_benchmarks():
+            print(f"{bench.group}: {bench.name}")
+        raise SystemExit(0)
+    return RunnerConfig(
+        samples=args.samples,
+        warmups=args.warmups,
+        min_time=args.min_time,
+        names=args.names or None,
+        output=args.output,
+        baseline=args.baseline,
+        save_baseline=args.save_baseline,
+        threshold=args.threshold,
+        json_output=args.json,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    config = parse_cli_args(argv)
+    results = run_suite(config)
+    report = build_report(results)
+    for path in (config.output, config.save_baseline):
+        if path:
+            write_report(report, path)
+    comparisons: List[Comparison] = []
+    if config.baseline:
+        comparisons = compare(load_report(config.baseline), results, config.threshold)
+    regressions = [comparison for comparison in comparisons if comparison.regressed]
+
+    if config.json_output:
+        report["comparisons"] = {
+            comparison.name: {
+                "baseline": comparison.baseline,
+                "current": comparison.current,
+                "change": comparison.change,
+                "regressed": comparison.regressed,
+            }
+            for comparison in comparisons
+        }
+        print(json.dumps(report, indent=2))
+    else:
+        for result in results:
+            print(
+                f"{result.name}: {format_duration(result.median)} "
+                f"+- {format_duration(result.stdev)} "
+                f"({result.loops} loops x {len(result.samples)} samples)"
+            )
+        for comparison in comparisons:
+            marker = "REGRESSION" if comparison.regressed else "ok"
+            print(
+                f"{comparison.name}: {format_duration(comparison.baseline)} -> "
+                f"{format_duration(comparison.current)} ({comparison.change:+.1%}) {marker}"
+            )
+        if regressions:
+            print(
+                f"{len(regressions)} benchmark(s) slower than baseline "
+                f"by more than {config.threshold:.0%}"
+            )
+    return 1 if regressions else 0
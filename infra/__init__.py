@@ -1,4 +1,4 @@
 from .settings import get_settings, Settings  # noqa: F401
-from . import redis_client  # noqa: F401
+from . import codec, redis_client, redis_scripts  # noqa: F401
 
-__all__ = ["Settings", "get_settings", "redis_client"]
+__all__ = ["Settings", "codec", "get_settings", "redis_client", "redis_scripts"]
@@ -0,0 +1,63 @@
+import json
+from functools import lru_cache
+from typing import Any, Protocol
+
+
+class Codec(Protocol):
+    name: str
+
+    def dumps(self, obj: Any) -> str: ...
+
+    def loads(self, data: str) -> Any: ...
+
+    def canonical(self, obj: Any) -> bytes: ...
+
+
+class JsonCodec:
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    def loads(self, data: str) -> Any:
+        return json.loads(data)
+
+    def canonical(self, obj: Any) -> bytes:
+        return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    def __init__(self) -> None:
+        try:
+            import orjson
+        except ImportError as exc:  # pragma: no cover - depends on environment
+            raise RuntimeError("CODEC=orjson requires the 'orjson' package") from exc
+        self._orjson = orjson
+
+    def dumps(self, obj: Any) -> str:
+        return self._orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, data: str) -> Any:
+        return self._orjson.loads(data)
+
+    def canonical(self, obj: Any) -> bytes:
+        return self._orjson.dumps(obj, option=self._orjson.OPT_SORT_KEYS)
+
+
+_CODECS = {
+    JsonCodec.name: JsonCodec,
+    OrjsonCodec.name: OrjsonCodec,
+}
+
+
+@lru_cache
+def get_codec(name: str) -> Codec:
+    try:
+        factory = _CODECS[name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported codec: {name} (choose from {', '.join(sorted(_CODECS))})"
+        ) from None
+    return factory()
@@ -0,0 +1,143 @@
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Gauge, Histogram  # noqa: F401
+from prometheus_client import generate_latest, start_http_server  # noqa: F401
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.registry import Collector
+from redis.asyncio import Redis
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_JOB_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=_FAST_BUCKETS,
+)
+REDIS_COMMAND_SECONDS = Histogram(
+    "redis_command_duration_seconds",
+    "Redis round-trip latency by command (pipelines count once)",
+    ["command"],
+    buckets=_FAST_BUCKETS,
+)
+TASK_QUEUE_WAIT_SECONDS = Histogram(
+    "task_queue_wait_seconds",
+    "Time from enqueue until a worker starts the task",
+    buckets=_JOB_BUCKETS,
+)
+TASK_RUN_SECONDS = Histogram(
+    "task_run_duration_seconds",
+    "Task execution time by final status",
+    ["status"],
+    buckets=_JOB_BUCKETS,
+)
+QUEUE_LENGTH = Gauge("task_queue_length", "Pending tasks per queue", ["queue"])
+
+
+_OUTCOME_LABELS = {"hits": "hit", "misses": "miss"}
+
+
+class _CacheStatsCollector(Collector):
+    def __init__(self, snapshot: Callable[[], Dict[str, int]]) -> None:
+        self._snapshot = snapshot
+
+    def collect(self) -> Iterable[CounterMetricFamily]:
+        family = CounterMetricFamily(
+            "result_cache_lookups",
+            "Result cache lookups by tier and outcome",
+            labels=["tier", "result"],
+        )
+        for name, value in self._snapshot().items():
+            tier, _, outcome = name.partition("_")
+            family.add_metric([tier, _OUTCOME_LABELS.get(outcome, outcome)], value)
+        yield family
+
+
+_cache_collector: Optional[_CacheStatsCollector] = None
+
+
+def register_cache_stats(snapshot: Callable[[], Dict[str, int]]) -> None:
+    global _cache_collector
+    if _cache_collector is not None:
+        REGISTRY.unregister(_cache_collector)
+    _cache_collector = _CacheStatsCollector(snapshot)
+    REGISTRY.register(_cache_collector)
+
+
+def instrument_redis(redis: Redis) -> Redis:
+    if getattr(redis, "_metrics_instrumented", False):
+        return redis
+    execute_command = redis.execute_command
+    make_pipeline = redis.pipeline
+
+    async def timed_execute_command(*args, **options):
+        start = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - start
+            )
+
+    def timed_pipeline(transaction: bool = True, shard_hint=None):
+        pipe = make_pipeline(transaction=transaction, shard_hint=shard_hint)
+        execute = pipe.execute
+        label = "MULTI" if transaction else "PIPELINE"
+
+        async def timed_execute(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await execute(*args, **kwargs)
+            finally:
+                REDIS_COMMAND_SECONDS.labels(label).observe(time.perf_counter() - start)
+
+        pipe.execute = timed_execute
+        return pipe
+
+    redis.execute_command = timed_execute_command
+    redis.pipeline = timed_pipeline
+    redis._metrics_instrumented = True
+    return redis
+
+
+_UNTIMED_SCOPE_KEY = "metrics.untimed"
+
+
+def skip_request_timing(scope) -> None:
+    """Leave this request out of the latency histogram.
+
+    For long-polls and streams, whose duration is client wait time rather
+    than server latency.
+    """
+    scope[_UNTIMED_SCOPE_KEY] = True
+
+
+class RequestTimingMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not scope.get(_UNTIMED_SCOPE_KEY):
+                route = scope.get("route")
+                HTTP_REQUEST_SECONDS.labels(
+                    scope["method"],
+                    getattr(route, "path", "unmatched"),
+                    str(status_code),
+                ).observe(time.perf_counter() - start)
@@ -1,30 +1,132 @@
-from typing import Optional
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis, RedisCluster
+from redis.asyncio.retry import Retry
+from redis.asyncio.sentinel import Sentinel
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.exceptions import ConnectionError
 
-from infra.settings import get_settings
+from infra import metrics, redis_scripts
+from infra.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
 
 _client: Optional[Redis] = None
+_pubsub_client: Optional[Redis] = None
+
+
+def _parse_sentinels(entries: List[str]) -> List[Tuple[str, int]]:
+    sentinels = []
+    for entry in entries:
+        host, separator, port = entry.partition(":")
+        sentinels.append((host, int(port) if separator else 26379))
+    return sentinels
+
+
+def connection_options(settings: Settings) -> Dict[str, Any]:
+    socket_timeout = settings.redis_socket_timeout
+    if socket_timeout is not None:
+        # Blocking dequeues must not trip the read timeout while idle.
+        socket_timeout = max(socket_timeout, settings.dequeue_timeout + 1)
+    options: Dict[str, Any] = {
+        "decode_responses": True,
+        "protocol": settings.redis_protocol,
+        "socket_timeout": socket_timeout,
+        "socket_connect_timeout": settings.redis_connect_timeout,
+        "socket_keepalive": settings.redis_socket_keepalive,
+        "health_check_interval": settings.redis_health_check_interval,
+        # Only connection failures are retried: a timed-out RPUSH may have
+        # been applied already.
+        "retry": Retry(
+            ExponentialWithJitterBackoff(
+                cap=settings.redis_retry_backoff_cap,
+                base=settings.redis_retry_backoff_base,
+            ),
+            settings.redis_retries,
+            supported_errors=(ConnectionError,),
+        ),
+    }
+    if settings.redis_max_connections is not None:
+        options["max_connections"] = settings.redis_max_connections
+    return options
+
+
+def build_client(settings: Settings) -> Redis:
+    options = connection_options(settings)
+    if settings.redis_mode == "cluster":
+        return RedisCluster.from_url(settings.redis_url, **options)
+    if settings.redis_mode == "sentinel":
+        if not settings.redis_sentinels:
+            raise ValueError("REDIS_MODE=sentinel requires REDIS_SENTINELS")
+        sentinel = Sentinel(
+            _parse_sentinels(settings.redis_sentinels),
+            sentinel_kwargs={
+                "socket_connect_timeout": settings.redis_connect_timeout,
+                "decode_responses": True,
+            },
+            **options,
+        )
+        return sentinel.master_for(settings.redis_sentinel_master)
+    if settings.redis_max_connections is not None:
+        # The default pool raises "Too many connections" as soon as the cap is
+        # hit; a blocking pool queues callers until a connection frees up.
+        pool = BlockingConnectionPool.from_url(
+            settings.redis_url, timeout=settings.redis_pool_timeout, **options
+        )
+        return Redis.from_pool(pool)
+    return Redis.from_url(settings.redis_url, **options)
 
 
 def get_client() -> Redis:
     global _client
     if _client is None:
         settings = get_settings()
-        _client = Redis.from_url(
-            settings.redis_url,
-            decode_responses=True,
-        )
+        _client = build_client(settings)
+        if settings.metrics_enabled:
+            metrics.instrument_redis(_client)
     return _client
 
 
+def get_pubsub_client() -> Redis:
+    global _pubsub_client
+    settings = get_settings()
+    if settings.redis_mode != "cluster":
+        return get_client()
+    # The asyncio cluster client has no pub/sub; PUBLISH is broadcast
+    # cluster-wide, so subscribing through a single node is enough.
+    if _pubsub_client is None:
+        options = connection_options(settings)
+        _pubsub_client = Redis.from_url(settings.redis_url, **options)
+    return _pubsub_client
+
+
+async def warm_up(redis: Redis, settings: Settings) -> bool:
+    # Concurrent PINGs force the pool to open that many sockets up front.
+    try:
+        await asyncio.gather(
+            *(redis.ping() for _ in range(max(settings.redis_warm_connections, 1)))
+        )
+        await redis_scripts.load_scripts(redis)
+    except Exception:  # noqa: BLE001
+        logger.warning("Redis warm-up failed; connecting lazily", exc_info=True)
+        return False
+    return True
+
+
 def set_client(client: Redis) -> None:
     global _client
+    if get_settings().metrics_enabled:
+        metrics.instrument_redis(client)
     _client = client
 
 
 async def close_client() -> None:
-    global _client
+    global _client, _pubsub_client
+    if _pubsub_client is not None:
+        await _pubsub_client.aclose()
+        _pubsub_client = None
     if _client is not None:
         await _client.aclose()
         _client = None
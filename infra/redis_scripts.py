@@ -0,0 +1,35 @@
+import hashlib
+from typing import Any, List, Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import NoScriptError
+
+_registry: List["LuaScript"] = []
+
+
+class LuaScript:
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        _registry.append(self)
+
+    async def __call__(
+        self,
+        redis: Redis,
+        keys: Sequence[str] = (),
+        args: Sequence[Any] = (),
+    ) -> Any:
+        try:
+            return await redis.evalsha(self.sha, len(keys), *keys, *args)
+        except NoScriptError:
+            return await redis.eval(self.source, len(keys), *keys, *args)
+
+
+def registered_scripts() -> List[LuaScript]:
+    return list(_registry)
+
+
+async def load_scripts(redis: Redis) -> int:
+    for script in _registry:
+        await redis.script_load(script.source)
+    return len(_registry)
@@ -1,19 +1,160 @@
 from functools import lru_cache
+from typing import Dict, List, Literal, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+# Suffixes QUEUE_KEY already uses for priorities and bookkeeping keys.
+_RESERVED_QUEUE_NAMES = frozenset(
+    {"high", "normal", "low", "delayed", "dead", "processing", "leases", "workers"}
+)
+
+
+class TaskTypeConfig(BaseModel):
+    # Dedicated queue name (QUEUE_KEY:<queue>); unset shares QUEUE_KEY.
+    queue: Optional[str] = None
+    # Max jobs of this type in flight per worker process; 0 means no limit.
+    # Requires a dedicated queue: the worker enforces it by not popping.
+    concurrency: int = 0
+    # 0 falls back to JOB_TIMEOUT.
+    timeout_seconds: float = 0.0
+    # None falls back to MAX_RETRIES.
+    max_retries: Optional[int] = None
+    cache_ttl_seconds: Optional[int] = None
+
+    @field_validator("queue")
+    @classmethod
+    def _not_a_reserved_suffix(cls, value: Optional[str]) -> Optional[str]:
+        if value in _RESERVED_QUEUE_NAMES:
+            raise ValueError(f"queue name {value!r} clashes with a built-in queue key")
+        return value
+
+    @model_validator(mode="after")
+    def _concurrency_needs_queue(self) -> "TaskTypeConfig":
+        # On a shared queue the limit could only be applied after the job was
+        # claimed, leaving blocked jobs RUNNING in global worker slots.
+        if self.concurrency > 0 and not self.queue:
+            raise ValueError("concurrency requires a dedicated queue")
+        return self
+
+
+_DEFAULT_TASK_TYPE_CONFIG = TaskTypeConfig()
+
+
 class Settings(BaseSettings):
     redis_url: str = Field("redis://localhost:6379/0", alias="REDIS_URL")
+    redis_mode: Literal["standalone", "sentinel", "cluster"] = Field(
+        "standalone", alias="REDIS_MODE"
+    )
+    redis_sentinels: List[str] = Field(default_factory=list, alias="REDIS_SENTINELS")
+    redis_sentinel_master: str = Field("mymaster", alias="REDIS_SENTINEL_MASTER")
+    redis_protocol: Literal[2, 3] = Field(2, alias="REDIS_PROTOCOL")
+    # None leaves the pool unbounded. When set, standalone clients wait up to
+    # REDIS_POOL_TIMEOUT for a free connection instead of failing fast.
+    redis_max_connections: Optional[int] = Field(None, alias="REDIS_MAX_CONNECTIONS")
+    redis_pool_timeout: float = Field(5.0, alias="REDIS_POOL_TIMEOUT")
+    redis_socket_timeout: Optional[float] = Field(None, alias="REDIS_SOCKET_TIMEOUT")
+    redis_connect_timeout: float = Field(5.0, alias="REDIS_CONNECT_TIMEOUT")
+    redis_socket_keepalive: bool = Field(True, alias="REDIS_SOCKET_KEEPALIVE")
+    redis_health_check_interval: int = Field(30, alias="REDIS_HEALTH_CHECK_INTERVAL")
+    redis_retries: int = Field(3, alias="REDIS_RETRIES")
+    redis_retry_backoff_base: float = Field(0.01, alias="REDIS_RETRY_BACKOFF_BASE")
+    redis_retry_backoff_cap: float = Field(0.5, alias="REDIS_RETRY_BACKOFF_CAP")
+    redis_key_tag: str = Field("", alias="REDIS_KEY_TAG")
+    redis_warm_connections: int = Field(10, alias="REDIS_WARM_CONNECTIONS")
+    codec: str = Field("json", alias="CODEC")
+    metrics_enabled: bool = Field(True, alias="METRICS_ENABLED")
+    worker_metrics_port: int = Field(9100, alias="WORKER_METRICS_PORT")
     queue_key: str = Field("task_queue", alias="QUEUE_KEY")
+    scheduling: Literal["strict", "weighted"] = Field("weighted", alias="SCHEDULING")
+    priority_weights: Dict[str, int] = Field(
+        default_factory=lambda: {"high": 6, "normal": 3, "low": 1},
+        alias="PRIORITY_WEIGHTS",
+    )
+    task_types: Dict[str, TaskTypeConfig] = Field(default_factory=dict, alias="TASK_TYPES")
     task_hash_prefix: str = Field("task:", alias="TASK_HASH_PREFIX")
     cache_prefix: str = Field("cache:", alias="CACHE_PREFIX")
+    inflight_prefix: str = Field("inflight:", alias="INFLIGHT_PREFIX")
+    # Single-flight markers expire after this unless a worker running the task
+    # refreshes them, so a crashed worker frees its signature quickly.
+    inflight_ttl_seconds: int = Field(60, alias="INFLIGHT_TTL")
     cache_ttl_seconds: int = Field(600, alias="CACHE_TTL")
+    local_cache_enabled: bool = Field(False, alias="LOCAL_CACHE_ENABLED")
+    local_cache_max_entries: int = Field(10000, alias="LOCAL_CACHE_MAX_ENTRIES")
+    local_cache_max_bytes: int = Field(64 * 1024 * 1024, alias="LOCAL_CACHE_MAX_BYTES")
+    local_cache_ttl_seconds: float = Field(60.0, alias="LOCAL_CACHE_TTL")
     task_ttl_seconds: int = Field(86400, alias="RESULT_EXPIRY")
+    max_batch_size: int = Field(1000, alias="MAX_BATCH_SIZE")
+    max_queue_length: int = Field(0, alias="MAX_QUEUE_LENGTH")
+    max_queue_age_seconds: float = Field(0.0, alias="MAX_QUEUE_AGE")
+    admission_refresh_interval: float = Field(1.0, alias="ADMISSION_REFRESH_INTERVAL")
+    overload_retry_after: int = Field(5, alias="OVERLOAD_RETRY_AFTER")
+    rate_limit_per_second: float = Field(0.0, alias="RATE_LIMIT_PER_SECOND")
+    rate_limit_burst: int = Field(0, alias="RATE_LIMIT_BURST")
+    rate_limit_prefix: str = Field("ratelimit:", alias="RATE_LIMIT_PREFIX")
+    # Rate limits key on the peer address; the client-supplied header is only
+    # honoured when a trusted proxy in front of the API sets it.
+    trust_client_id_header: bool = Field(False, alias="TRUST_CLIENT_ID_HEADER")
+    client_id_header: str = Field("X-Client-ID", alias="CLIENT_ID_HEADER")
+    task_events_prefix: str = Field("task_events:", alias="TASK_EVENTS_PREFIX")
+    max_wait_seconds: float = Field(30.0, alias="MAX_WAIT_SECONDS")
+    sse_keepalive_seconds: float = Field(15.0, alias="SSE_KEEPALIVE")
+    worker_concurrency: int = Field(10, alias="WORKER_CONCURRENCY")
+    worker_poll_interval: float = Field(0.5, alias="WORKER_POLL_INTERVAL")
+    blocking_dequeue: bool = Field(True, alias="BLOCKING_DEQUEUE")
+    dequeue_timeout: float = Field(1.0, alias="DEQUEUE_TIMEOUT")
+    job_timeout_seconds: float = Field(0.0, alias="JOB_TIMEOUT")
+    max_retries: int = Field(0, alias="MAX_RETRIES")
+    retry_backoff_base: float = Field(1.0, alias="RETRY_BACKOFF_BASE")
+    retry_backoff_cap: float = Field(60.0, alias="RETRY_BACKOFF_CAP")
+    delayed_poll_interval: float = Field(1.0, alias="DELAYED_POLL_INTERVAL")
+    delayed_batch_size: int = Field(100, alias="DELAYED_BATCH_SIZE")
+    dead_letter_max_length: int = Field(10000, alias="DEAD_LETTER_MAX_LENGTH")
+    worker_task_types: List[str] = Field(default_factory=list, alias="WORKER_TASK_TYPES")
+    handler_thread_workers: int = Field(4, alias="HANDLER_THREAD_WORKERS")
+    handler_process_workers: int = Field(0, alias="HANDLER_PROCESS_WORKERS")
+    reliable_queue: bool = Field(False, alias="RELIABLE_QUEUE")
+    visibility_timeout: float = Field(30.0, alias="VISIBILITY_TIMEOUT")
+    reaper_interval: float = Field(5.0, alias="REAPER_INTERVAL")
+    supervisor_processes: int = Field(0, alias="SUPERVISOR_PROCESSES")
+    supervisor_min_processes: int = Field(1, alias="SUPERVISOR_MIN_PROCESSES")
+    supervisor_max_processes: int = Field(0, alias="SUPERVISOR_MAX_PROCESSES")
+    supervisor_autoscale: bool = Field(True, alias="SUPERVISOR_AUTOSCALE")
+    supervisor_interval: float = Field(5.0, alias="SUPERVISOR_INTERVAL")
+    supervisor_backlog_per_process: int = Field(100, alias="SUPERVISOR_BACKLOG_PER_PROCESS")
+    supervisor_target_wait_seconds: float = Field(5.0, alias="SUPERVISOR_TARGET_WAIT")
+    supervisor_scale_down_cooldown: float = Field(30.0, alias="SUPERVISOR_SCALE_DOWN_COOLDOWN")
+    supervisor_restart_backoff: float = Field(1.0, alias="SUPERVISOR_RESTART_BACKOFF")
+    supervisor_shutdown_timeout: float = Field(30.0, alias="SUPERVISOR_SHUTDOWN_TIMEOUT")
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
+    @model_validator(mode="after")
+    def _apply_key_tag(self) -> "Settings":
+        # A shared {hash tag} keeps every key a script or MULTI touches in one
+        # cluster slot. Completion events are PUBLISHed inside the worker's
+        # MULTI, and cluster clients route PUBLISH by channel name, so the
+        # events prefix is tagged as well.
+        if self.redis_mode == "cluster" and not self.redis_key_tag:
+            raise ValueError("REDIS_MODE=cluster requires REDIS_KEY_TAG")
+        if self.redis_key_tag:
+            tag = f"{{{self.redis_key_tag}}}"
+            for name in (
+                "queue_key",
+                "task_hash_prefix",
+                "cache_prefix",
+                "inflight_prefix",
+                "task_events_prefix",
+            ):
+                value = getattr(self, name)
+                if not value.startswith("{"):
+                    setattr(self, name, f"{tag}{value}")
+        return self
+
+    def task_type_config(self, task_type: Optional[str]) -> TaskTypeConfig:
+        return self.task_types.get(task_type or "", _DEFAULT_TASK_TYPE_CONFIG)
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,35 @@
+from typing import AsyncIterator
+
+import pytest_asyncio
+from fakeredis import aioredis as fake_aioredis
+from httpx import ASGITransport, AsyncClient
+
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch) -> AsyncIterator["fake_aioredis.FakeRedis"]:
+    from infra import redis_client
+
+    client = fake_aioredis.FakeRedis(decode_responses=True)
+    await client.flushall()
+    from app.services import completion_service
+
+    redis_client.set_client(client)
+    yield client
+    await completion_service.close_listener()
+    await client.aclose()
+
+
+@pytest_asyncio.fixture
+async def test_app(fake_redis):
+    from app.main import app
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+def task_worker(fake_redis):
+    from worker.runner import TaskWorker
+
+    return TaskWorker(redis=fake_redis)
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.schemas import TaskRequest
+from app.services import admission_service, task_service
+from infra.settings import Settings, get_settings
+
+
+@pytest.fixture
+def configure(monkeypatch):
+    def apply(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        get_settings.cache_clear()
+        admission_service.reset_controller()
+
+    yield apply
+    get_settings.cache_clear()
+    admission_service.reset_controller()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_each_client(test_app, configure):
+    configure(RATE_LIMIT_PER_SECOND=0.5, RATE_LIMIT_BURST=2, TRUST_CLIENT_ID_HEADER="true")
+    alice = {"X-Client-ID": "alice"}
+
+    assert (await test_app.post("/tasks", json={"prompt": "1"}, headers=alice)).status_code == 202
+    assert (await test_app.post("/tasks", json={"prompt": "2"}, headers=alice)).status_code == 202
+    limited = await test_app.post("/tasks", json={"prompt": "3"}, headers=alice)
+
+    assert limited.status_code == 429
+    assert 1 <= int(limited.headers["Retry-After"]) <= 2
+    bob = await test_app.post("/tasks", json={"prompt": "3"}, headers={"X-Client-ID": "bob"})
+    assert bob.status_code == 202
+
+
+@pytest.mark.asyncio
+async def test_client_id_header_is_ignored_unless_trusted(test_app, configure):
+    configure(RATE_LIMIT_PER_SECOND=0.5, RATE_LIMIT_BURST=2)
+
+    for index in range(2):
+        headers = {"X-Client-ID": f"rotating-{index}"}
+        resp = await test_app.post("/tasks", json={"prompt": str(index)}, headers=headers)
+        assert resp.status_code == 202
+    limited = await test_app.post(
+        "/tasks", json={"prompt": "2"}, headers={"X-Client-ID": "rotating-2"}
+    )
+
+    assert limited.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_batch_cost_is_charged_per_task(test_app, configure):
+    configure(RATE_LIMIT_PER_SECOND=1, RATE_LIMIT_BURST=3)
+    batch = {"tasks": [{"prompt": str(index)} for index in range(3)]}
+
+    assert (await test_app.post("/tasks/batch", json=batch)).status_code == 202
+    assert (await test_app.post("/tasks", json={"prompt": "more"})).status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_queue_length_high_water_mark_sheds_load(test_app, configure):
+    configure(MAX_QUEUE_LENGTH=2, ADMISSION_REFRESH_INTERVAL=0)
+
+    for prompt in ("a", "b"):
+        assert (await test_app.post("/tasks", json={"prompt": prompt})).status_code == 202
+    shed = await test_app.post("/tasks", json={"prompt": "c", "priority": "low"})
+
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "5"
+
+
+@pytest.mark.asyncio
+async def test_oldest_job_age_is_measured_from_queue_heads(fake_redis):
+    settings = Settings(MAX_QUEUE_AGE=10, ADMISSION_REFRESH_INTERVAL=60)
+    controller = admission_service.AdmissionController(settings)
+    submitted = await task_service.submit_task(TaskRequest(prompt="old"), settings)
+
+    await controller.check(fake_redis)
+
+    await fake_redis.hset(f"task:{submitted.task_id}", "enqueued_at", time.time() - 30)
+    await controller.check(fake_redis)  # cached snapshot is still fresh
+
+    await controller.refresh(fake_redis)
+    assert controller.snapshot.depth == 1
+    assert controller.snapshot.oldest_age >= 30
+    with pytest.raises(HTTPException) as excinfo:
+        await controller.check(fake_redis)
+    assert excinfo.value.status_code == 503
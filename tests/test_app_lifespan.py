@@ -0,0 +1,47 @@
+import pytest
+
+from infra import redis_client, redis_scripts
+from infra.settings import Settings
+
+
+@pytest.mark.asyncio
+async def test_lifespan_warms_pool_loads_scripts_and_closes(fake_redis, monkeypatch):
+    from app.main import app
+    from app.services import task_service
+
+    await fake_redis.script_flush()
+    closed = []
+
+    async def record_close():
+        closed.append(True)
+
+    monkeypatch.setattr(fake_redis, "aclose", record_close)
+
+    async with app.router.lifespan_context(app):
+        assert redis_client.get_client() is fake_redis
+        assert await fake_redis.script_exists(task_service._SUBMIT_SCRIPT.sha) == [True]
+
+    assert closed == [True]
+    assert redis_client._client is None
+
+
+@pytest.mark.asyncio
+async def test_warm_up_tolerates_unreachable_redis():
+    client = redis_client.build_client(
+        Settings(REDIS_URL="redis://127.0.0.1:1/0", REDIS_RETRIES=0, REDIS_CONNECT_TIMEOUT=0.2)
+    )
+    try:
+        assert await redis_client.warm_up(client, Settings(REDIS_WARM_CONNECTIONS=2)) is False
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_load_scripts_registers_every_script(fake_redis):
+    await fake_redis.script_flush()
+
+    loaded = await redis_scripts.load_scripts(fake_redis)
+
+    scripts = redis_scripts.registered_scripts()
+    assert loaded == len(scripts) > 0
+    assert await fake_redis.script_exists(*[script.sha for script in scripts]) == [True] * loaded
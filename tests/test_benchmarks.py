@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from benchmarks import runner
+from benchmarks.runner import Benchmark, BenchmarkResult, RunnerConfig
+
+
+def test_every_benchmark_runs():
+    benches = runner.registered_benchmarks()
+    names = {bench.name for bench in benches}
+    assert {"compute_signature_small[json]", "submit_task", "worker_process_next", "api_submit"} <= names
+
+    for bench in benches:
+        assert bench.time(2) > 0
+
+
+def test_calibrate_grows_loops_until_min_time():
+    calls = []
+
+    def fake(loops):
+        calls.append(loops)
+        return loops * 0.001
+
+    loops = runner.calibrate(Benchmark("fake", fake), min_time=0.1, max_loops=10_000)
+
+    assert loops * 0.001 >= 0.1
+    assert calls[-1] == loops
+    assert all(later <= earlier * 10 for earlier, later in zip(calls, calls[1:]))
+
+
+def test_run_benchmark_reports_time_per_operation():
+    config = RunnerConfig(samples=3, warmups=0, min_time=0.01)
+    result = runner.run_benchmark(Benchmark("fake", lambda loops: loops * 0.002), config)
+
+    assert len(result.samples) == 3
+    assert result.median == pytest.approx(0.002)
+    assert BenchmarkResult.from_dict("fake", result.to_dict()).samples == result.samples
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {
+        "fast": BenchmarkResult("fast", "default", 1, [1.0]),
+        "slow": BenchmarkResult("slow", "default", 1, [1.0]),
+    }
+    results = [
+        BenchmarkResult("fast", "default", 1, [1.05]),
+        BenchmarkResult("slow", "default", 1, [1.5]),
+        BenchmarkResult("new", "default", 1, [9.0]),
+    ]
+
+    comparisons = {item.name: item for item in runner.compare(baseline, results, threshold=0.1)}
+
+    assert set(comparisons) == {"fast", "slow"}
+    assert not comparisons["fast"].regressed
+    assert comparisons["slow"].regressed
+    assert comparisons["slow"].change == pytest.approx(0.5)
+
+
+def test_main_saves_results_and_fails_on_regression(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    argv = ["task_request_parse", "--samples", "2", "--min-time", "0.001"]
+
+    assert runner.main([*argv, "--output", str(output)]) == 0
+    report = json.loads(output.read_text())
+    assert set(report["benchmarks"]) == {"task_request_parse"}
+
+    report["benchmarks"]["task_request_parse"]["samples"] = [1e-12]
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(report))
+
+    assert runner.main([*argv, "--baseline", str(baseline), "--threshold", "0.2"]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
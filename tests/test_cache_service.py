@@ -0,0 +1,132 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import cache_service, task_service
+from infra.settings import Settings
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def fresh_local_cache():
+    cache_service.reset_local_cache()
+    yield
+    cache_service.reset_local_cache()
+
+
+def test_local_cache_evicts_least_recently_used_by_entries_and_bytes():
+    cache = cache_service.LocalResultCache(max_entries=2, max_bytes=100, ttl_seconds=60)
+    cache.put("a", {"v": "a"}, size=10)
+    cache.put("b", {"v": "b"}, size=10)
+    assert cache.get("a") == {"v": "a"}
+
+    cache.put("c", {"v": "c"}, size=10)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    cache.put("big", {"v": "big"}, size=85)
+    assert cache.get("a") is None
+    assert cache.get("big") == {"v": "big"}
+    assert cache.size_bytes == 95
+
+    cache.put("huge", {"v": "huge"}, size=101)
+    assert cache.get("huge") is None
+
+
+def test_local_cache_entries_expire():
+    clock = FakeClock()
+    cache = cache_service.LocalResultCache(
+        max_entries=10, max_bytes=100, ttl_seconds=5, clock=clock
+    )
+    cache.put("a", {"v": 1}, size=1)
+    clock.now = 4.9
+    assert cache.get("a") == {"v": 1}
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.size_bytes == 0
+
+
+def test_local_ttl_never_exceeds_redis_ttl():
+    settings = Settings(LOCAL_CACHE_ENABLED=True, LOCAL_CACHE_TTL=3600, CACHE_TTL=30)
+    assert cache_service.get_local_cache(settings).ttl_seconds == 30
+    assert cache_service.get_local_cache(Settings()) is None
+
+
+def test_local_entry_ttl_is_capped_by_its_redis_ttl():
+    clock = FakeClock()
+    cache = cache_service.LocalResultCache(
+        max_entries=10, max_bytes=100, ttl_seconds=60, clock=clock
+    )
+    cache.put("short", {"v": 1}, size=1, ttl_seconds=5)
+    cache.put("uncached", {"v": 2}, size=1, ttl_seconds=0)
+    clock.now = 5.0
+
+    assert cache.get("short") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("batch", [False, True])
+@pytest.mark.asyncio
+async def test_local_tier_honours_task_type_cache_ttl(fake_redis, batch):
+    settings = Settings(
+        LOCAL_CACHE_ENABLED=True, TASK_TYPES={"brief": {"cache_ttl_seconds": 5}}
+    )
+    request = TaskRequest(prompt="brief", task_type="brief")
+    signature = cache_service.compute_signature(request.job_payload())
+    await fake_redis.set(f"cache:{signature}", json.dumps({"answer": 1}), ex=5)
+
+    if batch:
+        await task_service.submit_tasks([request, request], settings)
+    else:
+        await task_service.submit_task(request, settings)
+
+    expires_at, _, _ = cache_service.get_local_cache(settings)._entries[signature]
+    assert expires_at - time.monotonic() <= 5
+
+
+@pytest.mark.asyncio
+async def test_hot_submissions_are_served_from_local_tier(fake_redis):
+    settings = Settings(LOCAL_CACHE_ENABLED=True)
+    request = TaskRequest(prompt="hot")
+    signature = cache_service.compute_signature(request.job_payload())
+    await fake_redis.set(f"cache:{signature}", json.dumps({"answer": 1}))
+
+    first = await task_service.submit_task(request, settings)
+    await fake_redis.delete(f"cache:{signature}")
+    second = await task_service.submit_task(request, settings)
+    batch = await task_service.submit_tasks([request], settings)
+
+    assert first.cached and second.cached and batch.items[0].cached
+    assert second.result == {"answer": 1}
+    assert cache_service.stats.snapshot() == {
+        "local_hits": 2,
+        "local_misses": 1,
+        "redis_hits": 1,
+        "redis_misses": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_keyspace_events_invalidate_local_entries(fake_redis):
+    settings = Settings(LOCAL_CACHE_ENABLED=True)
+    local = cache_service.get_local_cache(settings)
+    local.put("sig", {"v": 1}, size=1)
+
+    listener = asyncio.create_task(cache_service.run_local_invalidation(fake_redis, settings))
+    await asyncio.sleep(0.05)
+    await fake_redis.publish("__keyspace@0__:cache:sig", "expired")
+    await asyncio.sleep(0.05)
+    listener.cancel()
+    await asyncio.gather(listener, return_exceptions=True)
+
+    assert local.get("sig") is None
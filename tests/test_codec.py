@@ -0,0 +1,58 @@
+import hashlib
+import json
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import cache_service, task_service
+from infra.codec import get_codec
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+
+def test_json_signature_is_stable():
+    payload = {"prompt": "héllo", "params": {"b": 1, "a": [1, 2]}}
+    legacy = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+    assert cache_service.compute_signature(payload) == hashlib.sha256(legacy).hexdigest()
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_codec_round_trip_and_canonical_ordering(name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    codec = get_codec(name)
+    value = {"prompt": "héllo", "params": {"b": 1, "a": [1.5, None, True]}}
+
+    assert codec.loads(codec.dumps(value)) == value
+    assert codec.canonical({"b": 1, "a": 2}) == codec.canonical({"a": 2, "b": 1})
+
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported codec"):
+        get_codec("pickle")
+
+
+@pytest.mark.asyncio
+async def test_task_flow_with_orjson_codec(fake_redis):
+    pytest.importorskip("orjson")
+    settings = Settings(CODEC="orjson", BLOCKING_DEQUEUE=False)
+    request = TaskRequest(prompt="fast", params={"n": 1})
+
+    submitted = await task_service.submit_task(request, settings)
+    assert await fake_redis.lrange("task_queue", 0, -1) == [submitted.task_id]
+
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+    assert await worker.process_next() is True
+
+    detail = await task_service.get_task(submitted.task_id, settings)
+    assert detail.result == {"prompt": "fast", "params": {"n": 1}}
+    assert (await task_service.submit_task(request, settings)).cached is True
+
+
+@pytest.mark.asyncio
+async def test_worker_skips_task_whose_hash_expired(fake_redis, task_worker):
+    await fake_redis.rpush("task_queue", "gone")
+
+    assert await task_worker.process_next() is True
+    assert await fake_redis.exists("task:gone") == 0
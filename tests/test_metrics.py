@@ -0,0 +1,45 @@
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+
+def samples(text: str) -> dict:
+    found = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            found[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return found
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_hot_path_instrumentation(test_app, task_worker):
+    before = samples((await test_app.get("/metrics")).text)
+    task_id = (await test_app.post("/tasks", json={"prompt": "measure"})).json()["task_id"]
+    await test_app.post("/tasks", json={"prompt": "queued", "priority": "low"})
+    assert await task_worker.process_next() is True
+    await test_app.get(f"/tasks/{task_id}")
+    # Long-polls measure client wait time and stay out of the latency histogram.
+    await test_app.get(f"/tasks/{task_id}", params={"wait": 1})
+
+    resp = await test_app.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    after = samples(resp.text)
+
+    def delta(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after.get(key, 0) - before.get(key, 0)
+
+    assert delta(
+        "http_request_duration_seconds_count", method="POST", route="/tasks", status="202"
+    ) == 2
+    assert delta(
+        "http_request_duration_seconds_count",
+        method="GET",
+        route="/tasks/{task_id}",
+        status="200",
+    ) == 1
+    assert delta("redis_command_duration_seconds_count", command="MULTI") >= 2
+    assert delta("task_run_duration_seconds_count", status="DONE") == 1
+    assert delta("task_queue_wait_seconds_count") == 1
+    assert delta("result_cache_lookups_total", tier="redis", result="miss") == 2
+    assert after[("task_queue_length", (("queue", "task_queue:low"),))] == 1
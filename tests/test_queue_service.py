@@ -0,0 +1,87 @@
+from collections import Counter
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import cache_service, task_service
+from app.services.queue_service import QueueScheduler, all_queue_keys, queue_key_for
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+
+def test_queue_keys_keep_normal_on_legacy_key():
+    settings = Settings()
+    assert all_queue_keys(settings) == ["task_queue:high", "task_queue", "task_queue:low"]
+    assert queue_key_for(settings, "normal") == "task_queue"
+
+
+def test_strict_scheduler_always_prefers_higher_priority():
+    scheduler = QueueScheduler(Settings(SCHEDULING="strict"))
+    assert scheduler.next_order() == ["task_queue:high", "task_queue", "task_queue:low"]
+    assert scheduler.next_order() == ["task_queue:high", "task_queue", "task_queue:low"]
+
+
+def test_weighted_scheduler_leads_in_proportion_to_weights():
+    scheduler = QueueScheduler(Settings())
+    leads = Counter(scheduler.next_order()[0] for _ in range(100))
+    assert leads == {"task_queue:high": 60, "task_queue": 30, "task_queue:low": 10}
+
+
+def test_priority_is_not_part_of_signature():
+    high = TaskRequest(prompt="same", priority="high")
+    low = TaskRequest(prompt="same", priority="low")
+    assert cache_service.compute_signature(high.job_payload()) == cache_service.compute_signature(
+        low.job_payload()
+    )
+
+
+async def submit(prompt: str, priority: str, settings: Settings) -> str:
+    response = await task_service.submit_task(
+        TaskRequest(prompt=prompt, priority=priority), settings
+    )
+    return response.task_id
+
+
+@pytest.mark.asyncio
+async def test_high_priority_duplicate_does_not_join_queued_low_task(fake_redis):
+    settings = Settings()
+    low = await submit("same", "low", settings)
+    high = await submit("same", "high", settings)
+
+    assert high != low
+    assert await submit("same", "high", settings) == high
+    assert await fake_redis.lrange("task_queue:high", 0, -1) == [high]
+
+    batch = await task_service.submit_tasks(
+        [TaskRequest(prompt="other", priority="low"), TaskRequest(prompt="other", priority="high")],
+        settings,
+    )
+    batch_low, batch_high = (item.task_id for item in batch.items)
+    assert batch_low != batch_high
+    assert await fake_redis.lrange("task_queue:high", 0, -1) == [high, batch_high]
+
+
+@pytest.mark.asyncio
+async def test_weighted_worker_does_not_starve_interactive_tasks(fake_redis):
+    settings = Settings(BLOCKING_DEQUEUE=False)
+    low_ids = [await submit(f"bulk-{index}", "low", settings) for index in range(20)]
+    high_ids = [await submit(f"ui-{index}", "high", settings) for index in range(6)]
+    worker = TaskWorker(redis=fake_redis, settings=settings, worker_id="w")
+
+    served = [await worker._dequeue() for _ in range(10)]
+
+    assert set(high_ids) <= set(served)
+    assert sum(task_id in low_ids for task_id in served) == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reliable", [False, True])
+async def test_strict_worker_drains_high_priority_first(fake_redis, reliable):
+    settings = Settings(SCHEDULING="strict", RELIABLE_QUEUE=reliable, DEQUEUE_TIMEOUT=0.05)
+    normal = await submit("normal", "normal", settings)
+    high = await submit("high", "high", settings)
+    worker = TaskWorker(redis=fake_redis, settings=settings, worker_id="w")
+
+    assert await worker._dequeue() == high
+    assert await worker._dequeue() == normal
+    assert await worker._dequeue() is None
@@ -0,0 +1,105 @@
+import pytest
+from redis.asyncio import BlockingConnectionPool, Redis, RedisCluster
+from redis.asyncio.client import Pipeline
+from redis.asyncio.sentinel import SentinelConnectionPool
+from redis.crc import key_slot
+
+from app.schemas import TaskRequest
+from app.services import task_service
+from infra.redis_client import build_client
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+
+@pytest.mark.asyncio
+async def test_standalone_client_uses_pool_settings():
+    settings = Settings(
+        REDIS_MAX_CONNECTIONS=7,
+        REDIS_POOL_TIMEOUT=2,
+        REDIS_SOCKET_TIMEOUT=0.5,
+        DEQUEUE_TIMEOUT=2,
+        REDIS_PROTOCOL=3,
+    )
+    client = build_client(settings)
+    try:
+        pool = client.connection_pool
+        # A capped pool queues callers rather than raising "Too many connections".
+        assert isinstance(pool, BlockingConnectionPool)
+        assert pool.max_connections == 7
+        assert pool.timeout == 2
+        assert pool.connection_kwargs["socket_timeout"] == 3
+        assert pool.connection_kwargs["socket_keepalive"] is True
+        assert pool.connection_kwargs["health_check_interval"] == 30
+        assert pool.connection_kwargs["protocol"] == 3
+        assert pool.connection_kwargs["retry"].get_retries() == 3
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_pool_is_unbounded_by_default():
+    client = build_client(Settings())
+    try:
+        assert not isinstance(client.connection_pool, BlockingConnectionPool)
+        assert client.connection_pool.max_connections == 2**31
+    finally:
+        await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_sentinel_client_resolves_master_through_sentinels():
+    with pytest.raises(ValueError):
+        build_client(Settings(REDIS_MODE="sentinel"))
+
+    client = build_client(
+        Settings(
+            REDIS_MODE="sentinel",
+            REDIS_SENTINELS=["s1:26379", "s2"],
+            REDIS_SENTINEL_MASTER="primary",
+        )
+    )
+    try:
+        assert isinstance(client, Redis)
+        assert isinstance(client.connection_pool, SentinelConnectionPool)
+        assert client.connection_pool.service_name == "primary"
+        sentinels = client.connection_pool.sentinel_manager.sentinels
+        assert [s.connection_pool.connection_kwargs["host"] for s in sentinels] == ["s1", "s2"]
+        assert [s.connection_pool.connection_kwargs["port"] for s in sentinels] == [26379, 26379]
+    finally:
+        await client.aclose()
+
+
+def test_cluster_mode_builds_cluster_client():
+    client = build_client(
+        Settings(REDIS_MODE="cluster", REDIS_KEY_TAG="tq", REDIS_URL="redis://node:7000/0")
+    )
+    assert isinstance(client, RedisCluster)
+
+
+@pytest.mark.asyncio
+async def test_completion_transactions_stay_in_one_cluster_slot(fake_redis, monkeypatch):
+    # Cluster transactions route every command, PUBLISH included, by its
+    # first key or channel; all of them must hash to the same slot.
+    slots = []
+    execute = Pipeline.execute
+
+    async def recording_execute(self, *args, **kwargs):
+        if self.is_transaction:
+            slots.append({key_slot(str(command[1]).encode()) for command, _ in self.command_stack})
+        return await execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(Pipeline, "execute", recording_execute)
+    settings = Settings(
+        REDIS_MODE="cluster", REDIS_KEY_TAG="tq", BLOCKING_DEQUEUE=False, MAX_RETRIES=0
+    )
+    await task_service.submit_task(TaskRequest(prompt="ok"), settings)
+    await task_service.submit_task(
+        TaskRequest(prompt="bad", params={"force_error": True}), settings
+    )
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+
+    assert await worker.process_next() is True
+    assert await worker.process_next() is True
+
+    assert len(slots) >= 4
+    assert all(transaction == {key_slot(b"tq")} for transaction in slots)
@@ -0,0 +1,122 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import cache_service, queue_service, task_service
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+
+@pytest.mark.asyncio
+async def test_delayed_task_waits_in_timer_set(fake_redis):
+    settings = Settings(BLOCKING_DEQUEUE=False)
+    before = time.time()
+    submitted = await task_service.submit_task(
+        TaskRequest(prompt="later", delay=3600), settings
+    )
+    delayed = queue_service.delayed_key_for(settings.queue_key)
+
+    assert await fake_redis.llen(settings.queue_key) == 0
+    due = await fake_redis.zscore(delayed, submitted.task_id)
+    assert before + 3600 <= due <= time.time() + 3600
+    assert await fake_redis.ttl(f"task:{submitted.task_id}") > settings.task_ttl_seconds
+    assert (await task_service.get_task(submitted.task_id)).status == "PENDING"
+
+    assert await queue_service.promote_due(fake_redis, settings) == 0
+    assert await queue_service.promote_due(fake_redis, settings, now=due) == 1
+
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+    assert await worker.process_next() is True
+    assert (await task_service.get_task(submitted.task_id)).status == "DONE"
+
+
+@pytest.mark.asyncio
+async def test_run_at_in_the_past_runs_immediately(fake_redis):
+    settings = Settings()
+    run_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    submitted = await task_service.submit_task(
+        TaskRequest(prompt="now", run_at=run_at, priority="high"), settings
+    )
+
+    assert await fake_redis.lrange("task_queue:high", 0, -1) == [submitted.task_id]
+
+
+@pytest.mark.asyncio
+async def test_batch_schedules_each_task(fake_redis):
+    settings = Settings()
+    run_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    response = await task_service.submit_tasks(
+        [TaskRequest(prompt="a", run_at=run_at), TaskRequest(prompt="b")], settings
+    )
+    scheduled, immediate = (item.task_id for item in response.items)
+
+    delayed = queue_service.delayed_key_for(settings.queue_key)
+    assert await fake_redis.zscore(delayed, scheduled) == pytest.approx(run_at.timestamp())
+    assert await fake_redis.lrange(settings.queue_key, 0, -1) == [immediate]
+
+
+def test_schedule_is_not_part_of_signature():
+    # Scheduled and run-now tasks share cached results...
+    plain = TaskRequest(prompt="same")
+    delayed = TaskRequest(prompt="same", delay=60)
+    assert cache_service.compute_signature(plain.job_payload()) == cache_service.compute_signature(
+        delayed.job_payload()
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_now_submit_does_not_join_scheduled_task(fake_redis):
+    # ...but never an in-flight task: a run-now submit must not wait a day.
+    settings = Settings(BLOCKING_DEQUEUE=False)
+    scheduled = await task_service.submit_task(TaskRequest(prompt="same", delay=86000), settings)
+    now = await task_service.submit_task(TaskRequest(prompt="same"), settings)
+    joined = await task_service.submit_task(TaskRequest(prompt="same"), settings)
+    again = await task_service.submit_task(TaskRequest(prompt="same", delay=86000), settings)
+
+    assert now.task_id != scheduled.task_id
+    assert joined.task_id == now.task_id
+    assert again.task_id not in {scheduled.task_id, now.task_id}
+    assert await fake_redis.lrange(settings.queue_key, 0, -1) == [now.task_id]
+
+    # Completing the scheduled task leaves the run-now task's marker alone.
+    await fake_redis.lrem(settings.queue_key, 0, now.task_id)
+    await queue_service.promote_due(fake_redis, settings, now=time.time() + 86400)
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+    while await worker.process_next():
+        pass
+    assert (await task_service.get_task(scheduled.task_id)).status == "DONE"
+    signature = cache_service.compute_signature(TaskRequest(prompt="same").job_payload())
+    inflight = cache_service.build_inflight_key(settings, signature)
+    assert await fake_redis.get(inflight) == now.task_id
+
+
+@pytest.mark.asyncio
+async def test_batch_run_now_does_not_join_scheduled_task(fake_redis):
+    settings = Settings()
+    run_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    response = await task_service.submit_tasks(
+        [
+            TaskRequest(prompt="same", run_at=run_at),
+            TaskRequest(prompt="same"),
+            TaskRequest(prompt="same"),
+        ],
+        settings,
+    )
+    scheduled, immediate, duplicate = (item.task_id for item in response.items)
+
+    assert scheduled != immediate
+    assert duplicate == immediate
+    assert await fake_redis.lrange(settings.queue_key, 0, -1) == [immediate]
+    follow_up = await task_service.submit_task(TaskRequest(prompt="same"), settings)
+    assert follow_up.task_id == immediate
+
+
+@pytest.mark.asyncio
+async def test_run_at_and_delay_are_exclusive(test_app):
+    response = await test_app.post(
+        "/tasks",
+        json={"prompt": "x", "delay": 5, "run_at": "2030-01-01T00:00:00Z"},
+    )
+    assert response.status_code == 422
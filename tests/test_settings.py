@@ -25,6 +25,9 @@ def test_settings_defaults():
     assert settings.cache_prefix == "cache:"
     assert settings.cache_ttl_seconds == 600
     assert settings.task_ttl_seconds == 86400
+    assert settings.worker_concurrency == 10
+    assert settings.blocking_dequeue is True
+    assert settings.dequeue_timeout == 1.0
 
 
 def test_settings_environment_override(monkeypatch):
@@ -36,3 +39,26 @@ def test_settings_environment_override(monkeypatch):
     assert settings.redis_url == "redis://redis:6379/1"
     assert settings.queue_key == "tasks_stream"
     assert settings.task_ttl_seconds == 3600
+
+
+def test_key_tag_colocates_task_keys():
+    settings = settings_module.Settings(REDIS_KEY_TAG="tq", CACHE_PREFIX="{other}cache:")
+
+    assert settings.queue_key == "{tq}task_queue"
+    assert settings.task_hash_prefix == "{tq}task:"
+    assert settings.inflight_prefix == "{tq}inflight:"
+    assert settings.task_events_prefix == "{tq}task_events:"
+    assert settings.cache_prefix == "{other}cache:"
+
+
+def test_cluster_mode_requires_key_tag():
+    with pytest.raises(ValueError):
+        settings_module.Settings(REDIS_MODE="cluster")
+
+
+def test_type_concurrency_requires_dedicated_queue():
+    with pytest.raises(ValueError):
+        settings_module.Settings(TASK_TYPES={"slow": {"concurrency": 2}})
+
+    settings = settings_module.Settings(TASK_TYPES={"slow": {"queue": "slow", "concurrency": 2}})
+    assert settings.task_type_config("slow").concurrency == 2
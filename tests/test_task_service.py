@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import task_service
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+
+class CommandRecorder:
+    def __init__(self, redis):
+        self.commands = []
+        self._original = redis.execute_command
+        redis.execute_command = self
+
+    async def __call__(self, *args, **kwargs):
+        self.commands.append(args[0])
+        return await self._original(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_submit_miss_is_single_round_trip(fake_redis):
+    await fake_redis.script_load(task_service._SUBMIT_SCRIPT.source)
+    recorder = CommandRecorder(fake_redis)
+
+    response = await task_service.submit_task(TaskRequest(prompt="one-rtt"))
+
+    assert recorder.commands == ["EVALSHA"]
+    task = await fake_redis.hgetall(f"task:{response.task_id}")
+    assert task["status"] == "PENDING"
+    assert await fake_redis.ttl(f"task:{response.task_id}") > 0
+    assert await fake_redis.lrange("task_queue", 0, -1) == [response.task_id]
+
+
+@pytest.mark.asyncio
+async def test_submit_hit_skips_task_creation(fake_redis):
+    request = TaskRequest(prompt="cached")
+    signature = task_service.cache_service.compute_signature(request.job_payload())
+    await fake_redis.set(f"cache:{signature}", json.dumps({"answer": 42}))
+
+    response = await task_service.submit_task(request)
+
+    assert response.cached is True
+    assert response.result == {"answer": 42}
+    assert await fake_redis.llen("task_queue") == 0
+    assert await fake_redis.keys("task:*") == []
+
+
+@pytest.mark.asyncio
+async def test_duplicate_submissions_attach_to_in_flight_task(fake_redis, task_worker):
+    request = TaskRequest(prompt="spike", params={"force_error": True})
+
+    first = await task_service.submit_task(request)
+    second = await task_service.submit_task(request)
+    batch = await task_service.submit_tasks([request, TaskRequest(prompt="other")])
+
+    assert second.task_id == first.task_id
+    assert batch.items[0].task_id == first.task_id
+    assert await fake_redis.llen("task_queue") == 2
+    assert len(await fake_redis.keys("task:*")) == 2
+
+    assert await task_worker.process_next() is True
+    retried = await task_service.submit_task(request)
+    assert retried.task_id != first.task_id
+
+
+@pytest.mark.asyncio
+async def test_completion_clears_in_flight_marker(fake_redis, task_worker):
+    request = TaskRequest(prompt="once")
+    signature = task_service.cache_service.compute_signature(request.job_payload())
+
+    submitted = await task_service.submit_task(request)
+    assert await fake_redis.get(f"inflight:{signature}") == submitted.task_id
+
+    assert await task_worker.process_next() is True
+    assert await fake_redis.exists(f"inflight:{signature}") == 0
+    assert (await task_service.submit_task(request)).cached is True
+
+
+@pytest.mark.asyncio
+async def test_in_flight_marker_expires_when_worker_dies(fake_redis):
+    settings = Settings(INFLIGHT_TTL=1)
+    request = TaskRequest(prompt="orphan")
+    signature = task_service.cache_service.compute_signature(request.job_payload())
+
+    first = await task_service.submit_task(request, settings)
+    assert 0 < await fake_redis.ttl(f"inflight:{signature}") <= 1
+    # A worker pops the job and dies before finishing it.
+    assert await fake_redis.lpop("task_queue") == first.task_id
+    await asyncio.sleep(1.1)
+
+    second = await task_service.submit_task(request, settings)
+    assert second.task_id != first.task_id
+    assert await fake_redis.lrange("task_queue", 0, -1) == [second.task_id]
+
+
+@pytest.mark.asyncio
+async def test_running_job_keeps_in_flight_marker_alive(fake_redis):
+    settings = Settings(INFLIGHT_TTL=1, BLOCKING_DEQUEUE=False)
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+    request = TaskRequest(prompt="long", params={"duration": 1.5})
+    signature = task_service.cache_service.compute_signature(request.job_payload())
+
+    first = await task_service.submit_task(request, settings)
+    job = asyncio.create_task(worker.process_next())
+    await asyncio.sleep(1.2)
+
+    assert not job.done()
+    assert (await task_service.submit_task(request, settings)).task_id == first.task_id
+    assert await job is True
+    assert await fake_redis.exists(f"inflight:{signature}") == 0
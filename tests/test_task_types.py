@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import cache_service, task_service
+from app.services.queue_service import all_queue_keys, queue_key_for
+from infra.settings import Settings
+from worker import handlers, reliable
+from worker.runner import TaskWorker
+
+TASK_TYPES = {
+    "slow": {"queue": "slow", "concurrency": 1, "timeout_seconds": 0.1, "cache_ttl_seconds": 5},
+    "nocache": {"cache_ttl_seconds": 0},
+}
+
+
+def typed_settings(**overrides) -> Settings:
+    overrides.setdefault("TASK_TYPES", TASK_TYPES)
+    return Settings(BLOCKING_DEQUEUE=False, **overrides)
+
+
+@pytest.fixture
+def typed_handlers():
+    @handlers.register("slow")
+    async def slow(payload):
+        await asyncio.sleep(float(payload["params"].get("duration", 0)))
+        return {"prompt": payload["prompt"]}
+
+    @handlers.register("nocache")
+    async def nocache(payload):
+        return {"prompt": payload["prompt"]}
+
+    yield
+    handlers.unregister("slow")
+    handlers.unregister("nocache")
+
+
+def test_task_type_is_part_of_signature():
+    default = TaskRequest(prompt="same")
+    slow = TaskRequest(prompt="same", task_type="slow")
+
+    assert "task_type" not in default.job_payload()
+    assert cache_service.compute_signature(default.job_payload()) == cache_service.compute_signature(
+        {"prompt": "same", "params": {}}
+    )
+    assert cache_service.compute_signature(slow.job_payload()) != cache_service.compute_signature(
+        default.job_payload()
+    )
+
+
+def test_typed_queues_follow_priority_suffixes():
+    settings = typed_settings()
+
+    assert queue_key_for(settings, "normal", "slow") == "task_queue:slow"
+    assert queue_key_for(settings, "high", "slow") == "task_queue:slow:high"
+    assert queue_key_for(settings, "low", "nocache") == "task_queue:low"
+    assert all_queue_keys(settings) == [
+        "task_queue:high",
+        "task_queue:slow:high",
+        "task_queue",
+        "task_queue:slow",
+        "task_queue:low",
+        "task_queue:slow:low",
+    ]
+
+
+def test_queue_name_may_not_clash_with_priority():
+    with pytest.raises(ValueError):
+        Settings(TASK_TYPES={"bad": {"queue": "high"}})
+
+
+@pytest.mark.asyncio
+async def test_worker_consumes_only_its_task_types(fake_redis):
+    settings = typed_settings()
+    slow = await task_service.submit_task(TaskRequest(prompt="s", task_type="slow"), settings)
+    fast = await task_service.submit_task(TaskRequest(prompt="f"), settings)
+
+    assert await fake_redis.lrange("task_queue:slow", 0, -1) == [slow.task_id]
+    worker = TaskWorker(redis=fake_redis, settings=settings, task_types=["default"])
+    assert await worker._dequeue() == fast.task_id
+    assert await worker._dequeue() is None
+
+
+@pytest.mark.asyncio
+async def test_timeout_fails_slow_job(fake_redis, typed_handlers):
+    settings = typed_settings()
+    submitted = await task_service.submit_task(
+        TaskRequest(prompt="s", task_type="slow", params={"duration": 1}), settings
+    )
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+
+    assert await worker.process_next() is True
+
+    detail = await task_service.get_task(submitted.task_id)
+    assert detail.status == "FAILED"
+    assert "timeout" in detail.error
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_is_per_type(fake_redis, typed_handlers):
+    settings = typed_settings()
+    slow = TaskRequest(prompt="s", task_type="slow")
+    nocache = TaskRequest(prompt="n", task_type="nocache")
+    await task_service.submit_task(slow, settings)
+    await task_service.submit_task(nocache, settings)
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+
+    await worker.process_next()
+    await worker.process_next()
+
+    slow_key = cache_service.build_cache_key(
+        settings, cache_service.compute_signature(slow.job_payload())
+    )
+    nocache_key = cache_service.build_cache_key(
+        settings, cache_service.compute_signature(nocache.job_payload())
+    )
+    assert 0 < await fake_redis.ttl(slow_key) <= 5
+    assert await fake_redis.exists(nocache_key) == 0
+
+
+@pytest.mark.asyncio
+async def test_type_concurrency_limit_skips_saturated_queue(fake_redis, typed_handlers):
+    settings = typed_settings(TASK_TYPES={"slow": {"queue": "slow", "concurrency": 1}})
+    for index in range(2):
+        await task_service.submit_task(
+            TaskRequest(prompt=f"s{index}", task_type="slow", params={"duration": 0.1}), settings
+        )
+    worker = TaskWorker(redis=fake_redis, settings=settings, concurrency=4)
+
+    start = time.perf_counter()
+    assert await worker.run(max_tasks=2) == 2
+    elapsed = time.perf_counter() - start
+
+    assert elapsed >= 0.2
+    assert await fake_redis.llen("task_queue:slow") == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_to_type_queue(fake_redis):
+    settings = typed_settings(RELIABLE_QUEUE=True)
+    await task_service.submit_task(TaskRequest(prompt="s", task_type="slow"), settings)
+    crashed = TaskWorker(redis=fake_redis, settings=settings, worker_id="crashed")
+    task_id = await crashed._dequeue()
+
+    assert await reliable.requeue_expired(fake_redis, settings, now=time.time() + 60) == 1
+    assert await fake_redis.lrange("task_queue:slow", 0, -1) == [task_id]
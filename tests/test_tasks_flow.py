@@ -1,38 +1,8 @@
 import asyncio
-import json
-from typing import AsyncIterator, Dict
+from typing import Dict
 
 import pytest
-import pytest_asyncio
-from fakeredis import aioredis as fake_aioredis
-from httpx import ASGITransport, AsyncClient
-
-
-@pytest_asyncio.fixture
-async def fake_redis(monkeypatch) -> AsyncIterator["fake_aioredis.FakeRedis"]:
-    from infra import redis_client
-
-    client = fake_aioredis.FakeRedis(decode_responses=True)
-    await client.flushall()
-    redis_client.set_client(client)
-    yield client
-    await client.aclose()
-
-
-@pytest_asyncio.fixture
-async def test_app(fake_redis):
-    from app.main import app
-
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://testserver") as client:
-        yield client
-
-
-@pytest_asyncio.fixture
-def task_worker(fake_redis):
-    from worker.runner import TaskWorker
-
-    return TaskWorker(redis=fake_redis)
+from httpx import AsyncClient
 
 
 async def drain_worker(worker, expected_done: int) -> None:
@@ -100,3 +70,171 @@ async def test_task_failure_propagates_to_client(test_app: AsyncClient, task_wor
     assert detail["status"] == "FAILED"
     assert detail["result"] is None
     assert "force_error" in detail["error"]
+
+
+@pytest.mark.asyncio
+async def test_batch_submission_mixes_cached_and_new(test_app: AsyncClient, task_worker):
+    warm = {"prompt": "warm", "params": {}}
+    warm_resp = await test_app.post("/tasks", json=warm)
+    await drain_worker(task_worker, expected_done=1)
+    assert warm_resp.status_code == 202
+
+    fresh = {"prompt": "fresh", "params": {}}
+    batch = {"tasks": [warm, fresh, {"prompt": "other"}, fresh]}
+    resp = await test_app.post("/tasks/batch", json=batch)
+    assert resp.status_code == 202
+    items = resp.json()["items"]
+
+    assert [item["cached"] for item in items] == [True, False, False, False]
+    assert items[0]["result"] == {"prompt": "warm", "params": {}}
+    assert items[1]["task_id"] == items[3]["task_id"]
+    assert items[1]["task_id"] != items[2]["task_id"]
+
+    await drain_worker(task_worker, expected_done=2)
+    detail = (await test_app.get(f"/tasks/{items[2]['task_id']}")).json()
+    assert detail["status"] == "DONE"
+
+    all_cached = await test_app.post("/tasks/batch", json={"tasks": [warm, fresh]})
+    assert all_cached.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_batch_submission_rejects_empty_and_oversized(test_app: AsyncClient, monkeypatch):
+    from infra.settings import get_settings
+
+    assert (await test_app.post("/tasks/batch", json={"tasks": []})).status_code == 422
+
+    get_settings.cache_clear()
+    monkeypatch.setenv("MAX_BATCH_SIZE", "2")
+    try:
+        resp = await test_app.post(
+            "/tasks/batch",
+            json={"tasks": [{"prompt": str(index)} for index in range(3)]},
+        )
+    finally:
+        get_settings.cache_clear()
+    assert resp.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_batch_status_returns_requested_fields(test_app: AsyncClient, task_worker):
+    ok = (await test_app.post("/tasks", json={"prompt": "ok"})).json()["task_id"]
+    boom = (
+        await test_app.post("/tasks", json={"prompt": "boom", "params": {"force_error": True}})
+    ).json()["task_id"]
+    pending_payload = {"prompt": "later"}
+    await drain_worker(task_worker, expected_done=2)
+    pending = (await test_app.post("/tasks", json=pending_payload)).json()["task_id"]
+
+    resp = await test_app.post(
+        "/tasks/status",
+        json={"task_ids": [ok, boom, pending, "nope"], "fields": ["status"]},
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["missing"] == ["nope"]
+    assert body["items"] == [
+        {"task_id": ok, "status": "DONE"},
+        {"task_id": boom, "status": "FAILED"},
+        {"task_id": pending, "status": "PENDING"},
+    ]
+
+    full = (await test_app.post("/tasks/status", json={"task_ids": [ok, boom]})).json()
+    assert full["items"][0]["result"] == {"prompt": "ok", "params": {}}
+    assert full["items"][0]["error"] is None
+    assert "force_error" in full["items"][1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_long_poll_returns_when_task_completes(test_app: AsyncClient, task_worker):
+    task_id = (
+        await test_app.post("/tasks", json={"prompt": "wait", "params": {"duration": 0.05}})
+    ).json()["task_id"]
+
+    timed_out = await test_app.get(f"/tasks/{task_id}", params={"wait": 0.1})
+    assert timed_out.json()["status"] == "PENDING"
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    waiter = asyncio.create_task(test_app.get(f"/tasks/{task_id}", params={"wait": 5}))
+    await asyncio.sleep(0.05)
+    await drain_worker(task_worker, expected_done=1)
+    resp = await asyncio.wait_for(waiter, timeout=2)
+
+    assert resp.json()["status"] == "DONE"
+    assert loop.time() - start < 1
+
+
+@pytest.mark.asyncio
+async def test_long_polls_share_one_subscription(
+    test_app: AsyncClient, task_worker, fake_redis, monkeypatch
+):
+    from app.services import completion_service
+
+    opened = []
+    pubsub = fake_redis.pubsub
+
+    def counting_pubsub(**kwargs):
+        opened.append(True)
+        return pubsub(**kwargs)
+
+    monkeypatch.setattr(fake_redis, "pubsub", counting_pubsub)
+    task_ids = [
+        (await test_app.post("/tasks", json={"prompt": f"shared-{index}"})).json()["task_id"]
+        for index in range(20)
+    ]
+
+    waiters = [
+        asyncio.create_task(test_app.get(f"/tasks/{task_id}", params={"wait": 5}))
+        for task_id in task_ids
+    ]
+    await asyncio.sleep(0.05)
+    await drain_worker(task_worker, expected_done=20)
+    responses = await asyncio.wait_for(asyncio.gather(*waiters), timeout=2)
+
+    assert all(resp.json()["status"] == "DONE" for resp in responses)
+    assert len(opened) == 1
+    assert not (await completion_service.get_listener())._waiters
+
+
+@pytest.mark.asyncio
+async def test_sse_stream_emits_final_status(test_app: AsyncClient, task_worker):
+    task_id = (await test_app.post("/tasks", json={"prompt": "sse"})).json()["task_id"]
+    assert (await test_app.get("/tasks/unknown/events")).status_code == 404
+
+    async def read_events():
+        async with test_app.stream("GET", f"/tasks/{task_id}/events") as resp:
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            return [line async for line in resp.aiter_lines() if line.startswith("data: ")]
+
+    reader = asyncio.create_task(read_events())
+    await asyncio.sleep(0.05)
+    await drain_worker(task_worker, expected_done=1)
+    events = await asyncio.wait_for(reader, timeout=2)
+
+    assert '"status":"PENDING"' in events[0]
+    assert '"status":"DONE"' in events[-1]
+
+
+@pytest.mark.asyncio
+async def test_waiters_resubscribe_after_listener_drops(test_app: AsyncClient, task_worker):
+    from app.services import completion_service
+
+    task_id = (await test_app.post("/tasks", json={"prompt": "resubscribe"})).json()["task_id"]
+
+    async def read_events():
+        async with test_app.stream("GET", f"/tasks/{task_id}/events") as resp:
+            return [line async for line in resp.aiter_lines() if line.startswith("data: ")]
+
+    poller = asyncio.create_task(test_app.get(f"/tasks/{task_id}", params={"wait": 5}))
+    reader = asyncio.create_task(read_events())
+    await asyncio.sleep(0.05)
+    listener = await completion_service.get_listener()
+    listener._task.cancel()
+    await asyncio.sleep(0.05)
+    await drain_worker(task_worker, expected_done=1)
+
+    resp = await asyncio.wait_for(poller, timeout=2)
+    events = await asyncio.wait_for(reader, timeout=2)
+    assert resp.json()["status"] == "DONE"
+    assert '"status":"DONE"' in events[-1]
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+
+from tools.e2e_benchmark import E2EConfig, run_benchmark, run_in_process
+from tools.load_test import RateSchedule
+
+
+@pytest.mark.asyncio
+async def test_in_process_benchmark_tracks_every_task():
+    config = E2EConfig(
+        redis_url="fake",
+        total_tasks=30,
+        concurrency=5,
+        job_duration=0.01,
+        worker_concurrency=5,
+        sweep_interval=0.1,
+    )
+
+    result = await run_in_process(config)
+
+    assert result.submitted == 30
+    assert result.completed == 30
+    assert result.timed_out == 0
+    assert result.end_to_end.count == 30
+    assert result.queue_wait.count == 30
+    assert result.execution.count == 30
+    assert result.execution.percentile(50) >= 0.01
+    assert result.end_to_end.max_value >= result.execution.max_value
+    assert result.completed_per_second > 0
+    summary = result.summary()
+    assert summary["e2e_p999"] >= summary["e2e_p50"]
+
+
+@pytest.mark.parametrize("schedule", [None, RateSchedule(rate=300, duration=0.03)])
+@pytest.mark.asyncio
+async def test_rejected_submits_are_counted_not_fatal(fake_redis, schedule):
+    def handler(request: httpx.Request) -> httpx.Response:
+        index = int(json.loads(request.content)["prompt"].rsplit("-", 1)[1])
+        if index % 3 == 0:
+            return httpx.Response(503, json={"detail": "overloaded"})
+        if index % 3 == 1:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={"status": "DONE", "cached": True})
+
+    config = E2EConfig(total_tasks=9, concurrency=3, schedule=schedule, sweep_interval=0.1)
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        result = await run_benchmark(config, client, fake_redis)
+
+    total = result.rejected + result.errors + result.cached
+    assert result.rejected and result.errors and result.cached
+    assert total == (9 if schedule is None else len(list(schedule.send_times())))
+    assert result.summary()["rejected"] == result.rejected
+
+
+@pytest.mark.asyncio
+async def test_tasks_finished_before_watch_keep_their_own_latency(fake_redis):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        # The job completes before the submit response reaches the client, so
+        # only the sweep can see it.
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        await fake_redis.hset(
+            f"task:{task_id}",
+            mapping={"status": "DONE", "enqueued_at": now, "started_at": now, "finished_at": now},
+        )
+        await asyncio.sleep(0.005)
+        return httpx.Response(200, json={"task_id": task_id, "status": "PENDING", "cached": False})
+
+    config = E2EConfig(total_tasks=10, concurrency=5, sweep_interval=0.5)
+    transport = httpx.MockTransport(handler)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        result = await run_benchmark(config, client, fake_redis)
+
+    assert result.completed == 10
+    assert result.end_to_end.max_value < 0.1
@@ -2,7 +2,16 @@ import asyncio
 
 import pytest
 
-from tools.load_test import LoadTestConfig, LoadTestResult, run_load_test
+from tools.load_test import (
+    LatencyHistogram,
+    LoadTestConfig,
+    LoadTestResult,
+    RateSchedule,
+    run_distributed,
+    run_load_test,
+    shard_configs,
+    write_timeline,
+)
 
 
 class DeterministicRequester:
@@ -50,3 +59,108 @@ def test_load_test_result_summary_format():
 
     assert summary["success_rate"] == pytest.approx(2 / 3, rel=1e-3)
     assert summary["p95_latency"] >= summary["p50_latency"]
+
+
+def test_histogram_percentiles_are_within_one_percent_and_merge():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for index in range(1, 5001):
+        first.record(index / 1000)
+        second.record(index / 1000)
+
+    first.merge(LatencyHistogram.from_dict(second.to_dict()))
+
+    assert first.count == 10000
+    assert first.percentile(50) == pytest.approx(2.5, rel=0.01)
+    assert first.percentile(99.9) == pytest.approx(4.995, rel=0.01)
+    assert first.summary()["max_latency"] == 5.0
+    assert len(first.counts) < 1000
+
+
+def test_rate_schedule_shapes():
+    assert len(list(RateSchedule(rate=100, duration=2).send_times())) == 200
+    ramp = RateSchedule(rate=10, duration=10, shape="ramp", end_rate=30)
+    assert ramp.rate_at(5) == pytest.approx(20)
+    step = RateSchedule(rate=10, duration=4, shape="step", end_rate=40, steps=4)
+    assert [step.rate_at(t) for t in (0.5, 1.5, 2.5, 3.5)] == [10, 20, 30, 40]
+
+
+@pytest.mark.asyncio
+async def test_open_loop_charges_queueing_to_latency(tmp_path):
+    async def slow_server(client, config):
+        await asyncio.sleep(0.05)
+
+    config = LoadTestConfig(
+        base_url="http://testserver",
+        schedule=RateSchedule(rate=100, duration=0.3),
+        max_in_flight=1,
+        interval=0.1,
+        timeline_path=str(tmp_path / "timeline.csv"),
+    )
+
+    result = await run_load_test(config, request_fn=slow_server)
+
+    assert result.total_requests == 30
+    assert result.success_count == 30
+    # A closed-loop client would report ~50ms; requests that had to wait for
+    # the single slot are late relative to their schedule.
+    assert result.percentile(99) > 0.5
+    rows = result.timeline()
+    assert rows[0]["target_rps"] == pytest.approx(100)
+    write_timeline(config.timeline_path, rows)
+    with open(config.timeline_path) as handle:
+        assert handle.readline().startswith("start,target_rps,achieved_rps")
+
+
+def test_shard_configs_split_rate_and_totals():
+    config = LoadTestConfig(
+        base_url="http://testserver",
+        total_requests=10,
+        concurrency=8,
+        processes=3,
+        schedule=RateSchedule(rate=300, duration=1, shape="ramp", end_rate=600),
+    )
+
+    shards = shard_configs(config)
+
+    assert [shard.total_requests for shard in shards] == [4, 3, 3]
+    assert all(shard.processes == 1 and shard.concurrency == 2 for shard in shards)
+    assert [shard.schedule.rate for shard in shards] == [100, 100, 100]
+    assert shards[2].schedule.end_rate == 200
+    assert sum(len(list(shard.schedule.send_times())) for shard in shards) == pytest.approx(
+        len(list(config.schedule.send_times())), abs=3
+    )
+
+
+def test_merge_combines_counters_histograms_and_intervals():
+    first = LoadTestResult(total_requests=2, interval=1.0, generator_cpu=[0.2])
+    second = LoadTestResult(total_requests=3, interval=1.0, generator_cpu=[0.9])
+    first.record(0.1, at=0.5)
+    second.record(0.3, at=0.5)
+    second.record_failure("boom", at=1.5)
+
+    first.merge(second)
+
+    summary = first.summary()
+    assert summary["total_requests"] == 5
+    assert summary["success_count"] == 2
+    assert summary["failure_count"] == 1
+    assert summary["max_latency"] == pytest.approx(0.3)
+    assert summary["generator_processes"] == 2
+    assert summary["client_bound"] is True
+    assert [row["success_count"] for row in first.timeline()] == [2, 0]
+
+
+def test_run_distributed_merges_process_results():
+    config = LoadTestConfig(
+        base_url="http://127.0.0.1:9",
+        total_requests=6,
+        concurrency=2,
+        processes=2,
+        timeout=1.0,
+    )
+
+    result = run_distributed(config)
+
+    assert result.total_requests == 6
+    assert result.failure_count == 6
+    assert len(result.generator_cpu) == 2
@@ -0,0 +1,79 @@
+import pickle
+from collections import Counter
+
+import pytest
+
+from tools.load_test import LoadTestConfig, RateSchedule
+from tools.scenario import EndpointMix, PayloadSpec, Scenario, load_scenario, scenario_from_dict
+
+
+def make_scenario(**payload):
+    return Scenario(
+        name="test",
+        endpoints=[EndpointMix("submit", 3), EndpointMix("status", 1)],
+        payload=PayloadSpec(**payload),
+        seed=7,
+    )
+
+
+def test_endpoint_mix_follows_weights():
+    scenario = make_scenario()
+    picks = Counter(scenario.pick_endpoint().name for _ in range(4000))
+    assert picks["submit"] / 4000 == pytest.approx(0.75, abs=0.03)
+
+
+def test_repeat_ratio_sets_hit_ratio_and_prompt_sizes():
+    scenario = make_scenario(repeat_ratio=0.7, hot_keys=10, min_prompt_chars=50, max_prompt_chars=80)
+    seen, hits = set(), 0
+    for _ in range(3000):
+        prompt = scenario.next_payload()["prompt"]
+        hits += prompt in seen
+        seen.add(prompt)
+        assert 50 <= len(prompt) <= 80
+
+    assert hits / 3000 == pytest.approx(0.7, abs=0.04)
+
+
+def test_zipf_concentrates_on_top_ranks():
+    scenario = make_scenario(repeat_ratio=1.0, hot_keys=100, zipf_s=1.2)
+    prompts = Counter(scenario.next_payload()["prompt"] for _ in range(5000))
+    top = prompts.most_common(1)[0][0]
+    assert top.startswith("hot-0-") or top.startswith("hot-1-")
+    assert prompts.most_common(1)[0][1] > 5000 * 0.15
+
+
+def test_hot_prompts_match_across_processes():
+    scenario = make_scenario(repeat_ratio=1.0, hot_keys=1)
+    copy = pickle.loads(pickle.dumps(scenario))
+    assert scenario.next_payload() == copy.next_payload()
+
+
+def test_load_bundled_scenario():
+    scenario = load_scenario("tools/scenarios/production_mix.json")
+    assert {endpoint.name for endpoint in scenario.endpoints} == {"submit", "status", "batch"}
+    with pytest.raises(ValueError):
+        scenario_from_dict({"endpoints": [{"name": "delete", "weight": 1}]})
+
+
+@pytest.mark.asyncio
+async def test_scenario_drives_every_endpoint(test_app):
+    scenario = Scenario(
+        name="all",
+        endpoints=[
+            EndpointMix("submit", 1),
+            EndpointMix("status", 1),
+            EndpointMix("batch", 1, batch_size=3),
+        ],
+        payload=PayloadSpec(repeat_ratio=0.5, hot_keys=5),
+        think_time=(0.01, 0.02),
+        seed=1,
+    )
+    closed = LoadTestConfig(base_url="http://testserver")
+
+    for _ in range(12):
+        latency = await scenario(test_app, closed)
+        assert 0 <= latency < 1
+
+    assert scenario._recent_ids
+    open_loop = LoadTestConfig(base_url="http://testserver", schedule=RateSchedule(10, 1))
+    assert await scenario(test_app, open_loop) >= 0
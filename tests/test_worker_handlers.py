@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from infra.settings import Settings
+from worker import handlers, job_handler
+
+
+@pytest.fixture
+def settings():
+    yield Settings(HANDLER_THREAD_WORKERS=2, HANDLER_PROCESS_WORKERS=1)
+    handlers.shutdown_executors()
+
+
+@pytest.fixture
+def blocking_handler():
+    @handlers.register("test-blocking", mode="thread")
+    def blocking(payload):
+        time.sleep(0.2)
+        return {"prompt": payload["prompt"]}
+
+    yield handlers.resolve({"task_type": "test-blocking"})
+    handlers.unregister("test-blocking")
+
+
+@pytest.mark.asyncio
+async def test_thread_handlers_keep_the_loop_responsive(settings, blocking_handler):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    background = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        handlers.run_handler(blocking_handler, {"prompt": "a"}, settings),
+        handlers.run_handler(blocking_handler, {"prompt": "b"}, settings),
+    )
+    elapsed = time.perf_counter() - start
+    background.cancel()
+
+    assert results == [{"prompt": "a"}, {"prompt": "b"}]
+    assert elapsed < 0.35
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_process_handler_runs_in_pool(settings):
+    handler = handlers.resolve({"task_type": "tokenize"})
+
+    result = await handlers.run_handler(handler, {"prompt": "hello, world"}, settings)
+
+    assert handler.mode is handlers.ExecutionMode.PROCESS
+    assert result["tokens"] == ["hello", ",", "world"]
+    assert result["token_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_unknown_task_type_fails_the_job(fake_redis, settings):
+    task_key = f"{settings.task_hash_prefix}t1"
+    await fake_redis.hset(task_key, mapping={"status": "RUNNING"})
+
+    await job_handler.handle_job(
+        redis=fake_redis,
+        settings=settings,
+        task_id="t1",
+        payload={"prompt": "x", "task_type": "missing"},
+        signature="sig",
+    )
+
+    stored = await fake_redis.hgetall(task_key)
+    assert stored["status"] == "FAILED"
+    assert "missing" in stored["error"]
+
+
+def test_register_rejects_mismatched_function_kind():
+    with pytest.raises(TypeError):
+
+        @handlers.register("test-bad", mode="async")
+        def not_async(payload):
+            return payload
+
+    assert all(handler.task_type != "test-bad" for handler in handlers.registered_handlers())
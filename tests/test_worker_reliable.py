@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import task_service
+from infra.settings import Settings
+from worker import reliable
+from worker.runner import TaskWorker
+
+
+def reliable_settings(**overrides) -> Settings:
+    return Settings(RELIABLE_QUEUE=True, BLOCKING_DEQUEUE=False, **overrides)
+
+
+@pytest.mark.asyncio
+async def test_reliable_worker_acks_completed_job(fake_redis):
+    settings = reliable_settings()
+    submitted = await task_service.submit_task(TaskRequest(prompt="safe"), settings)
+    worker = TaskWorker(redis=fake_redis, settings=settings, worker_id="w1")
+
+    assert await worker.process_next() is True
+
+    assert (await task_service.get_task(submitted.task_id)).status == "DONE"
+    assert await fake_redis.llen(worker.processing_key) == 0
+    assert await fake_redis.zcard(reliable.lease_key(settings)) == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_job_from_crashed_worker(fake_redis):
+    settings = reliable_settings(VISIBILITY_TIMEOUT=5)
+    submitted = await task_service.submit_task(
+        TaskRequest(prompt="lost", priority="high"), settings
+    )
+    crashed = TaskWorker(redis=fake_redis, settings=settings, worker_id="crashed")
+
+    # The pop script writes the lease in the same step as the move.
+    task_id = await crashed._dequeue()
+    assert await fake_redis.zcard(reliable.lease_key(settings)) == 1
+    await fake_redis.hset(f"task:{submitted.task_id}", mapping={"status": "RUNNING"})
+
+    assert await reliable.requeue_expired(fake_redis, settings) == 0
+    requeued = await reliable.requeue_expired(fake_redis, settings, now=time.time() + 10)
+
+    assert requeued == 1
+    assert await fake_redis.llen(crashed.processing_key) == 0
+    assert await fake_redis.lrange("task_queue:high", 0, -1) == [task_id]
+    assert (await task_service.get_task(submitted.task_id)).status == "PENDING"
+
+    survivor = TaskWorker(redis=fake_redis, settings=settings, worker_id="survivor")
+    assert await survivor.process_next() is True
+    assert (await task_service.get_task(submitted.task_id)).status == "DONE"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_extends_lease(fake_redis):
+    settings = reliable_settings(VISIBILITY_TIMEOUT=5)
+    member = reliable.lease_member("owner", "{}")
+    await reliable.acquire_lease(fake_redis, settings, member)
+    before = await fake_redis.zscore(reliable.lease_key(settings), member)
+
+    time.sleep(0.01)
+    assert await reliable.extend_lease(fake_redis, settings, member) is True
+    assert await fake_redis.zscore(reliable.lease_key(settings), member) > before
+
+    await fake_redis.zrem(reliable.lease_key(settings), member)
+    assert await reliable.extend_lease(fake_redis, settings, member) is False
+
+
+@pytest.mark.asyncio
+async def test_reaper_recovers_unleased_job_from_dead_worker(fake_redis):
+    settings = reliable_settings()
+    leased = await task_service.submit_task(TaskRequest(prompt="leased"), settings)
+    orphan = await task_service.submit_task(TaskRequest(prompt="orphan"), settings)
+    crashed = TaskWorker(redis=fake_redis, settings=settings, worker_id="crashed")
+    assert await crashed._dequeue() == leased.task_id
+    # A BLMOVE whose worker died before the lease was written.
+    await fake_redis.lmove(settings.queue_key, crashed.processing_key, "LEFT", "RIGHT")
+
+    assert await reliable.requeue_orphaned(fake_redis, settings) == 0
+    later = time.time() + settings.visibility_timeout + settings.dequeue_timeout + 1
+    assert await reliable.requeue_orphaned(fake_redis, settings, now=later) == 1
+
+    assert await fake_redis.lrange(settings.queue_key, 0, -1) == [orphan.task_id]
+    assert await fake_redis.lrange(crashed.processing_key, 0, -1) == [leased.task_id]
+    assert await fake_redis.zcard(reliable.workers_key(settings)) == 0
+
+    assert await reliable.requeue_expired(fake_redis, settings, now=later) == 1
+    assert await fake_redis.exists(crashed.processing_key) == 0
@@ -0,0 +1,101 @@
+import time
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import queue_service, task_service
+from infra.settings import Settings
+from worker.runner import TaskWorker
+
+
+def retry_settings(**overrides) -> Settings:
+    return Settings(
+        BLOCKING_DEQUEUE=False,
+        MAX_RETRIES=2,
+        RETRY_BACKOFF_BASE=0.5,
+        **overrides,
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_dead_lettered(fake_redis):
+    settings = retry_settings()
+    submitted = await task_service.submit_task(
+        TaskRequest(prompt="flaky", params={"force_error": True}), settings
+    )
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+    delayed = queue_service.delayed_key_for(settings.queue_key)
+
+    for attempt in (1, 2):
+        before = time.time()
+        assert await worker.process_next() is True
+        detail = await task_service.get_task(submitted.task_id)
+        assert detail.status == "PENDING"
+        assert "force_error" in detail.error
+        due = await fake_redis.zscore(delayed, submitted.task_id)
+        assert due >= before + 0.5 * 2 ** (attempt - 1)
+        assert await queue_service.promote_due(fake_redis, settings, now=due) == 1
+
+    assert await worker.process_next() is True
+
+    detail = await task_service.get_task(submitted.task_id)
+    assert detail.status == "FAILED"
+    assert await fake_redis.lrange(queue_service.dead_letter_key(settings), 0, -1) == [
+        submitted.task_id
+    ]
+    assert await fake_redis.hget(f"task:{submitted.task_id}", "attempts") == "3"
+
+
+@pytest.mark.asyncio
+async def test_job_timeout_fails_hung_job(fake_redis):
+    settings = Settings(BLOCKING_DEQUEUE=False, JOB_TIMEOUT=0.05)
+    submitted = await task_service.submit_task(
+        TaskRequest(prompt="hang", params={"duration": 5}), settings
+    )
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+
+    start = time.perf_counter()
+    assert await worker.process_next() is True
+
+    assert time.perf_counter() - start < 1
+    detail = await task_service.get_task(submitted.task_id)
+    assert detail.status == "FAILED"
+    assert "timeout" in detail.error
+
+
+@pytest.mark.asyncio
+async def test_promote_due_moves_in_batches_and_keeps_order(fake_redis):
+    settings = Settings()
+    delayed = queue_service.delayed_key_for(settings.queue_key)
+    await fake_redis.zadd(delayed, {f"t{index}": index for index in range(250)})
+    await fake_redis.zadd(delayed, {"later": 10_000})
+
+    promoted = await queue_service.promote_due(fake_redis, settings, now=1_000, batch_size=100)
+
+    assert promoted == 250
+    queued = await fake_redis.lrange(settings.queue_key, 0, -1)
+    assert queued == [f"t{index}" for index in range(250)]
+    assert await fake_redis.zrange(delayed, 0, -1) == ["later"]
+
+
+@pytest.mark.asyncio
+async def test_dead_letter_endpoints_list_and_requeue(test_app, task_worker):
+    submitted = (
+        await test_app.post("/tasks", json={"prompt": "bad", "params": {"force_error": True}})
+    ).json()
+    await task_worker.process_next()
+
+    listing = (await test_app.get("/dead-letters")).json()
+    assert listing["total"] == 1
+    assert listing["items"][0]["task_id"] == submitted["task_id"]
+    assert listing["items"][0]["attempts"] == 1
+    assert "force_error" in listing["items"][0]["error"]
+
+    requeued = await test_app.post(f"/dead-letters/{submitted['task_id']}/requeue")
+    assert requeued.status_code == 202
+    assert requeued.json()["status"] == "PENDING"
+    assert (await test_app.get("/dead-letters")).json()["total"] == 0
+    assert (await test_app.get(f"/tasks/{submitted['task_id']}")).json()["status"] == "PENDING"
+
+    again = await test_app.post(f"/dead-letters/{submitted['task_id']}/requeue")
+    assert again.status_code == 404
@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+import pytest
+
+from app.schemas import TaskRequest
+from app.services import cache_service, task_service
+from infra.settings import Settings
+from worker.runner import TaskWorker, parse_cli_args
+
+
+async def submit_many(count: int, duration: float) -> list[str]:
+    task_ids = []
+    for index in range(count):
+        response = await task_service.submit_task(
+            TaskRequest(prompt=f"job-{index}", params={"duration": duration})
+        )
+        task_ids.append(response.task_id)
+    return task_ids
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_multiple_jobs_in_flight(fake_redis):
+    task_ids = await submit_many(4, duration=0.2)
+    worker = TaskWorker(redis=fake_redis, concurrency=4)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    started = await worker.run(max_tasks=4)
+    elapsed = loop.time() - start
+
+    assert started == 4
+    assert elapsed < 0.6
+    for task_id in task_ids:
+        detail = await task_service.get_task(task_id)
+        assert detail.status == "DONE"
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_in_flight_jobs(fake_redis):
+    task_ids = await submit_many(3, duration=0.1)
+    worker = TaskWorker(redis=fake_redis, concurrency=2)
+
+    run = asyncio.create_task(worker.run())
+    await asyncio.sleep(0.02)
+    worker.stop()
+    started = await asyncio.wait_for(run, timeout=1)
+
+    assert started == 2
+    statuses = [(await task_service.get_task(task_id)).status for task_id in task_ids]
+    assert statuses.count("DONE") == 2
+    assert statuses.count("PENDING") == 1
+    assert await fake_redis.llen("task_queue") == 1
+
+
+@pytest.mark.asyncio
+async def test_run_survives_redis_outage(fake_redis, monkeypatch):
+    from redis.exceptions import ConnectionError
+
+    task_ids = await submit_many(1, duration=0)
+    worker = TaskWorker(
+        redis=fake_redis, settings=Settings(BLOCKING_DEQUEUE=False, WORKER_POLL_INTERVAL=0.01)
+    )
+    dequeue = worker._dequeue
+    failures = iter(range(3))
+
+    async def flaky_dequeue():
+        if next(failures, None) is not None:
+            raise ConnectionError("redis is down")
+        return await dequeue()
+
+    monkeypatch.setattr(worker, "_dequeue", flaky_dequeue)
+    started = await asyncio.wait_for(worker.run(max_tasks=1), timeout=2)
+
+    assert started == 1
+    assert (await task_service.get_task(task_ids[0])).status == "DONE"
+
+
+def test_parse_cli_args_defaults_to_settings():
+    args = parse_cli_args([])
+    assert args.concurrency is None
+    assert args.max_tasks is None
+
+    args = parse_cli_args(["--concurrency", "8", "--max-tasks", "50"])
+    assert args.concurrency == 8
+    assert args.max_tasks == 50
+
+
+@pytest.mark.asyncio
+async def test_blocking_dequeue_wakes_up_on_submit(fake_redis):
+    from infra.settings import Settings
+
+    worker = TaskWorker(redis=fake_redis, settings=Settings(DEQUEUE_TIMEOUT=2))
+
+    waiting = asyncio.create_task(worker.process_next())
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    (task_id,) = await submit_many(1, duration=0)
+
+    assert await asyncio.wait_for(waiting, timeout=1) is True
+    assert (await task_service.get_task(task_id)).status == "DONE"
+
+
+@pytest.mark.asyncio
+async def test_non_blocking_dequeue_returns_immediately(fake_redis):
+    from infra.settings import Settings
+
+    worker = TaskWorker(redis=fake_redis, settings=Settings(BLOCKING_DEQUEUE=False))
+
+    assert await asyncio.wait_for(worker.process_next(), timeout=0.1) is False
+
+
+@pytest.mark.parametrize("reliable_queue", [False, True])
+@pytest.mark.asyncio
+async def test_worker_drains_legacy_json_messages(fake_redis, reliable_queue):
+    settings = Settings(BLOCKING_DEQUEUE=False, RELIABLE_QUEUE=reliable_queue)
+    payload = {"prompt": "legacy", "params": {}}
+    signature = cache_service.compute_signature(payload)
+    # Hash and message as written before queues carried bare task ids.
+    await fake_redis.hset(
+        "task:old",
+        mapping={
+            "status": "PENDING",
+            "result": "",
+            "error": "",
+            "payload": json.dumps(payload),
+            "signature": signature,
+        },
+    )
+    message = json.dumps({"task_id": "old", "payload": payload, "signature": signature})
+    await fake_redis.rpush(settings.queue_key, message)
+    worker = TaskWorker(redis=fake_redis, settings=settings)
+
+    assert await worker.process_next() is True
+
+    assert (await task_service.get_task("old", settings)).status == "DONE"
+    assert await fake_redis.keys("task:{*") == []
+    assert await fake_redis.exists(worker.processing_key) == 0
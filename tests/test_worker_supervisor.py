@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.queue_service import QueueSnapshot
+from infra.settings import Settings
+from worker.supervisor import ScalingPolicy, WorkerSupervisor, desired_processes, parse_cli_args
+
+
+class FakeProcess:
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.returncode = None
+        self.terminated = False
+        self._exited = asyncio.Event()
+
+    def exit(self, code: int) -> None:
+        self.returncode = code
+        self._exited.set()
+
+    def terminate(self) -> None:
+        self.terminated = True
+        self.exit(0)
+
+    def kill(self) -> None:
+        self.exit(-9)
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        return self.returncode
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_supervisor(fake_redis, clock, policy=None, **kwargs):
+    spawned = []
+
+    async def spawn(slot, worker_args, env):
+        process = FakeProcess(pid=len(spawned) + 1)
+        spawned.append((slot, env["WORKER_METRICS_PORT"], process))
+        return process
+
+    settings = Settings(SUPERVISOR_RESTART_BACKOFF=1.0)
+    policy = policy or ScalingPolicy(
+        min_processes=1,
+        max_processes=4,
+        backlog_per_process=10,
+        target_wait_seconds=5.0,
+        scale_down_cooldown=30.0,
+    )
+    supervisor = WorkerSupervisor(
+        redis=fake_redis, settings=settings, policy=policy, spawn=spawn, clock=clock, **kwargs
+    )
+    return supervisor, spawned
+
+
+def test_desired_processes_follows_depth_and_wait():
+    policy = ScalingPolicy(1, 8, 10, 5.0, 30.0)
+
+    assert desired_processes(2, QueueSnapshot(0, 0.0, 0.0), policy) == 1
+    assert desired_processes(2, QueueSnapshot(35, 0.0, 0.0), policy) == 4
+    assert desired_processes(2, QueueSnapshot(500, 0.0, 0.0), policy) == 8
+    # A small backlog that is still waiting too long asks for one more process.
+    assert desired_processes(3, QueueSnapshot(5, 12.0, 0.0), policy) == 4
+
+
+@pytest.mark.asyncio
+async def test_crashed_child_is_restarted_with_backoff(fake_redis):
+    clock = FakeClock()
+    supervisor, spawned = make_supervisor(fake_redis, clock)
+    await supervisor.grow(2)
+    crashed = supervisor.children[1]
+
+    crashed.exit(1)
+    await supervisor.reconcile()
+    assert 1 not in supervisor.children
+    assert supervisor.size == 2
+
+    clock.now += 1.0
+    await supervisor.reconcile()
+    assert supervisor.children[1] is not crashed
+    assert [slot for slot, _, _ in spawned] == [0, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_scale_up_on_backlog_and_down_after_cooldown(fake_redis):
+    clock = FakeClock()
+    supervisor, spawned = make_supervisor(fake_redis, clock)
+    await supervisor.grow(1)
+    await fake_redis.rpush(supervisor.settings.queue_key, *[f"t{i}" for i in range(25)])
+
+    assert await supervisor.scale() == 3
+
+    await fake_redis.delete(supervisor.settings.queue_key)
+    assert await supervisor.scale() == 3
+    clock.now += 31
+    assert await supervisor.scale() == 2
+    assert spawned[2][2].terminated
+    clock.now += 31
+    assert await supervisor.scale() == 1
+
+
+@pytest.mark.asyncio
+async def test_scale_up_when_head_of_queue_waits_too_long(fake_redis):
+    clock = FakeClock()
+    supervisor, _ = make_supervisor(fake_redis, clock)
+    await supervisor.grow(1)
+    settings = supervisor.settings
+    await fake_redis.hset(f"{settings.task_hash_prefix}old", "enqueued_at", time.time() - 60)
+    await fake_redis.rpush(settings.queue_key, "old")
+
+    assert await supervisor.scale() == 2
+
+
+@pytest.mark.asyncio
+async def test_children_get_distinct_metrics_ports(fake_redis):
+    supervisor, spawned = make_supervisor(fake_redis, FakeClock())
+    await supervisor.grow(3)
+
+    base = supervisor.settings.worker_metrics_port
+    assert [port for _, port, _ in spawned] == [str(base), str(base + 1), str(base + 2)]
+
+
+@pytest.mark.asyncio
+async def test_run_terminates_children_on_stop(fake_redis):
+    supervisor, spawned = make_supervisor(
+        fake_redis, time.monotonic, processes=2, autoscale=False
+    )
+    runner = asyncio.create_task(supervisor.run())
+    await asyncio.sleep(0.05)
+    supervisor.stop()
+    await asyncio.wait_for(runner, timeout=2)
+
+    assert len(spawned) == 2
+    assert all(process.terminated for _, _, process in spawned)
+
+
+def test_parse_cli_args():
+    args = parse_cli_args(["--processes", "4", "--concurrency", "2"])
+    assert args.processes == 4
+    assert args.concurrency == 2
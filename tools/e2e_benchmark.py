@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from redis.asyncio import Redis
+
+from tools.load_test import LatencyHistogram, RateSchedule
+
+FINAL_STATUSES = frozenset({"DONE", "FAILED"})
+
+
+@dataclass
+class E2EConfig:
+    # None runs the API and workers in-process.
+    base_url: Optional[str] = None
+    # Defaults to REDIS_URL; "fake" (in-process only) uses fakeredis.
+    redis_url: Optional[str] = None
+    total_tasks: int = 200
+    concurrency: int = 20
+    schedule: Optional[RateSchedule] = None
+    job_duration: float = 0.0
+    task_type: Optional[str] = None
+    workers: int = 1
+    worker_concurrency: int = 10
+    completion_timeout: float = 60.0
+    sweep_interval: float = 1.0
+    json_output: bool = False
+
+
+@dataclass
+class E2EResult:
+    submitted: int = 0
+    # Non-2xx submit responses (admission 429/503, 5xx) and transport errors.
+    rejected: int = 0
+    errors: int = 0
+    completed: int = 0
+    failed: int = 0
+    cached: int = 0
+    timed_out: int = 0
+    elapsed: float = 0.0
+    end_to_end: LatencyHistogram = field(default_factory=LatencyHistogram)
+    queue_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+    execution: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def completed_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return 0.0
+        return self.completed / self.elapsed
+
+    def summary(self) -> Dict[str, Any]:
+        def prefixed(name: str, histogram: LatencyHistogram) -> Dict[str, float]:
+            stats = {f"{name}_avg": histogram.mean}
+            for key, value in histogram.summary().items():
+                stats[f"{name}_{key.replace('_latency', '')}"] = value
+            return stats
+
+        return {
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cached": self.cached,
+            "timed_out": self.timed_out,
+            "elapsed": self.elapsed,
+            "completed_per_second": self.completed_per_second,
+            **prefixed("e2e", self.end_to_end),
+            **prefixed("queue_wait", self.queue_wait),
+            **prefixed("execution", self.execution),
+        }
+
+
+class CompletionTracker:
+    """Resolves per-task futures from the worker's completion events.
+
+    One pattern subscription serves every task. A periodic pipelined status
+    sweep catches tasks that finished before they were registered, or whose
+    event was missed; those are stamped with the task's ``finished_at`` rather
+    than the sweep time, so a late pickup adds no latency.
+    """
+
+    def __init__(self, redis: Redis, task_hash_prefix: str, events_prefix: str) -> None:
+        self.redis = redis
+        self.task_hash_prefix = task_hash_prefix
+        self.events_prefix = events_prefix
+        self._waiters: Dict[str, asyncio.Future] = {}
+
+    def watch(self, task_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[task_id] = future
+        return future
+
+    def forget(self, task_id: str) -> None:
+        self._waiters.pop(task_id, None)
+
+    def _resolve(self, task_id: str, status: str, observed_at: Optional[float] = None) -> None:
+        future = self._waiters.pop(task_id, None)
+        if future is not None and not future.done():
+            if observed_at is None:
+                observed_at = time.perf_counter()
+            future.set_result((status, observed_at))
+
+    async def listen(self, ready: asyncio.Event) -> None:
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.psubscribe(f"{self.events_prefix}*")
+        ready.set()
+        try:
+            while True:
+                message = await pubsub.get_message(timeout=1.0)
+                if message is None:
+                    continue
+                task_id = message["channel"][len(self.events_prefix):]
+                self._resolve(task_id, message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def sweep(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            task_ids = list(self._waiters)
+            if not task_ids:
+                continue
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for task_id in task_ids:
+                    pipe.hmget(f"{self.task_hash_prefix}{task_id}", ["status", "finished_at"])
+                rows = await pipe.execute()
+            for task_id, (status, finished_at) in zip(task_ids, rows):
+                if status not in FINAL_STATUSES:
+                    continue
+                observed_at = None
+                if finished_at:
+                    # Map the worker's wall-clock finish onto perf_counter.
+                    age = max(time.time() - float(finished_at), 0.0)
+                    observed_at = time.perf_counter() - age
+                self._resolve(task_id, status, observed_at)
+
+
+async def _timings(
+    redis: Redis, task_hash_prefix: str, task_ids: Sequence[str]
+) -> List[Tuple[Optional[str], Optional[str], Optional[str]]]:
+    async with redis.pipeline(transaction=False) as pipe:
+        for task_id in task_ids:
+            pipe.hmget(
+                f"{task_hash_prefix}{task_id}", ["enqueued_at", "started_at", "finished_at"]
+            )
+        return await pipe.execute()
+
+
+async def run_benchmark(
+    config: E2EConfig,
+    client: httpx.AsyncClient,
+    redis: Redis,
+    task_hash_prefix: str = "task:",
+    events_prefix: str = "task_events:",
+) -> E2EResult:
+    """Submit tasks through ``client`` and time each one until DONE/FAILED."""
+    if config.total_tasks <= 0 and config.schedule is None:
+        raise ValueError("total_tasks must be > 0")
+    result = E2EResult()
+    tracker = CompletionTracker(redis, task_hash_prefix, events_prefix)
+    ready = asyncio.Event()
+    listener = asyncio.create_task(tracker.listen(ready))
+    sweeper = asyncio.create_task(tracker.sweep(config.sweep_interval))
+    await ready.wait()
+    run_id = uuid.uuid4().hex[:8]
+    finished: List[str] = []
+    last_completion: Optional[float] = None
+
+    async def submit_and_track(index: int) -> None:
+        nonlocal last_completion
+        body: Dict[str, Any] = {
+            "prompt": f"e2e-{run_id}-{index}",
+            "params": {"duration": config.job_duration} if config.job_duration else {},
+        }
+        if config.task_type:
+            body["task_type"] = config.task_type
+        submitted_at = time.perf_counter()
+        try:
+            response = await client.post("/tasks", json=body)
+        except httpx.TransportError:
+            result.errors += 1
+            return
+        if response.is_error:
+            # One shed request must not abort the run or orphan its siblings.
+            result.rejected += 1
+            return
+        result.submitted += 1
+        data = response.json()
+        if data.get("cached"):
+            result.cached += 1
+            return
+        task_id = data["task_id"]
+        try:
+            status, observed_at = await asyncio.wait_for(
+                tracker.watch(task_id), timeout=config.completion_timeout
+            )
+        except asyncio.TimeoutError:
+            tracker.forget(task_id)
+            result.timed_out += 1
+            return
+        if status == "DONE":
+            result.completed += 1
+        else:
+            result.failed += 1
+        result.end_to_end.record(max(observed_at - submitted_at, 0.0))
+        last_completion = observed_at
+        finished.append(task_id)
+
+    start = time.perf_counter()
+    try:
+        if config.schedule is not None:
+            pending = []
+            for intended in config.schedule.send_times():
+                delay = start + intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                pending.append(asyncio.create_task(submit_and_track(len(pending))))
+            await asyncio.gather(*pending)
+        else:
+            counter = iter(range(config.total_tasks))
+
+            async def submitter() -> None:
+                for index in counter:
+                    await submit_and_track(index)
+
+            await asyncio.gather(*(submitter() for _ in range(config.concurrency)))
+    finally:
+        for task in (listener, sweeper):
+            task.cancel()
+        await asyncio.gather(listener, sweeper, return_exceptions=True)
+    # Sustained throughput: completions over the window they were produced in.
+    result.elapsed = (last_completion or time.perf_counter()) - start
+
+    for enqueued_at, started_at, finished_at in await _timings(
+        redis, task_hash_prefix, finished
+    ):
+        if enqueued_at and started_at:
+            result.queue_wait.record(max(float(started_at) - float(enqueued_at), 0.0))
+        if started_at and finished_at:
+            result.execution.record(max(float(finished_at) - float(started_at), 0.0))
+    return result
+
+
+async def run_in_process(config: E2EConfig) -> E2EResult:
+    """Run the ASGI app and ``config.workers`` TaskWorkers in this event loop."""
+    from app.main import app
+    from infra import redis_client
+    from infra.settings import get_settings
+    from worker.runner import TaskWorker
+
+    settings = get_settings()
+    if config.redis_url == "fake":
+        from fakeredis import aioredis as fake_aioredis
+
+        redis = fake_aioredis.FakeRedis(decode_responses=True)
+    else:
+        redis = Redis.from_url(config.redis_url or settings.redis_url, decode_responses=True)
+    redis_client.set_client(redis)
+    workers = [
+        TaskWorker(redis=redis, settings=settings, concurrency=config.worker_concurrency)
+        for _ in range(config.workers)
+    ]
+    running = [asyncio.create_task(worker.run()) for worker in workers]
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            return await run_benchmark(
+                config,
+                client,
+                redis,
+                task_hash_prefix=settings.task_hash_prefix,
+                events_prefix=settings.task_events_prefix,
+            )
+    finally:
+        for worker in workers:
+            worker.stop()
+        await asyncio.gather(*running, return_exceptions=True)
+        await redis_client.close_client()
+
+
+async def run_remote(config: E2EConfig) -> E2EResult:
+    """Drive a running API; Redis access is needed for completion tracking."""
+    from infra.settings import get_settings
+
+    settings = get_settings()
+    redis = Redis.from_url(config.redis_url or settings.redis_url, decode_responses=True)
+    try:
+        async with httpx.AsyncClient(base_url=config.base_url, timeout=30.0) as client:
+            return await run_benchmark(
+                config,
+                client,
+                redis,
+                task_hash_prefix=settings.task_hash_prefix,
+                events_prefix=settings.task_events_prefix,
+            )
+    finally:
+        await redis.aclose()
+
+
+def parse_cli_args(argv: Sequence[str] | None = None) -> E2EConfig:
+    parser = argparse.ArgumentParser(description="Benchmark submit-to-complete task latency")
+    parser.add_argument("--base-url", help="Running API to target (omit to run in-process)")
+    parser.add_argument(
+        "--redis-url",
+        help='Redis for tracking (defaults to REDIS_URL; "fake" uses fakeredis in-process)',
+    )
+    parser.add_argument("--total", type=int, default=200, help="Tasks to submit")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent submitters")
+    parser.add_argument("--rate", type=float, help="Open-loop submissions/second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Open-loop run seconds")
+    parser.add_argument("--job-duration", type=float, default=0.0, help="Task params.duration")
+    parser.add_argument("--task-type", help="task_type for submitted tasks")
+    parser.add_argument("--workers", type=int, default=1, help="In-process TaskWorkers")
+    parser.add_argument(
+        "--worker-concurrency", type=int, default=10, help="Jobs in flight per worker"
+    )
+    parser.add_argument(
+        "--completion-timeout", type=float, default=60.0, help="Per-task completion timeout"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+    schedule = RateSchedule(rate=args.rate, duration=args.duration) if args.rate else None
+    return E2EConfig(
+        base_url=args.base_url,
+        redis_url=args.redis_url,
+        total_tasks=args.total,
+        concurrency=args.concurrency,
+        schedule=schedule,
+        job_duration=args.job_duration,
+        task_type=args.task_type,
+        workers=args.workers,
+        worker_concurrency=args.worker_concurrency,
+        completion_timeout=args.completion_timeout,
+        json_output=args.json,
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    config = parse_cli_args(argv)
+    runner = run_remote if config.base_url else run_in_process
+    result = asyncio.run(runner(config))
+    summary = result.summary()
+    if config.json_output:
+        print(json.dumps(summary, indent=2))
+        return
+    for key, value in summary.items():
+        if isinstance(value, float):
+            print(f"{key}: {value:.4f}")
+        else:
+            print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
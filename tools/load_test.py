@@ -2,13 +2,181 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import csv
+import dataclasses
+import json
+import math
+import multiprocessing
 import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import Any, Awaitable, Callable, List, Optional, Sequence
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Literal, Optional, Sequence
 
 import httpx
 
 RequestFn = Callable[[httpx.AsyncClient, "LoadTestConfig"], Awaitable[Any]]
+ScheduleShape = Literal["constant", "ramp", "step"]
+
+REPORTED_PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+
+# Above this share of one core the generator, not the server, is likely the
+# bottleneck.
+CLIENT_BOUND_CPU = 0.8
+
+
+class LatencyHistogram:
+    """Log-linear bucketed latency histogram in the spirit of HdrHistogram.
+
+    Values are recorded in microseconds. Values below ``2**precision_bits``
+    are exact; larger ones share buckets whose width is at most
+    ``2**-(precision_bits - 1)`` of the value (about 1.56% for the default 7
+    bits). Percentiles report the bucket midpoint, so their error is at most
+    half that, ``2**-precision_bits`` (about 0.78%). Memory is bounded by the
+    number of distinct buckets rather than the number of samples, and
+    histograms from separate runs merge by adding counts.
+    """
+
+    def __init__(self, precision_bits: int = 7) -> None:
+        self.precision_bits = precision_bits
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min_value = math.inf
+        self.max_value = 0.0
+
+    def _index(self, micros: int) -> int:
+        sub = 1 << self.precision_bits
+        if micros < sub:
+            return micros
+        shift = micros.bit_length() - self.precision_bits
+        half = sub >> 1
+        return sub + (shift - 1) * half + ((micros >> shift) - half)
+
+    def _bucket_mid(self, index: int) -> float:
+        sub = 1 << self.precision_bits
+        if index < sub:
+            return float(index)
+        half = sub >> 1
+        shift = (index - sub) // half + 1
+        mantissa = (index - sub) % half + half
+        return (mantissa << shift) + (1 << shift) / 2
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        micros = max(int(seconds * 1_000_000), 0)
+        index = self._index(micros)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += seconds * count
+        self.min_value = min(self.min_value, seconds)
+        self.max_value = max(self.max_value, seconds)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        if other.precision_bits != self.precision_bits:
+            raise ValueError("cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * pct / 100), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                value = self._bucket_mid(index) / 1_000_000
+                return min(max(value, self.min_value), self.max_value)
+        return self.max_value
+
+    def summary(self) -> Dict[str, float]:
+        stats = {_percentile_key(pct): self.percentile(pct) for pct in REPORTED_PERCENTILES}
+        stats["max_latency"] = self.max_value
+        return stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "precision_bits": self.precision_bits,
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min_value if self.count else None,
+            "max": self.max_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls(precision_bits=data["precision_bits"])
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min_value = math.inf if data["min"] is None else data["min"]
+        histogram.max_value = data["max"]
+        return histogram
+
+
+def _percentile_key(pct: float) -> str:
+    label = f"{pct:g}".replace(".", "")
+    return f"p{label}_latency"
+
+
+@dataclass
+class RateSchedule:
+    """Target arrival rate over time for open-loop runs.
+
+    ``constant`` holds ``rate``; ``ramp`` moves linearly from ``rate`` to
+    ``end_rate``; ``step`` climbs from ``rate`` to ``end_rate`` in ``steps``
+    equal plateaus.
+    """
+
+    rate: float
+    duration: float
+    shape: ScheduleShape = "constant"
+    end_rate: Optional[float] = None
+    steps: int = 1
+    # Offset of the first send; staggers shards of a multi-process run.
+    phase: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0 or (self.end_rate is not None and self.end_rate <= 0):
+            raise ValueError("rates must be > 0")
+        if self.duration <= 0:
+            raise ValueError("duration must be > 0")
+        if self.steps <= 0:
+            raise ValueError("steps must be > 0")
+
+    def rate_at(self, elapsed: float) -> float:
+        end_rate = self.rate if self.end_rate is None else self.end_rate
+        fraction = min(max(elapsed / self.duration, 0.0), 1.0)
+        if self.shape == "ramp":
+            return self.rate + (end_rate - self.rate) * fraction
+        if self.shape == "step":
+            if self.steps == 1:
+                return self.rate
+            step = min(int(fraction * self.steps), self.steps - 1)
+            return self.rate + (end_rate - self.rate) * step / (self.steps - 1)
+        return self.rate
+
+    def scaled(self, factor: float, phase: float = 0.0) -> "RateSchedule":
+        end_rate = None if self.end_rate is None else self.end_rate * factor
+        return dataclasses.replace(
+            self, rate=self.rate * factor, end_rate=end_rate, phase=phase
+        )
+
+    def send_times(self) -> Iterator[float]:
+        """Intended send offsets (seconds from start) for every request."""
+        elapsed = self.phase
+        while elapsed < self.duration:
+            yield elapsed
+            elapsed += 1.0 / self.rate_at(elapsed)
 
 
 @dataclass
@@ -20,25 +188,130 @@ class LoadTestConfig:
     concurrency: int = 5
     payload: Optional[dict[str, Any]] = None
     timeout: float = 10.0
+    # Open-loop settings; a schedule switches run_load_test to open-loop mode.
+    schedule: Optional[RateSchedule] = None
+    max_in_flight: int = 1000
+    interval: float = 1.0
+    timeline_path: Optional[str] = None
+    # Scenario file (see tools/scenario.py) replacing the fixed payload.
+    scenario: Optional[str] = None
+    # Generator scaling: shard across processes, each with its own pool.
+    processes: int = 1
+    http2: bool = False
+    max_connections: Optional[int] = None
+    keepalive_expiry: float = 30.0
 
     def normalized_method(self) -> str:
         return self.method.upper()
 
+    def pool_size(self) -> int:
+        if self.max_connections:
+            return self.max_connections
+        return self.max_in_flight if self.schedule is not None else self.concurrency
+
+
+def build_client(config: LoadTestConfig) -> httpx.AsyncClient:
+    # Keep-alive connections sized to the expected concurrency avoid paying
+    # a TCP (and TLS) handshake per request under load.
+    size = config.pool_size()
+    limits = httpx.Limits(
+        max_connections=size,
+        max_keepalive_connections=size,
+        keepalive_expiry=config.keepalive_expiry,
+    )
+    if config.http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError as exc:  # pragma: no cover - depends on environment
+            raise RuntimeError("--http2 requires the 'h2' package (pip install httpx[http2])") from exc
+    return httpx.AsyncClient(
+        base_url=config.base_url,
+        timeout=config.timeout,
+        limits=limits,
+        http2=config.http2,
+    )
+
+
+@dataclass
+class IntervalStats:
+    start: float
+    target_rps: float = 0.0
+    success_count: int = 0
+    failure_count: int = 0
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def row(self, interval: float) -> Dict[str, Any]:
+        return {
+            "start": self.start,
+            "target_rps": self.target_rps,
+            "achieved_rps": self.success_count / interval if interval > 0 else 0.0,
+            "success_count": self.success_count,
+            "failure_count": self.failure_count,
+            **self.histogram.summary(),
+        }
+
 
 @dataclass
 class LoadTestResult:
     total_requests: int
     success_count: int = 0
     failure_count: int = 0
+    # Raw samples are optional; run_load_test only feeds the histogram.
     latencies: List[float] = field(default_factory=list)
     errors: List[str] = field(default_factory=list)
     elapsed: float = 0.0
+    histogram: LatencyHistogram = field(default_factory=LatencyHistogram)
+    interval: float = 1.0
+    intervals: Dict[int, IntervalStats] = field(default_factory=dict)
+    # Share of one core each generator process used while running.
+    generator_cpu: List[float] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        for latency in self.latencies:
+            self.histogram.record(latency)
+
+    def record(self, latency: float, at: Optional[float] = None) -> None:
+        self.success_count += 1
+        self.histogram.record(latency)
+        if at is not None:
+            self._interval(at).histogram.record(latency)
+            self._interval(at).success_count += 1
+
+    def record_failure(self, error: str, at: Optional[float] = None) -> None:
+        self.failure_count += 1
+        self.errors.append(error)
+        if at is not None:
+            self._interval(at).failure_count += 1
+
+    def _interval(self, at: float) -> IntervalStats:
+        index = int(at // self.interval)
+        stats = self.intervals.get(index)
+        if stats is None:
+            stats = self.intervals[index] = IntervalStats(start=index * self.interval)
+        return stats
+
+    def merge(self, other: "LoadTestResult") -> None:
+        self.total_requests += other.total_requests
+        self.success_count += other.success_count
+        self.failure_count += other.failure_count
+        self.latencies.extend(other.latencies)
+        self.errors.extend(other.errors)
+        self.elapsed = max(self.elapsed, other.elapsed)
+        self.histogram.merge(other.histogram)
+        for index, theirs in other.intervals.items():
+            ours = self.intervals.get(index)
+            if ours is None:
+                self.intervals[index] = theirs
+                continue
+            ours.target_rps += theirs.target_rps
+            ours.success_count += theirs.success_count
+            ours.failure_count += theirs.failure_count
+            ours.histogram.merge(theirs.histogram)
+        self.generator_cpu.extend(other.generator_cpu)
 
     @property
     def avg_latency(self) -> float:
-        if not self.latencies:
-            return 0.0
-        return sum(self.latencies) / len(self.latencies)
+        return self.histogram.mean
 
     @property
     def throughput_rps(self) -> float:
@@ -47,17 +320,10 @@ class LoadTestResult:
         return self.success_count / self.elapsed
 
     def percentile(self, pct: float) -> float:
-        if not self.latencies:
-            return 0.0
-        values = sorted(self.latencies)
-        k = (len(values) - 1) * (pct / 100)
-        f = int(k)
-        c = min(f + 1, len(values) - 1)
-        if f == c:
-            return values[int(k)]
-        d0 = values[f] * (c - k)
-        d1 = values[c] * (k - f)
-        return d0 + d1
+        return self.histogram.percentile(pct)
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        return [self.intervals[index].row(self.interval) for index in sorted(self.intervals)]
 
     def summary(self) -> dict[str, Any]:
         success_rate = self.success_count / self.total_requests if self.total_requests else 0.0
@@ -67,12 +333,27 @@ class LoadTestResult:
             "failure_count": self.failure_count,
             "success_rate": success_rate,
             "avg_latency": self.avg_latency,
-            "p50_latency": self.percentile(50),
-            "p95_latency": self.percentile(95),
+            **self.histogram.summary(),
             "throughput_rps": self.throughput_rps,
+            "generator_processes": len(self.generator_cpu) or 1,
+            "generator_cpu_max": max(self.generator_cpu, default=0.0),
+            "client_bound": max(self.generator_cpu, default=0.0) >= CLIENT_BOUND_CPU,
         }
 
 
+def write_timeline(path: str, rows: List[Dict[str, Any]]) -> None:
+    """Write per-interval rows as CSV when ``path`` ends in .csv, else JSON."""
+    target = Path(path)
+    if target.suffix.lower() == ".csv":
+        with target.open("w", newline="") as handle:
+            if rows:
+                writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+        return
+    target.write_text(json.dumps(rows, indent=2))
+
+
 async def _default_request(
     client: httpx.AsyncClient,
     config: LoadTestConfig,
@@ -93,17 +374,24 @@ async def run_load_test(
     config: LoadTestConfig,
     request_fn: Optional[RequestFn] = None,
 ) -> LoadTestResult:
+    if request_fn is None and config.scenario:
+        from tools.scenario import load_scenario
+
+        request_fn = load_scenario(config.scenario)
+    if config.schedule is not None:
+        return await run_open_loop(config, request_fn)
     if config.total_requests <= 0:
         raise ValueError("total_requests must be > 0")
     if config.concurrency <= 0:
         raise ValueError("concurrency must be > 0")
 
     request_fn = request_fn or _default_request
-    result = LoadTestResult(total_requests=config.total_requests)
+    result = LoadTestResult(total_requests=config.total_requests, interval=config.interval)
     counter = 0
     counter_lock = asyncio.Lock()
 
-    async with httpx.AsyncClient(base_url=config.base_url, timeout=config.timeout) as client:
+    cpu_start = time.process_time()
+    async with build_client(config) as client:
         start = time.perf_counter()
 
         async def worker() -> None:
@@ -118,24 +406,137 @@ async def run_load_test(
                 try:
                     reported_latency = await request_fn(client, config)
                 except Exception as exc:  # noqa: BLE001
-                    result.failure_count += 1
-                    result.errors.append(str(exc))
+                    result.record_failure(str(exc), time.perf_counter() - start)
                 else:
                     latency = (
                         float(reported_latency)
                         if isinstance(reported_latency, (int, float))
                         else time.perf_counter() - single_start
                     )
-                    result.latencies.append(latency)
-                    result.success_count += 1
+                    result.record(latency, time.perf_counter() - start)
 
         workers = [asyncio.create_task(worker()) for _ in range(config.concurrency)]
         await asyncio.gather(*workers)
         result.elapsed = time.perf_counter() - start
+    result.generator_cpu.append(_cpu_share(cpu_start, result.elapsed))
 
     return result
 
 
+async def run_open_loop(
+    config: LoadTestConfig,
+    request_fn: Optional[RequestFn] = None,
+) -> LoadTestResult:
+    """Send requests on the schedule regardless of how fast responses return.
+
+    Latency runs from each request's intended send time, so time spent queued
+    behind a slow server (or behind ``max_in_flight``) is charged to the
+    request instead of silently stretching the schedule.
+    """
+    schedule = config.schedule
+    if schedule is None:
+        raise ValueError("open-loop mode needs a rate schedule")
+    if config.max_in_flight <= 0:
+        raise ValueError("max_in_flight must be > 0")
+
+    request_fn = request_fn or _default_request
+    result = LoadTestResult(total_requests=0, interval=config.interval)
+    slots = asyncio.Semaphore(config.max_in_flight)
+    pending: set[asyncio.Task] = set()
+
+    cpu_start = time.process_time()
+    async with build_client(config) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def fire(intended: float) -> None:
+            try:
+                await request_fn(client, config)
+            except Exception as exc:  # noqa: BLE001
+                result.record_failure(str(exc), loop.time() - start)
+            else:
+                finished = loop.time() - start
+                result.record(finished - intended, finished)
+            finally:
+                slots.release()
+
+        for intended in schedule.send_times():
+            delay = start + intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            result.total_requests += 1
+            result._interval(intended).target_rps = schedule.rate_at(intended)
+            task = asyncio.create_task(fire(intended))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        result.elapsed = loop.time() - start
+    result.generator_cpu.append(_cpu_share(cpu_start, result.elapsed))
+
+    return result
+
+
+def _cpu_share(cpu_start: float, elapsed: float) -> float:
+    return (time.process_time() - cpu_start) / elapsed if elapsed > 0 else 0.0
+
+
+def shard_configs(config: LoadTestConfig) -> List[LoadTestConfig]:
+    """Split one run into ``config.processes`` independent shards."""
+    count = config.processes
+    shards = []
+    for index in range(count):
+        schedule = None
+        if config.schedule is not None:
+            # Stagger shards so their sends interleave instead of bursting
+            # in lockstep.
+            schedule = config.schedule.scaled(
+                1 / count, phase=config.schedule.phase + index / config.schedule.rate
+            )
+        shards.append(
+            dataclasses.replace(
+                config,
+                total_requests=config.total_requests // count
+                + (1 if index < config.total_requests % count else 0),
+                concurrency=max(config.concurrency // count, 1),
+                max_in_flight=max(config.max_in_flight // count, 1),
+                max_connections=(
+                    max(config.max_connections // count, 1) if config.max_connections else None
+                ),
+                schedule=schedule,
+                processes=1,
+                timeline_path=None,
+            )
+        )
+    return shards
+
+
+def _run_shard(config: LoadTestConfig, request_fn: Optional[RequestFn]) -> LoadTestResult:
+    return asyncio.run(run_load_test(config, request_fn))
+
+
+def run_distributed(
+    config: LoadTestConfig,
+    request_fn: Optional[RequestFn] = None,
+) -> LoadTestResult:
+    """Run each shard in its own process and merge the results.
+
+    ``request_fn`` must be picklable (a module-level function) to reach the
+    child processes.
+    """
+    if config.processes <= 1:
+        return asyncio.run(run_load_test(config, request_fn))
+    shards = shard_configs(config)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as pool:
+        results = list(pool.map(_run_shard, shards, [request_fn] * len(shards)))
+    merged = results[0]
+    for result in results[1:]:
+        merged.merge(result)
+    return merged
+
+
 def parse_cli_args(argv: Sequence[str] | None = None) -> LoadTestConfig:
     parser = argparse.ArgumentParser(description="Run async load test against FastAPI API")
     parser.add_argument("--base-url", required=True, help="Base URL of API, e.g. http://localhost:8000")
@@ -148,13 +549,58 @@ def parse_cli_args(argv: Sequence[str] | None = None) -> LoadTestConfig:
         "--payload",
         help="JSON payload for POST/PUT requests",
     )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Open-loop target requests/second (enables open-loop mode)",
+    )
+    parser.add_argument(
+        "--shape",
+        choices=["constant", "ramp", "step"],
+        default="constant",
+        help="Open-loop rate schedule shape",
+    )
+    parser.add_argument("--end-rate", type=float, help="Final rate for ramp/step schedules")
+    parser.add_argument("--steps", type=int, default=4, help="Plateaus for step schedules")
+    parser.add_argument("--duration", type=float, default=30.0, help="Open-loop run seconds")
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=1000,
+        help="Cap on outstanding open-loop requests",
+    )
+    parser.add_argument("--interval", type=float, default=1.0, help="Time-series bucket seconds")
+    parser.add_argument("--timeline", help="Write per-interval stats to this .json or .csv file")
+    parser.add_argument(
+        "--scenario",
+        help="Scenario JSON with endpoint mix, payload generator and think times",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Generator processes; rate, total and concurrency are split between them",
+    )
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 (needs the h2 package)")
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        help="Keep-alive pool size per process (defaults to concurrency / max-in-flight)",
+    )
 
     args = parser.parse_args(argv)
     payload_data = None
     if args.payload:
-        import json
-
         payload_data = json.loads(args.payload)
+    schedule = None
+    if args.rate:
+        schedule = RateSchedule(
+            rate=args.rate,
+            duration=args.duration,
+            shape=args.shape,
+            end_rate=args.end_rate,
+            steps=args.steps,
+        )
 
     return LoadTestConfig(
         base_url=args.base_url,
@@ -164,6 +610,14 @@ def parse_cli_args(argv: Sequence[str] | None = None) -> LoadTestConfig:
         concurrency=args.concurrency,
         timeout=args.timeout,
         payload=payload_data,
+        schedule=schedule,
+        max_in_flight=args.max_in_flight,
+        interval=args.interval,
+        timeline_path=args.timeline,
+        scenario=args.scenario,
+        processes=args.processes,
+        http2=args.http2,
+        max_connections=args.max_connections,
     )
 
 
@@ -178,8 +632,15 @@ def _print_summary(result: LoadTestResult) -> None:
 
 def main(argv: Sequence[str] | None = None) -> None:
     config = parse_cli_args(argv)
-    result = asyncio.run(run_load_test(config))
+    result = run_distributed(config)
     _print_summary(result)
+    if result.summary()["client_bound"]:
+        print(
+            "warning: a generator process used most of a CPU core; "
+            "latency numbers may be client-bound, add --processes"
+        )
+    if config.timeline_path:
+        write_timeline(config.timeline_path, result.timeline())
 
 
 if __name__ == "__main__":
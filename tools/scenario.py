@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+ENDPOINTS = ("submit", "status", "batch")
+
+
+@dataclass
+class EndpointMix:
+    name: str
+    weight: float
+    batch_size: int = 10
+
+    def __post_init__(self) -> None:
+        if self.name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint {self.name!r}; expected one of {ENDPOINTS}")
+        if self.weight < 0:
+            raise ValueError("endpoint weights must be >= 0")
+
+
+@dataclass
+class PayloadSpec:
+    """How prompts are drawn.
+
+    With probability ``repeat_ratio`` a prompt comes from ``hot_keys`` shared
+    prompts, ranked by a Zipf(``zipf_s``) distribution (0 is uniform); every
+    other prompt is unique. Once the hot set is warm the repeat ratio is
+    roughly the cache hit ratio the API sees.
+    """
+
+    repeat_ratio: float = 0.0
+    hot_keys: int = 1000
+    zipf_s: float = 1.0
+    min_prompt_chars: int = 16
+    max_prompt_chars: int = 256
+    params: Dict[str, Any] = field(default_factory=dict)
+    task_type: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.repeat_ratio <= 1:
+            raise ValueError("repeat_ratio must be between 0 and 1")
+        if self.hot_keys <= 0:
+            raise ValueError("hot_keys must be > 0")
+        if not 0 < self.min_prompt_chars <= self.max_prompt_chars:
+            raise ValueError("prompt sizes must satisfy 0 < min <= max")
+
+
+@dataclass
+class Scenario:
+    """A weighted endpoint mix usable as a load_test ``request_fn``."""
+
+    name: str
+    endpoints: List[EndpointMix]
+    payload: PayloadSpec = field(default_factory=PayloadSpec)
+    # Closed-loop only: pause between a virtual user's requests.
+    think_time: Tuple[float, float] = (0.0, 0.0)
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if not self.endpoints or sum(endpoint.weight for endpoint in self.endpoints) <= 0:
+            raise ValueError("scenario needs at least one endpoint with weight > 0")
+        self._endpoint_cdf = list(
+            itertools.accumulate(endpoint.weight for endpoint in self.endpoints)
+        )
+        ranks = range(1, self.payload.hot_keys + 1)
+        self._hot_cdf = list(itertools.accumulate(1 / rank**self.payload.zipf_s for rank in ranks))
+        self._rng = random.Random(self.seed)
+        self._prefix: Optional[str] = None
+        self._counter = itertools.count()
+        self._recent_ids: Deque[str] = deque(maxlen=1000)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Each process draws its own unique prompts; the hot set stays shared.
+        state = self.__dict__.copy()
+        state["_prefix"] = None
+        state["_counter"] = None
+        state["_recent_ids"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._counter = itertools.count()
+        self._recent_ids = deque(maxlen=1000)
+
+    def pick_endpoint(self) -> EndpointMix:
+        point = self._rng.random() * self._endpoint_cdf[-1]
+        return self.endpoints[bisect.bisect_right(self._endpoint_cdf, point)]
+
+    def _pad(self, prompt: str, rng: random.Random) -> str:
+        size = rng.randint(self.payload.min_prompt_chars, self.payload.max_prompt_chars)
+        return prompt.ljust(size, "x")
+
+    def next_payload(self) -> Dict[str, Any]:
+        spec = self.payload
+        if self._rng.random() < spec.repeat_ratio:
+            point = self._rng.random() * self._hot_cdf[-1]
+            rank = bisect.bisect_right(self._hot_cdf, point)
+            # Seeded by rank so every process builds the identical hot prompt.
+            prompt = self._pad(f"hot-{rank}-", random.Random(rank))
+        else:
+            if self._prefix is None:
+                self._prefix = uuid.uuid4().hex[:8]
+            prompt = self._pad(f"{self._prefix}-{next(self._counter)}-", self._rng)
+        payload: Dict[str, Any] = {"prompt": prompt, "params": dict(spec.params)}
+        if spec.task_type:
+            payload["task_type"] = spec.task_type
+        return payload
+
+    async def _submit(self, client: httpx.AsyncClient) -> None:
+        response = await client.post("/tasks", json=self.next_payload())
+        response.raise_for_status()
+        task_id = response.json().get("task_id")
+        if task_id:
+            self._recent_ids.append(task_id)
+
+    async def _status(self, client: httpx.AsyncClient) -> None:
+        if not self._recent_ids:
+            await self._submit(client)
+            return
+        task_id = self._recent_ids[int(self._rng.random() * len(self._recent_ids))]
+        response = await client.get(f"/tasks/{task_id}")
+        response.raise_for_status()
+
+    async def _batch(self, client: httpx.AsyncClient, size: int) -> None:
+        tasks = [self.next_payload() for _ in range(size)]
+        response = await client.post("/tasks/batch", json={"tasks": tasks})
+        response.raise_for_status()
+        items = response.json()["items"]
+        self._recent_ids.extend(item["task_id"] for item in items if item["task_id"])
+
+    async def __call__(self, client: httpx.AsyncClient, config: Any) -> float:
+        endpoint = self.pick_endpoint()
+        start = time.perf_counter()
+        if endpoint.name == "submit":
+            await self._submit(client)
+        elif endpoint.name == "status":
+            await self._status(client)
+        else:
+            await self._batch(client, endpoint.batch_size)
+        latency = time.perf_counter() - start
+        low, high = self.think_time
+        # Open-loop runs own their arrival schedule, so only closed-loop
+        # virtual users think.
+        if high > 0 and getattr(config, "schedule", None) is None:
+            await asyncio.sleep(self._rng.uniform(low, high))
+        return latency
+
+
+def scenario_from_dict(data: Dict[str, Any]) -> Scenario:
+    think = data.get("think_time", {})
+    return Scenario(
+        name=data.get("name", "scenario"),
+        endpoints=[EndpointMix(**endpoint) for endpoint in data.get("endpoints", [])],
+        payload=PayloadSpec(**data.get("payload", {})),
+        think_time=(float(think.get("min", 0.0)), float(think.get("max", 0.0))),
+        seed=data.get("seed"),
+    )
+
+
+def load_scenario(path: str) -> Scenario:
+    return scenario_from_dict(json.loads(Path(path).read_text()))
@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from app.schemas import DEFAULT_TASK_TYPE
+from infra.settings import Settings
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class PermanentJobError(RuntimeError):
+    """Raised for failures a retry cannot fix; the job goes straight to FAILED."""
+
+
+class ExecutionMode(str, Enum):
+    ASYNC = "async"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    task_type: str
+    func: Callable[[Dict[str, Any]], Any]
+    mode: ExecutionMode = ExecutionMode.ASYNC
+
+
+_registry: Dict[str, JobHandler] = {}
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def register(task_type: str, mode: ExecutionMode | str = ExecutionMode.ASYNC):
+    """Register the decorated function as the handler for ``task_type``.
+
+    Async handlers run on the event loop; thread and process handlers must be
+    plain functions, and process handlers must be importable module-level
+    functions so the pool can pickle them.
+    """
+    mode = ExecutionMode(mode)
+
+    def decorator(func: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        if (mode is ExecutionMode.ASYNC) != asyncio.iscoroutinefunction(func):
+            raise TypeError(f"{mode.value} handler {func.__name__} has the wrong function kind")
+        _registry[task_type] = JobHandler(task_type, func, mode)
+        return func
+
+    return decorator
+
+
+def unregister(task_type: str) -> None:
+    _registry.pop(task_type, None)
+
+
+def registered_handlers() -> List[JobHandler]:
+    return list(_registry.values())
+
+
+def resolve(payload: Dict[str, Any]) -> JobHandler:
+    task_type = payload.get("task_type") or DEFAULT_TASK_TYPE
+    try:
+        return _registry[task_type]
+    except KeyError:
+        raise PermanentJobError(f"no handler registered for task type {task_type!r}") from None
+
+
+def get_executor(settings: Settings, mode: ExecutionMode) -> Executor:
+    global _thread_pool, _process_pool
+    if mode is ExecutionMode.THREAD:
+        if _thread_pool is None:
+            _thread_pool = ThreadPoolExecutor(
+                max_workers=settings.handler_thread_workers,
+                thread_name_prefix="job-handler",
+            )
+        return _thread_pool
+    if _process_pool is None:
+        # spawn keeps the children free of the parent's event loop and Redis
+        # connections.
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.handler_process_workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    global _thread_pool, _process_pool
+    for pool in (_thread_pool, _process_pool):
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+    _thread_pool = _process_pool = None
+
+
+async def _dispatch(handler: JobHandler, payload: Dict[str, Any], settings: Settings) -> Any:
+    if handler.mode is ExecutionMode.ASYNC:
+        return await handler.func(payload)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(settings, handler.mode), handler.func, payload)
+
+
+async def run_handler(handler: JobHandler, payload: Dict[str, Any], settings: Settings) -> Any:
+    # A timed-out thread or process job stops being awaited, but the pool
+    # worker finishes it in the background.
+    timeout = (
+        settings.task_type_config(handler.task_type).timeout_seconds
+        or settings.job_timeout_seconds
+        or None
+    )
+    deadline = asyncio.timeout(timeout)
+    try:
+        async with deadline:
+            return await _dispatch(handler, payload, settings)
+    except TimeoutError:
+        if deadline.expired():
+            raise TimeoutError(f"{handler.task_type} job exceeded {timeout}s timeout") from None
+        raise
+
+
+@register(DEFAULT_TASK_TYPE)
+async def echo(payload: Dict[str, Any]) -> Dict[str, Any]:
+    params = payload.get("params", {})
+    duration = float(params.get("duration", 0))
+    if duration > 0:
+        await asyncio.sleep(duration)
+    if params.get("force_error"):
+        raise RuntimeError("force_error requested by client")
+    return {
+        "prompt": payload.get("prompt"),
+        "params": params,
+    }
+
+
+@register("tokenize", mode=ExecutionMode.PROCESS)
+def tokenize(payload: Dict[str, Any]) -> Dict[str, Any]:
+    tokens = _TOKEN_PATTERN.findall(payload.get("prompt", ""))
+    return {
+        "prompt": payload.get("prompt"),
+        "tokens": tokens,
+        "token_count": len(tokens),
+    }
@@ -1,12 +1,88 @@
 import asyncio
-import json
-from typing import Any, Dict
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
 
 from redis.asyncio import Redis
 
-from app.schemas import TaskStatus
-from app.services import cache_service
+from app.schemas import TaskPriority, TaskStatus
+from app.services import cache_service, queue_service
+from infra import metrics
+from infra.codec import get_codec
 from infra.settings import Settings
+from worker import handlers
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ClaimedJob:
+    payload: Dict[str, Any]
+    signature: str
+    attempt: int
+    queue_key: str
+    # The in-flight key this task holds; "" when it holds none (scheduled),
+    # None for hashes written before the field existed.
+    inflight_key: Optional[str] = None
+
+
+async def claim_job(
+    redis: Redis,
+    settings: Settings,
+    task_id: str,
+) -> Optional[ClaimedJob]:
+    task_key = f"{settings.task_hash_prefix}{task_id}"
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hmget(
+            task_key,
+            ["payload", "signature", "enqueued_at", "priority", "task_type", "inflight"],
+        )
+        pipe.hincrby(task_key, "attempts", 1)
+        pipe.hset(
+            task_key,
+            mapping={"status": TaskStatus.RUNNING.value, "started_at": time.time()},
+        )
+        (raw_payload, signature, enqueued_at, priority, task_type, inflight), attempt, _ = (
+            await pipe.execute()
+        )
+    if raw_payload is None or signature is None:
+        # The task hash expired while queued; drop the stub HSET just created.
+        await redis.delete(task_key)
+        return None
+    if enqueued_at:
+        metrics.TASK_QUEUE_WAIT_SECONDS.observe(max(time.time() - float(enqueued_at), 0.0))
+    return ClaimedJob(
+        payload=get_codec(settings.codec).loads(raw_payload),
+        signature=signature,
+        attempt=int(attempt),
+        queue_key=queue_service.queue_key_for(
+            settings, priority or TaskPriority.NORMAL, task_type
+        ),
+        inflight_key=inflight,
+    )
+
+
+async def _keep_inflight(redis: Redis, settings: Settings, inflight_key: str) -> None:
+    # The marker is short-lived; keep it alive only while this job runs so a
+    # worker that dies mid-job stops duplicates from joining a dead task.
+    interval = max(settings.inflight_ttl_seconds / 3, 0.01)
+    while True:
+        try:
+            await redis.expire(inflight_key, settings.inflight_ttl_seconds)
+        except Exception:  # noqa: BLE001
+            logger.warning("could not refresh in-flight marker %s", inflight_key, exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def retry_delay(settings: Settings, attempt: int) -> float:
+    return min(settings.retry_backoff_base * 2 ** (attempt - 1), settings.retry_backoff_cap)
+
+
+def _retries_allowed(settings: Settings, payload: Dict[str, Any]) -> int:
+    configured = settings.task_type_config(payload.get("task_type")).max_retries
+    return settings.max_retries if configured is None else configured
 
 
 async def handle_job(
@@ -15,38 +91,99 @@ async def handle_job(
     task_id: str,
     payload: Dict[str, Any],
     signature: str,
+    attempt: int = 1,
+    queue_key: Optional[str] = None,
+    inflight_key: Optional[str] = None,
 ) -> None:
     task_key = f"{settings.task_hash_prefix}{task_id}"
-    await redis.hset(task_key, mapping={"status": TaskStatus.RUNNING.value})
+    events_channel = f"{settings.task_events_prefix}{task_id}"
+    if inflight_key is None:
+        inflight_key = cache_service.build_inflight_key(settings, signature)
+    started = time.perf_counter()
+    refresher = (
+        asyncio.create_task(_keep_inflight(redis, settings, inflight_key))
+        if inflight_key
+        else None
+    )
     try:
-        params = payload.get("params", {})
-        duration = float(params.get("duration", 0))
-        if duration > 0:
-            await asyncio.sleep(duration)
-        if params.get("force_error"):
-            raise RuntimeError("force_error requested by client")
-
-        result = {
-            "prompt": payload.get("prompt"),
-            "params": params,
-        }
-        await redis.hset(
-            task_key,
-            mapping={
-                "status": TaskStatus.DONE.value,
-                "result": json.dumps(result),
-                "error": "",
-            },
+        try:
+            handler = handlers.resolve(payload)
+            # Thread and process handlers run off the loop; the Redis writes
+            # below always happen back on it.
+            result = await handlers.run_handler(handler, payload, settings)
+        finally:
+            if refresher is not None:
+                refresher.cancel()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                task_key,
+                mapping={
+                    "status": TaskStatus.DONE.value,
+                    "result": get_codec(settings.codec).dumps(result),
+                    "error": "",
+                    "finished_at": time.time(),
+                },
+            )
+            pipe.expire(task_key, settings.task_ttl_seconds)
+            cache_service.stage_cached_result(
+                pipe,
+                settings,
+                signature,
+                result,
+                settings.task_type_config(handler.task_type).cache_ttl_seconds,
+            )
+            if inflight_key:
+                pipe.delete(inflight_key)
+            pipe.publish(events_channel, TaskStatus.DONE.value)
+            await pipe.execute()
+        metrics.TASK_RUN_SECONDS.labels(TaskStatus.DONE.value).observe(
+            time.perf_counter() - started
         )
-        await redis.expire(task_key, settings.task_ttl_seconds)
-        await cache_service.store_cached_result(redis, settings, signature, result)
     except Exception as exc:  # noqa: BLE001
-        await redis.hset(
-            task_key,
-            mapping={
-                "status": TaskStatus.FAILED.value,
-                "error": str(exc),
-                "result": "",
-            },
+        metrics.TASK_RUN_SECONDS.labels(TaskStatus.FAILED.value).observe(
+            time.perf_counter() - started
         )
-        await redis.expire(task_key, settings.task_ttl_seconds)
+        retryable = not isinstance(exc, handlers.PermanentJobError)
+        if retryable and attempt <= _retries_allowed(settings, payload):
+            # The in-flight marker stays, extended past the backoff, so
+            # duplicates keep joining this task while it waits in the delayed set.
+            due = time.time() + retry_delay(settings, attempt)
+            queue_key = queue_key or queue_service.queue_key_for(
+                settings, TaskPriority.NORMAL, payload.get("task_type")
+            )
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    task_key,
+                    mapping={
+                        "status": TaskStatus.PENDING.value,
+                        "error": str(exc),
+                        "enqueued_at": due,
+                    },
+                )
+                pipe.expire(task_key, settings.task_ttl_seconds)
+                pipe.zadd(queue_service.delayed_key_for(queue_key), {task_id: due})
+                if inflight_key:
+                    pipe.expire(
+                        inflight_key,
+                        settings.inflight_ttl_seconds + math.ceil(due - time.time()),
+                    )
+                await pipe.execute()
+            return
+        dead_letters = queue_service.dead_letter_key(settings)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                task_key,
+                mapping={
+                    "status": TaskStatus.FAILED.value,
+                    "error": str(exc),
+                    "result": "",
+                    "finished_at": time.time(),
+                },
+            )
+            pipe.expire(task_key, settings.task_ttl_seconds)
+            if inflight_key:
+                pipe.delete(inflight_key)
+            pipe.lpush(dead_letters, task_id)
+            pipe.ltrim(dead_letters, 0, settings.dead_letter_max_length - 1)
+            pipe.publish(events_channel, TaskStatus.FAILED.value)
+            await pipe.execute()
@@ -0,0 +1,147 @@
+import json
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.schemas import TaskPriority, TaskStatus
+from app.services.queue_service import message_task_id, queue_key_for
+from infra.redis_scripts import LuaScript
+from infra.settings import Settings
+
+# Move a job from a processing list back to its queue. LREM doubles as the
+# claim, so a job is never pushed twice when two reapers (or an expired lease
+# and an orphan scan) race for it.
+# KEYS: processing list, queue key, task hash key
+# ARGV: task id, pending status, task ttl
+_REQUEUE_SCRIPT = LuaScript(
+    """
+if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 0 then
+    return 0
+end
+redis.call('LPUSH', KEYS[2], ARGV[1])
+redis.call('HSET', KEYS[3], 'status', ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+return 1
+"""
+)
+
+
+def processing_key(settings: Settings, worker_id: str) -> str:
+    return f"{settings.queue_key}:processing:{worker_id}"
+
+
+def lease_key(settings: Settings) -> str:
+    return f"{settings.queue_key}:leases"
+
+
+def workers_key(settings: Settings) -> str:
+    # Processing lists scored by when their owner was last seen dequeuing.
+    return f"{settings.queue_key}:workers"
+
+
+def worker_deadline(settings: Settings) -> float:
+    # A blocked BLMOVE may hold a job for up to DEQUEUE_TIMEOUT before its
+    # lease is written, so owners stay live for that long on top.
+    return time.time() + settings.visibility_timeout + settings.dequeue_timeout
+
+
+def lease_member(owner: str, task_id: str) -> str:
+    return json.dumps({"owner": owner, "task_id": task_id})
+
+
+def _deadline(settings: Settings) -> float:
+    return time.time() + settings.visibility_timeout
+
+
+async def acquire_lease(redis: Redis, settings: Settings, member: str) -> None:
+    await redis.zadd(lease_key(settings), {member: _deadline(settings)})
+
+
+async def extend_lease(redis: Redis, settings: Settings, member: str) -> bool:
+    updated = await redis.zadd(
+        lease_key(settings),
+        {member: _deadline(settings)},
+        xx=True,
+        ch=True,
+    )
+    return bool(updated)
+
+
+async def release_lease(
+    redis: Redis,
+    settings: Settings,
+    owner: str,
+    task_id: str,
+    member: str,
+) -> None:
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.lrem(owner, 1, task_id)
+        pipe.zrem(lease_key(settings), member)
+        await pipe.execute()
+
+
+async def _requeue(redis: Redis, settings: Settings, owner: str, message: str) -> bool:
+    task_key = f"{settings.task_hash_prefix}{message_task_id(message)}"
+    priority, task_type = await redis.hmget(task_key, ["priority", "task_type"])
+    queue_key = queue_key_for(settings, priority or TaskPriority.NORMAL, task_type)
+    requeued = await _REQUEUE_SCRIPT(
+        redis,
+        keys=[owner, queue_key, task_key],
+        args=[message, TaskStatus.PENDING.value, settings.task_ttl_seconds],
+    )
+    return bool(requeued)
+
+
+async def requeue_expired(
+    redis: Redis,
+    settings: Settings,
+    now: Optional[float] = None,
+    batch_size: int = 100,
+) -> int:
+    now = time.time() if now is None else now
+    expired = await redis.zrangebyscore(
+        lease_key(settings),
+        "-inf",
+        now,
+        start=0,
+        num=batch_size,
+    )
+    requeued = 0
+    for member in expired:
+        # ZREM doubles as the claim so concurrent reapers never requeue twice.
+        if not await redis.zrem(lease_key(settings), member):
+            continue
+        lease = json.loads(member)
+        requeued += await _requeue(redis, settings, lease["owner"], lease["task_id"])
+    return requeued
+
+
+async def requeue_orphaned(
+    redis: Redis,
+    settings: Settings,
+    now: Optional[float] = None,
+    batch_size: int = 100,
+) -> int:
+    """Requeue jobs left in a dead worker's processing list without a lease.
+
+    A worker that dies between BLMOVE and writing the lease leaves a job only
+    the processing list knows about; the lease scan alone never finds it.
+    Jobs that do hold a lease are left to ``requeue_expired``.
+    """
+    now = time.time() if now is None else now
+    stale = await redis.zrangebyscore(
+        workers_key(settings), "-inf", now, start=0, num=batch_size
+    )
+    requeued = 0
+    for owner in stale:
+        if not await redis.zrem(workers_key(settings), owner):
+            continue
+        leased = {
+            (lease["owner"], lease["task_id"])
+            for lease in map(json.loads, await redis.zrange(lease_key(settings), 0, -1))
+        }
+        for task_id in await redis.lrange(owner, 0, -1):
+            if (owner, task_id) not in leased:
+                requeued += await _requeue(redis, settings, owner, task_id)
+    return requeued
@@ -1,11 +1,55 @@
-import json
-from typing import Optional
+import argparse
+import asyncio
+import contextlib
+import logging
+import signal
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Set
 
 from redis.asyncio import Redis
 
-from infra import redis_client
+from app.schemas import DEFAULT_TASK_TYPE
+from app.services import queue_service
+from app.services.queue_service import QueueScheduler
+from infra import metrics, redis_client
+from infra.redis_scripts import LuaScript
 from infra.settings import Settings, get_settings
-from worker import job_handler
+from worker import handlers, job_handler, reliable
+
+logger = logging.getLogger(__name__)
+
+# Pop from the first non-empty queue. In reliable mode the job moves into the
+# processing list and its lease is written in the same step, so a crash can
+# never leave a moved job without a lease; the worker is also marked live.
+# KEYS: queues in preference order
+# ARGV: processing list or "" for a plain pop, lease key, workers key,
+#       lease deadline, worker deadline
+# Returns {task id, lease member} ("" member for a plain pop) or false.
+_POP_FIRST_SCRIPT = LuaScript(
+    """
+local reliable = ARGV[1] ~= ''
+if reliable then
+    redis.call('ZADD', ARGV[3], ARGV[5], ARGV[1])
+end
+for _, key in ipairs(KEYS) do
+    if reliable then
+        local item = redis.call('LMOVE', key, ARGV[1], 'LEFT', 'RIGHT')
+        if item then
+            local member = cjson.encode({owner = ARGV[1], task_id = item})
+            redis.call('ZADD', ARGV[2], ARGV[4], member)
+            return {item, member}
+        end
+    else
+        local item = redis.call('LPOP', key)
+        if item then
+            return {item, ''}
+        end
+    end
+end
+return false
+"""
+)
 
 
 class TaskWorker:
@@ -13,24 +57,275 @@ class TaskWorker:
         self,
         redis: Optional[Redis] = None,
         settings: Optional[Settings] = None,
+        concurrency: Optional[int] = None,
+        worker_id: Optional[str] = None,
+        task_types: Optional[Sequence[str]] = None,
     ) -> None:
         self.settings = settings or get_settings()
         self.redis = redis or redis_client.get_client()
+        self.concurrency = concurrency or self.settings.worker_concurrency
+        if self.concurrency <= 0:
+            raise ValueError("concurrency must be > 0")
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.processing_key = reliable.processing_key(self.settings, self.worker_id)
+        self.task_types = list(task_types or self.settings.worker_task_types) or None
+        self.scheduler = QueueScheduler(self.settings, self.task_types)
+        self._type_slots: Dict[str, asyncio.Semaphore] = {
+            task_type: asyncio.Semaphore(config.concurrency)
+            for task_type, config in self.settings.task_types.items()
+            if config.concurrency > 0
+        }
+        self._queue_owners = queue_service.queue_task_types(self.settings)
+        # Leases the pop script already wrote, by task id.
+        self._leases: Dict[str, str] = {}
+        self._stopping = asyncio.Event()
+
+    @property
+    def blocking(self) -> bool:
+        return self.settings.blocking_dequeue and self.settings.dequeue_timeout > 0
+
+    def _available(self, order: List[str]) -> List[str]:
+        # Skip dedicated queues whose task type is at its concurrency limit.
+        saturated = {task_type for task_type, slots in self._type_slots.items() if slots.locked()}
+        if not saturated:
+            return order
+        return [key for key in order if saturated.isdisjoint(self._queue_owners.get(key, ()))]
+
+    async def _dequeue(self) -> Optional[str]:
+        order = self._available(self.scheduler.next_order())
+        if not order:
+            await self._idle(self.settings.worker_poll_interval)
+            return None
+        timeout = self.settings.dequeue_timeout
+        if self.blocking and not self.settings.reliable_queue:
+            # BLPOP serves keys in argument order, which is the schedule.
+            popped = await self.redis.blpop(order, timeout=timeout)
+            return popped[1] if popped else None
+        destination = self.processing_key if self.settings.reliable_queue else ""
+        popped = await _POP_FIRST_SCRIPT(
+            self.redis,
+            keys=order,
+            args=[
+                destination,
+                reliable.lease_key(self.settings),
+                reliable.workers_key(self.settings),
+                time.time() + self.settings.visibility_timeout,
+                reliable.worker_deadline(self.settings),
+            ],
+        )
+        if popped:
+            task_id, member = popped
+            if member:
+                self._leases[task_id] = member
+            return task_id
+        if not self.blocking:
+            return None
+        # BLMOVE takes a single source: park on the scheduled lead queue and
+        # rescan every queue once the timeout elapses.
+        return await self.redis.blmove(
+            order[0], self.processing_key, timeout, "LEFT", "RIGHT"
+        )
+
+    async def _handle(self, message: str) -> None:
+        task_id = queue_service.message_task_id(message)
+        claimed = await job_handler.claim_job(self.redis, self.settings, task_id)
+        if claimed is None:
+            logger.warning("task %s expired before it was processed", task_id)
+            return
+        task_type = claimed.payload.get("task_type") or DEFAULT_TASK_TYPE
+        async with self._type_slots.get(task_type) or contextlib.nullcontext():
+            await job_handler.handle_job(
+                redis=self.redis,
+                settings=self.settings,
+                task_id=task_id,
+                payload=claimed.payload,
+                signature=claimed.signature,
+                attempt=claimed.attempt,
+                queue_key=claimed.queue_key,
+                inflight_key=claimed.inflight_key,
+            )
+
+    async def _heartbeat(self, member: str) -> None:
+        interval = max(self.settings.visibility_timeout / 3, 0.01)
+        while True:
+            await asyncio.sleep(interval)
+            if not await reliable.extend_lease(self.redis, self.settings, member):
+                logger.warning("lease lost for job %s", member)
+                return
+
+    async def _execute(self, task_id: str) -> None:
+        if not self.settings.reliable_queue:
+            await self._handle(task_id)
+            return
+        member = self._leases.pop(task_id, None)
+        if member is None:
+            # BLMOVE cannot write the lease itself; the orphan scan covers a
+            # crash before this ZADD lands.
+            member = reliable.lease_member(self.processing_key, task_id)
+            await reliable.acquire_lease(self.redis, self.settings, member)
+        heartbeat = asyncio.create_task(self._heartbeat(member))
+        try:
+            await self._handle(task_id)
+        finally:
+            heartbeat.cancel()
+        await reliable.release_lease(
+            self.redis, self.settings, self.processing_key, task_id, member
+        )
 
     async def process_next(self) -> bool:
-        job_data = await self.redis.lpop(self.settings.queue_key)
-        if job_data is None:
+        task_id = await self._dequeue()
+        if task_id is None:
             return False
-        job = json.loads(job_data)
-        task_id = job["task_id"]
-        payload = job["payload"]
-        signature = job["signature"]
-        await job_handler.handle_job(
-            redis=self.redis,
-            settings=self.settings,
-            task_id=task_id,
-            payload=payload,
-            signature=signature,
-        )
+        await self._execute(task_id)
         return True
 
+    async def reap_forever(self) -> None:
+        while not self.stopping:
+            try:
+                requeued = await reliable.requeue_expired(self.redis, self.settings)
+                requeued += await reliable.requeue_orphaned(self.redis, self.settings)
+            except Exception:  # noqa: BLE001
+                logger.exception("lease reaper failed")
+            else:
+                if requeued:
+                    logger.info("requeued %d expired jobs", requeued)
+            await self._idle(self.settings.reaper_interval)
+
+    async def promote_forever(self) -> None:
+        while not self.stopping:
+            try:
+                promoted = await queue_service.promote_due(self.redis, self.settings)
+            except Exception:  # noqa: BLE001
+                logger.exception("delayed task promotion failed")
+            else:
+                if promoted:
+                    logger.debug("promoted %d delayed tasks", promoted)
+            await self._idle(self.settings.delayed_poll_interval)
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping.is_set()
+
+    async def _idle(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, max_tasks: Optional[int] = None) -> int:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        in_flight: Set[asyncio.Task] = set()
+        started = 0
+        reaper = (
+            asyncio.create_task(self.reap_forever())
+            if self.settings.reliable_queue
+            else None
+        )
+        promoter = asyncio.create_task(self.promote_forever())
+
+        def on_done(task: asyncio.Task) -> None:
+            in_flight.discard(task)
+            semaphore.release()
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("job crashed", exc_info=task.exception())
+
+        try:
+            while not self.stopping:
+                if max_tasks is not None and started >= max_tasks:
+                    break
+                await semaphore.acquire()
+                if self.stopping:
+                    semaphore.release()
+                    break
+                try:
+                    task_id = await self._dequeue()
+                except Exception:  # noqa: BLE001
+                    # Outlasting the client's retries must not stop the
+                    # worker; back off and poll again once Redis returns.
+                    semaphore.release()
+                    logger.exception("dequeue failed")
+                    await self._idle(self.settings.worker_poll_interval)
+                    continue
+                if task_id is None:
+                    semaphore.release()
+                    if not self.blocking:
+                        await self._idle(self.settings.worker_poll_interval)
+                    continue
+                started += 1
+                task = asyncio.create_task(self._execute(task_id))
+                in_flight.add(task)
+                task.add_done_callback(on_done)
+        finally:
+            if in_flight:
+                await asyncio.gather(*in_flight, return_exceptions=True)
+            background = [promoter] if reaper is None else [promoter, reaper]
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+        return started
+
+
+def parse_cli_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the Redis task worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Max in-flight jobs (defaults to WORKER_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--task-types",
+        default=None,
+        help="Comma-separated task types to consume (defaults to WORKER_TASK_TYPES, else all)",
+    )
+    parser.add_argument(
+        "--max-tasks",
+        type=int,
+        default=None,
+        help="Exit after starting this many jobs",
+    )
+    return parser.parse_args(argv)
+
+
+async def serve(worker: TaskWorker, max_tasks: Optional[int] = None) -> int:
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:  # pragma: no cover - Windows
+            pass
+    try:
+        return await worker.run(max_tasks=max_tasks)
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.remove_signal_handler(sig)
+            except NotImplementedError:  # pragma: no cover - Windows
+                pass
+
+
+async def _main(args: argparse.Namespace) -> None:
+    settings = get_settings()
+    if settings.metrics_enabled and settings.worker_metrics_port:
+        metrics.start_http_server(settings.worker_metrics_port)
+    task_types = args.task_types.split(",") if args.task_types else None
+    worker = TaskWorker(concurrency=args.concurrency, task_types=task_types)
+    await redis_client.warm_up(worker.redis, settings)
+    try:
+        await serve(worker, max_tasks=args.max_tasks)
+    finally:
+        handlers.shutdown_executors()
+        await redis_client.close_client()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_cli_args(argv)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
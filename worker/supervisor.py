@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from redis.asyncio import Redis
+
+from app.services import queue_service
+from app.services.queue_service import QueueSnapshot
+from infra import redis_client
+from infra.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+MAX_RESTART_BACKOFF = 30.0
+
+SpawnFn = Callable[[int, Sequence[str], Dict[str, str]], Awaitable["asyncio.subprocess.Process"]]
+
+
+@dataclass
+class ScalingPolicy:
+    min_processes: int
+    max_processes: int
+    backlog_per_process: int
+    target_wait_seconds: float
+    scale_down_cooldown: float
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        min_processes: Optional[int] = None,
+        max_processes: Optional[int] = None,
+    ) -> "ScalingPolicy":
+        upper = max_processes or settings.supervisor_max_processes or os.cpu_count() or 1
+        lower = min_processes or settings.supervisor_min_processes
+        lower = max(min(lower, upper), 1)
+        return cls(
+            min_processes=lower,
+            max_processes=max(upper, lower),
+            backlog_per_process=settings.supervisor_backlog_per_process,
+            target_wait_seconds=settings.supervisor_target_wait_seconds,
+            scale_down_cooldown=settings.supervisor_scale_down_cooldown,
+        )
+
+    def clamp(self, count: int) -> int:
+        return max(self.min_processes, min(self.max_processes, count))
+
+
+def desired_processes(current: int, snapshot: QueueSnapshot, policy: ScalingPolicy) -> int:
+    """Process count the backlog calls for, clamped to the policy bounds.
+
+    Depth sizes the pool; a head-of-line wait above the target forces at
+    least one more process even when the backlog looks small.
+    """
+    if policy.backlog_per_process > 0:
+        target = math.ceil(snapshot.depth / policy.backlog_per_process)
+    else:
+        target = current
+    if policy.target_wait_seconds > 0 and snapshot.oldest_age > policy.target_wait_seconds:
+        target = max(target, current + 1)
+    return policy.clamp(target)
+
+
+async def spawn_worker(
+    slot: int, worker_args: Sequence[str], env: Dict[str, str]
+) -> "asyncio.subprocess.Process":
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "worker.runner", *worker_args, env=env
+    )
+
+
+class WorkerSupervisor:
+    def __init__(
+        self,
+        redis: Optional[Redis] = None,
+        settings: Optional[Settings] = None,
+        policy: Optional[ScalingPolicy] = None,
+        processes: Optional[int] = None,
+        autoscale: Optional[bool] = None,
+        worker_args: Sequence[str] = (),
+        spawn: SpawnFn = spawn_worker,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self._redis = redis
+        self.policy = policy or ScalingPolicy.from_settings(self.settings)
+        initial = processes or self.settings.supervisor_processes or os.cpu_count() or 1
+        self.initial = self.policy.clamp(initial)
+        self.autoscale = self.settings.supervisor_autoscale if autoscale is None else autoscale
+        self.worker_args = list(worker_args)
+        self._spawn = spawn
+        self._clock = clock
+        self.children: Dict[int, asyncio.subprocess.Process] = {}
+        self._retiring: Dict[int, asyncio.subprocess.Process] = {}
+        self._crashes: Dict[int, int] = {}
+        self._restart_at: Dict[int, float] = {}
+        self._last_scaled = clock()
+        self._stopping = asyncio.Event()
+
+    @property
+    def redis(self) -> Redis:
+        if self._redis is None:
+            self._redis = redis_client.get_client()
+        return self._redis
+
+    @property
+    def size(self) -> int:
+        return len(self.children) + len(self._restart_at)
+
+    def _child_env(self, slot: int) -> Dict[str, str]:
+        env = dict(os.environ)
+        base = self.settings.worker_metrics_port
+        # Every child needs its own scrape port; slot numbers are stable
+        # across restarts so the targets stay put.
+        env["WORKER_METRICS_PORT"] = str(base + slot) if base else "0"
+        return env
+
+    def _free_slot(self) -> int:
+        taken = set(self.children) | set(self._retiring) | set(self._restart_at)
+        slot = 0
+        while slot in taken:
+            slot += 1
+        return slot
+
+    async def _start(self, slot: int) -> None:
+        process = await self._spawn(slot, self.worker_args, self._child_env(slot))
+        self.children[slot] = process
+        logger.info("started worker slot %d (pid %s)", slot, process.pid)
+
+    async def grow(self, count: int) -> None:
+        for _ in range(count):
+            await self._start(self._free_slot())
+
+    def shrink(self, count: int) -> None:
+        # Retire the newest slots first; SIGTERM lets each one drain its
+        # in-flight jobs before exiting.
+        for slot in sorted(self.children, reverse=True)[:count]:
+            process = self.children.pop(slot)
+            self._retiring[slot] = process
+            process.terminate()
+            logger.info("retiring worker slot %d (pid %s)", slot, process.pid)
+
+    async def reconcile(self) -> None:
+        now = self._clock()
+        for slot, process in list(self._retiring.items()):
+            if process.returncode is not None:
+                del self._retiring[slot]
+        for slot, process in list(self.children.items()):
+            if process.returncode is None:
+                continue
+            del self.children[slot]
+            crashes = self._crashes.get(slot, 0) + 1 if process.returncode else 0
+            self._crashes[slot] = crashes
+            backoff = 0.0
+            if crashes:
+                backoff = min(
+                    self.settings.supervisor_restart_backoff * 2 ** (crashes - 1),
+                    MAX_RESTART_BACKOFF,
+                )
+            logger.warning(
+                "worker slot %d (pid %s) exited with %s; restarting in %.1fs",
+                slot,
+                process.pid,
+                process.returncode,
+                backoff,
+            )
+            self._restart_at[slot] = now + backoff
+        for slot, due in list(self._restart_at.items()):
+            if due <= now and not self.stopping:
+                del self._restart_at[slot]
+                await self._start(slot)
+
+    async def scale(self) -> int:
+        snapshot = await queue_service.take_snapshot(
+            self.redis, self.settings, clock=self._clock
+        )
+        current = self.size
+        target = desired_processes(current, snapshot, self.policy)
+        now = self._clock()
+        if target > current:
+            await self.grow(target - current)
+            self._last_scaled = now
+        elif target < current and now - self._last_scaled >= self.policy.scale_down_cooldown:
+            # Step down one process per cooldown so a brief lull does not
+            # throw away warm workers.
+            self.shrink(1)
+            self._last_scaled = now
+        return self.size
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    @property
+    def stopping(self) -> bool:
+        return self._stopping.is_set()
+
+    async def _idle(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def shutdown(self) -> None:
+        processes: List[asyncio.subprocess.Process] = [
+            *self.children.values(),
+            *self._retiring.values(),
+        ]
+        self.children.clear()
+        self._retiring.clear()
+        self._restart_at.clear()
+        for process in processes:
+            if process.returncode is None:
+                process.terminate()
+        waiting = [process.wait() for process in processes]
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*waiting), timeout=self.settings.supervisor_shutdown_timeout
+            )
+        except asyncio.TimeoutError:
+            for process in processes:
+                if process.returncode is None:
+                    logger.warning("killing worker pid %s after shutdown timeout", process.pid)
+                    process.kill()
+            await asyncio.gather(*(process.wait() for process in processes))
+
+    async def run(self) -> None:
+        tick = min(self.settings.supervisor_interval, 1.0)
+        next_scale = self._clock() + self.settings.supervisor_interval
+        await self.grow(self.initial)
+        try:
+            while not self.stopping:
+                await self.reconcile()
+                if self.autoscale and self._clock() >= next_scale:
+                    try:
+                        await self.scale()
+                    except Exception:  # noqa: BLE001
+                        logger.exception("autoscale check failed")
+                    next_scale = self._clock() + self.settings.supervisor_interval
+                await self._idle(tick)
+        finally:
+            await self.shutdown()
+
+
+def parse_cli_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run and autoscale worker processes")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Fixed number of worker processes (disables autoscaling)",
+    )
+    parser.add_argument(
+        "--min-processes",
+        type=int,
+        default=None,
+        help="Autoscale lower bound (defaults to SUPERVISOR_MIN_PROCESSES)",
+    )
+    parser.add_argument(
+        "--max-processes",
+        type=int,
+        default=None,
+        help="Autoscale upper bound (defaults to SUPERVISOR_MAX_PROCESSES or CPU count)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Max in-flight jobs per worker process",
+    )
+    parser.add_argument(
+        "--task-types",
+        default=None,
+        help="Comma-separated task types each worker process consumes",
+    )
+    return parser.parse_args(argv)
+
+
+def build_supervisor(args: argparse.Namespace) -> WorkerSupervisor:
+    settings = get_settings()
+    worker_args: List[str] = []
+    if args.concurrency is not None:
+        worker_args += ["--concurrency", str(args.concurrency)]
+    if args.task_types:
+        worker_args += ["--task-types", args.task_types]
+    if args.processes:
+        policy = ScalingPolicy.from_settings(
+            settings, min_processes=args.processes, max_processes=args.processes
+        )
+        return WorkerSupervisor(
+            settings=settings,
+            policy=policy,
+            processes=args.processes,
+            autoscale=False,
+            worker_args=worker_args,
+        )
+    policy = ScalingPolicy.from_settings(
+        settings, min_processes=args.min_processes, max_processes=args.max_processes
+    )
+    return WorkerSupervisor(settings=settings, policy=policy, worker_args=worker_args)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    supervisor = build_supervisor(args)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, supervisor.stop)
+        except NotImplementedError:  # pragma: no cover - Windows
+            pass
+    try:
+        await supervisor.run()
+    finally:
+        await redis_client.close_client()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_cli_args(argv)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()